@@ -5,38 +5,93 @@
 # E-mail(s)     : santanag1223@tamu.edu, aum_patel@tamu.edu 
 # Description   : CACHE SIMULATOR
 
-from math import log
-from time import time
-from random import randint
+from random import Random, randint, getstate, setstate
+from time import perf_counter
+from array import array
+from itertools import product, accumulate
+from bisect import bisect
 import argparse
+import contextlib
+import tempfile
+import json
+import pickle
+import struct
+import mmap
+import gzip
+import lzma
+import bz2
+import csv
+import sys
+import zlib
+import io
+import os
+
+numpy = None                # only needed by the vectorized fast path, imported by load_numpy() on first use
+
+try:
+    import resource
+except ImportError:         # resource only exists on unix, the benchmarks report a peak RSS of 0 without it
+    resource = None
+
+try:
+    import zstandard
+except ImportError:         # zstandard and lz4 are only needed for .zst and .lz4 traces
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
 
 class RAM:
     """
     The RAM class contains the RAM registers, as well as any functions that interact with the RAM.    
+    The registers come from an initial memory image that is only read when needed, and the pages of
+    registers that are written to are copied out of the image, so a large address space only costs
+    memory for the part of it that is actually changed.
+
+    The image can be a text file with a byte in hex at each line (.txt), a compact hex file with any
+    number of bytes per line (.hex), or a raw binary file (.bin) that is memory-mapped.
     """
 
-    regs = list()
+    pageBits = 12               # each page holds 2^pageBits registers
+    pageSize = 1 << pageBits
 
-    def __init__(self, ramfile: str, debug: bool = False):
+    def __init__(self, ramfile: str, debug: bool = False, addrBits: int = 8, initRange: tuple = None):
         """
         Initializes the RAM with the input.txt file provided
 
-        @param  ramfile : is the input.txt file provided in the command line to initialize the RAM with
-        @param  debug   : is a optional parameter that when enabled automatically initializes the RAM without prompt
+        @param  ramfile   : is the input.txt file provided in the command line to initialize the RAM with
+        @param  debug     : is a optional parameter that when enabled automatically initializes the RAM without prompt
+        @param  addrBits  : is a optional parameter for the width of an address, the RAM holds 2^addrBits registers
+        @param  initRange : is a optional (start, end) pair of addresses initialized from the file without prompt, end included
 
         @return the RAM object
         """
 
-
-        initialRAM = list()
-        
-        with open(ramfile,'r') as file:                                                 # gets initial RAM information from file
-            for line in file.readlines(): initialRAM.append(line.strip())
-
-        for _ in range(256): self.regs.append("00")                                     # initialize registers to "00"
+        self.addrBits   = addrBits
+        self.size       = 1 << addrBits
+        self.pages      = dict()                                                        # page number -> registers of a page that was written to
+        self.dirtyPages = set()                                                         # pages written to since the last binary dump
+        self.ramfile    = ramfile
+        self.format     = ram_format(ramfile)
+        self.bytesRead    = 0                                                           # traffic between the cache and the RAM
+        self.bytesWritten = 0
+        self.numReads     = 0                                                           # requests from the cache, for the timing model
+        self.numWrites    = 0
+        self.checkpoint        = None                                                   # the checkpoint file last saved to, see save_checkpoint()
+        self.checkpointPages   = set()                                                  # pages written to since that checkpoint
+        self.checkpointRecords = 0                                                      # number of checkpoints in that file
+        self.checkpointSize    = 0                                                      # size of that file right after the last checkpoint
+
+        self.load_image()
 
         if debug:                                                                       # debug sets all the memory with no prompt
-            for i in range(256): self.regs[i] = initialRAM[i]
+            self.imageStart = 0
+            self.imageEnd   = min(len(self.image), self.size)
+
+        elif initRange is not None:                                                     # so does a range given up front
+            self.init_range(*initRange)
 
         else:                                                                           # otherwise, we prompt the user for what regs to initialize
             print("*** Welcome to the cache simulator ***\ninitialize the RAM:")
@@ -45,54 +100,276 @@ class RAM:
             start = int(userIn.split(" ")[1].replace("0x",""),16)
             end   = int(userIn.split(" ")[2].replace("0x",""),16)
 
-            while start <= end:
-                self.regs[start] = initialRAM[start]
-                start += 1
+            self.init_range(start, end)
 
             print("RAM successfully initialized!")
+
+        # the image file is already an up to date binary dump as long as all of it was loaded
+        self.synced = ramfile if self.format == "bin" and self.imageStart == 0 and self.imageEnd == len(self.image) else None
     
+    def init_range(self, start: int, end: int):
+        """
+        Sets the registers that are initialized from the image file, the others start out as 00
+
+        @param  start    : the first address initialized
+        @param  end      : the last address initialized
+
+        @return no return value
+        """
+
+        self.imageStart = min(start, len(self.image))
+        self.imageEnd   = max(self.imageStart, min(end + 1, len(self.image), self.size))
+
+    def load_image(self):
+        """
+        Gets the initial RAM information from the RAM file, memory-mapping binary images
+
+        @param  no parameters other than the reference to itself
+
+        @return no return value
+        """
+
+        if self.format == "bin":
+            with open(self.ramfile,'rb') as file:
+                if os.fstat(file.fileno()).st_size: self.image = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+                else:                               self.image = b""
+        else:
+            with open(self.ramfile,'r') as file:
+                self.image = bytes.fromhex(file.read())
+
+    def __getstate__(self) -> dict:
+        """
+        Pickles the RAM without its image, which is loaded again from the RAM file, or its pages, which
+        save_checkpoint() writes on their own. The size of the image and the modification time of the RAM file
+        are kept to check the RAM file against, which takes the same time however large the image is.
+
+        @return the attributes being pickled
+        """
+
+        state = dict(self.__dict__)
+        del state["image"]
+        state["pages"]           = dict()
+        state["checkpointPages"] = set()
+        state["imageSize"]       = len(self.image)
+        state["imageModified"]   = os.stat(self.ramfile).st_mtime_ns
+        return state
+
+    def __setstate__(self, state: dict):
+        """
+        Unpickles the RAM, loading its image from the RAM file again
+
+        @param  state : the attributes that were pickled
+
+        @return no return value, a ValueError is raised when the RAM file changed since the RAM was pickled
+        """
+
+        imageSize = state.pop("imageSize", None)
+        modified  = state.pop("imageModified", None)
+
+        self.__dict__.update(state)
+        self.load_image()
+
+        if imageSize is not None and (len(self.image) != imageSize or os.stat(self.ramfile).st_mtime_ns != modified):
+            raise ValueError(f"{self.ramfile} changed since the checkpoint was saved")
+
     def view(self):
         """
         Prints the contents of the RAM's registers to the terminal in the format:
         <Address in Hex> : < 8 Bytes in Hex>
+        Only the pages that were initialized or written to are printed when the RAM is larger than a single page.
 
         @param  This function doesn't have any parameters, only the reference to itself
 
         @return no return value
         """
 
-        print("memory_size:256")
+        digits = max(2, (self.addrBits + 3) // 4)
+
+        print(f"memory_size:{self.size}")
         print("memory_content:")
-        i    = 0
-        line = "0x00:"
-        while i < 256:
-            line += str(self.regs[i]) + " "
-            i    += 1
-            if i % 8 == 0:
-                print(line)
-                if i == 8:    
-                    line = "0x08:"
-                else:
-                    line = hex(i) + ":"
+
+        if self.size <= RAM.pageSize: ranges = [(0, self.size)]
+        else:                         ranges = [(p << RAM.pageBits, RAM.pageSize) for p in self.used_pages()]
+
+        for start, length in ranges:
+            regs = self.read_bytes(start, length)
+            for i in range(0, length, 8):
+                print(f"0x{start + i:0{digits}x}:" + regs[i : i + 8].hex(" ").upper() + " ")
 
         return
 
-    def dump(self):
+    def used_pages(self) -> list:
         """
-        Dumps the RAM into a .txt file named 'ram.txt'
+        Lists the pages that were initialized from the image or written to
 
         @param  This function doesn't have any parameters, only the reference to itself
 
+        @return the sorted page numbers
+        """
+
+        used = set(self.pages)
+        if self.imageEnd > self.imageStart:
+            used.update(range(self.imageStart >> RAM.pageBits, ((self.imageEnd - 1) >> RAM.pageBits) + 1))
+
+        return sorted(used)
+
+    def dump(self, dumpfile: str = None):
+        """
+        Dumps the RAM into a file, 'ram.txt' by default or 'ram.bin' when the RAM was loaded from a binary image.
+        Text dumps go up to the last page that was initialized or written to. Binary dumps to a file that
+        already holds the RAM's contents only write the pages that changed since.
+
+        @param  dumpfile : optional name of the file, its extension picks the format like the RAM file does
+
         @return no return value
         """
 
-        with open("ram.txt","w") as file:
-            for i in self.regs:
-                file.write(str(i) + "\n")
+        if dumpfile is None: dumpfile = "ram.bin" if self.format == "bin" else "ram.txt"
+        dumpFormat = ram_format(dumpfile)
+
+        if self.size <= RAM.pageSize: end = self.size
+        else:                         end = (max(self.used_pages(), default = -1) + 1) << RAM.pageBits
+
+        if dumpFormat != "bin":
+            perLine = 1 if dumpFormat == "txt" else 16
+            with open(dumpfile,"w") as file:
+                for start in range(0, end, RAM.pageSize):
+                    regs = self.read_bytes(start, min(RAM.pageSize, end - start))
+                    for i in range(0, len(regs), perLine):
+                        file.write(regs[i : i + perLine].hex().upper() + "\n")
+            return
+
+        if self.synced is not None and os.path.abspath(dumpfile) == os.path.abspath(self.synced):
+            with open(dumpfile,"r+b") as file:                                          # only flush the pages that changed
+                for p in sorted(self.dirtyPages):
+                    file.seek(p << RAM.pageBits)
+                    file.write(self.pages[p][: min(RAM.pageSize, self.size - (p << RAM.pageBits))])
+
+        else:
+            end = min(end, self.size)
+            with open(dumpfile,"wb") as file:
+                for start in range(0, end, RAM.pageSize):
+                    file.write(self.read_bytes(start, min(RAM.pageSize, end - start)))
+
+        self.synced = dumpfile
+        self.dirtyPages.clear()
         
         return
 
-    def load_blocks(self, numBlocks: int, address: str):
+    def image_bytes(self, address: int, length: int) -> bytes:
+        """
+        Reads a range of registers from the initial image, registers outside of the initialized range read as 00
+
+        @param  address   : the first address being read
+        @param  length    : the number of registers being read
+
+        @return the registers in the range
+        """
+
+        start = max(address, self.imageStart)
+        end   = min(address + length, self.imageEnd)
+
+        if start >= end:                                  return bytes(length)
+        if start == address and end == address + length:  return self.image[address : address + length]
+
+        return bytes(start - address) + self.image[start : end] + bytes(address + length - end)
+
+    def read_bytes(self, address: int, length: int) -> bytes:
+        """
+        Reads a range of registers
+
+        @param  address   : the first address being read
+        @param  length    : the number of registers being read
+
+        @return the registers in the range
+        """
+
+        pageNum = address >> RAM.pageBits
+        start   = address & (RAM.pageSize - 1)
+
+        if start + length <= RAM.pageSize:                                              # the range is inside a single page
+            page = self.pages.get(pageNum)
+            if page is None: return self.image_bytes(address, length)
+            return bytes(page[start : start + length])
+
+        retBytes = bytearray()
+        while length > 0:
+            chunk = min(length, RAM.pageSize - start)
+            retBytes += self.read_bytes(address, chunk)
+            address  += chunk
+            length   -= chunk
+            start     = 0
+
+        return bytes(retBytes)
+
+    def get_page(self, pageNum: int) -> bytearray:
+        """
+        Grabs a page to write to, copying it out of the initial image the first time
+
+        @param  pageNum   : the number of the page
+
+        @return the registers of the page
+        """
+
+        page = self.pages.get(pageNum)
+        if page is None:
+            page = self.pages[pageNum] = bytearray(self.image_bytes(pageNum << RAM.pageBits, RAM.pageSize))
+
+        self.dirtyPages.add(pageNum)
+        self.checkpointPages.add(pageNum)
+        return page
+
+    def write_bytes(self, address: int, data: bytes):
+        """
+        Writes a range of registers
+
+        @param  address   : the first address being written
+        @param  data      : the bytes being written
+
+        @return no return value
+        """
+
+        data = memoryview(data)
+        while len(data):
+            start = address & (RAM.pageSize - 1)
+            chunk = min(len(data), RAM.pageSize - start)
+
+            self.get_page(address >> RAM.pageBits)[start : start + chunk] = data[:chunk]
+            address += chunk
+            data     = data[chunk:]
+
+    def write_blocks(self, address: int, blocks: bytes):
+        """
+        Writes a whole block back to the RAM's registers
+
+        @param  address   : the address of the first byte of the block
+        @param  blocks    : the bytes of the block
+
+        @return no return value
+        """
+
+        self.write_bytes(address, blocks)
+        self.bytesWritten += len(blocks)
+        self.numWrites    += 1
+
+    def count_transfer(self, numBytes: int, write: int = 0):
+        """
+        Counts a transfer with a cache that only keeps tags, without moving any data
+
+        @param  numBytes  : the bytes that would have been moved
+        @param  write     : 1 for a write to the RAM, 0 for a read
+
+        @return no return value
+        """
+
+        if write:
+            self.bytesWritten += numBytes
+            self.numWrites    += 1
+        else:
+            self.bytesRead    += numBytes
+            self.numReads     += 1
+
+    def load_blocks(self, numBlocks: int, address: int):
         """
         Reads in a block from the RAM using the Cache's block size as a parameter
 
@@ -102,31 +379,31 @@ class RAM:
         @return retBlocks : the specified number blocks found at the address in the RAM's regs
         """
         
-        ramAdd    = int(address.replace("0x",""),16)
-        startAdd  = (ramAdd // numBlocks) * numBlocks
-        retBlocks = list()
-        for i in range(startAdd, startAdd + numBlocks):
-            retBlocks.append(self.regs[i])
+        startAdd  = (address // numBlocks) * numBlocks
+        retBlocks = self.read_bytes(startAdd, numBlocks)
+        self.bytesRead += numBlocks
+        self.numReads  += 1
 
         return retBlocks
 
-    def write_block(self, numBlocks: int, offNum: int, address: str, hexByte: str):
+    def write_block(self, numBlocks: int, offNum: int, address: int, byte: int):
         """
         Writes a specified byte to the RAM's registers at the address given
 
         @param  numBlocks : the cache's block size
         @param  offNum    : the cache's number of offset bits
         @param  address   : the specified address 
-        @param  hexByte   : the byte that is being written to the regs
+        @param  byte      : the byte that is being written to the regs
 
         @return retBlocks : the byte that was written to the regs
         """
 
-        ramAdd    = int(address.replace("0x",""),16)
-        startAdd  = (ramAdd // numBlocks) * numBlocks
-        RAM.regs[startAdd + offNum] = hexByte
+        startAdd  = (address // numBlocks) * numBlocks + offNum
+        self.get_page(startAdd >> RAM.pageBits)[startAdd & (RAM.pageSize - 1)] = byte
+        self.bytesWritten += 1
+        self.numWrites    += 1
 
-        return hexByte
+        return byte
 
 
 
@@ -140,28 +417,80 @@ class Cache:
     offset_bit  = 0         # b - number of offset bits
     tag_bit     = 0         # t - number of tag bits
     index_bit   = 0         # s - number of index bits
+    addrBits    = 8         # m - number of address bits
+
+    scanLimit   = 16        # sets with more lines than this are looked up through an index
 
     repPolicy   = 0  
     hitPolicy   = 0
     misPolicy   = 0
-
-    cachedSets  = list()    # cachedSets houses sets, that inturn houses SetLines, and SetLines contain the Blocks
+    prefetch    = 0         # prefetcher (0 - none, 1 - next-line, 2 - stride, 3 - stream), see PREFETCHERS
+    tagsOnly    = False     # only keep the tags, the blocks aren't stored and the RAM only counts the traffic
 
     numHit      = 0       
     numMis      = 0
 
-    startCache  = list()    # allows cache to be filled before eviction occurs 
-                            # index of startCache is the set it's counting
+    inclusion   = "nine"    # how the level relates to the levels above it in a Hierarchy
+    rng         = None      # random.Random of the cache's own, None while it uses the shared one of the random module
+    listeners   = None      # subscribed Listeners, None while nobody listens so the accesses only pay one check
 
-    def __init__(self, debug = False):
+    def __init__(self, debug = False, cacheSize: int = 0, blockSize: int = 0, assoc: int = 0,
+                 repPolicy: int = 1, hitPolicy: int = 1, misPolicy: int = 1, addrBits: int = 8, prefetch: int = 0, seed: int = None,
+                 tagsOnly: bool = False):
         """
         Initializes the cache using the user's prompts
 
-        @param  debug : optional parameter that allows the cache to be initialized without prompts
+        @param  debug     : optional parameter that allows the cache to be initialized without prompts
+        @param  cacheSize : optional cache size, when given the cache is configured from the parameters without prompts
+        @param  blockSize : optional block size, used along with cacheSize
+        @param  assoc     : optional associativity, used along with cacheSize
+        @param  repPolicy : optional replacement policy (1 - random, 2 - LRU, 3 - LFU, 4 - FIFO, 5 - tree-PLRU), used along with cacheSize
+        @param  hitPolicy : optional write hit policy (1 - write-through, 2 - write-back), used along with cacheSize
+        @param  misPolicy : optional write miss policy (1 - write-allocate, 2 - no-write-allocate), used along with cacheSize
+        @param  addrBits  : optional width of an address, the cache size can be at most 2^addrBits
+        @param  prefetch  : optional prefetcher (0 - none, 1 - next-line, 2 - stride, 3 - stream), used along with cacheSize
+        @param  seed      : optional seed of a random number generator of the cache's own, for caches that have to give the
+                            same results next to other ones. Without it random replacement uses the shared one of the random module
+        @param  tagsOnly  : optional, only simulate the hits and misses: the blocks aren't stored or copied, reads give 00,
+                            and the RAM only counts the traffic. The statistics are the same as with the data
 
         @return the Cache Object
         """
 
+        self.addrBits           = addrBits
+        self.rng                = Random(seed) if seed is not None else None
+        self.numHit             = 0
+        self.numMis             = 0
+        self.numEvict           = 0
+        self.numWriteBack       = 0
+        self.numReadHit         = 0    # hits and misses counted apart for reads and writes,
+        self.numReadMis         = 0    # numHit and numMis keep counting both
+        self.numWriteHit        = 0
+        self.numWriteMis        = 0
+        self.numWriteBackBytes  = 0    # bytes of dirty data written back to the level below
+        self.numPrefetch        = 0    # blocks fetched by the prefetcher
+        self.numPrefetchUseful  = 0    # prefetched lines later used by a demand access
+        self.numPrefetchLate    = 0    # useful prefetches used before they would have arrived
+        self.numPrefetchUseless = 0    # prefetched lines evicted without being used
+        self.numPollution       = 0    # demand misses on blocks a prefetch evicted
+        self.numBackInval       = 0    # upper level lines invalidated to keep an inclusive hierarchy inclusive
+        self.above              = None # the level that misses into this one, None for a lone cache or the L1
+        self.below              = None # the backing store this level misses into, None when it is handed in per access
+        self.listeners          = None # Listeners told about every hit, miss, eviction, writeback, fill and flush
+
+        if cacheSize:
+            self.cacheSize = cacheSize
+            self.blockSize = blockSize
+            self.assoc     = assoc
+            self.repPolicy = repPolicy
+            self.hitPolicy = hitPolicy
+            self.misPolicy = misPolicy
+            self.prefetch  = prefetch
+            self.tagsOnly  = tagsOnly
+
+            self.build()
+            return
+
         if debug:
             self.cacheSize = 32
             self.blockSize = 8
@@ -170,66 +499,83 @@ class Cache:
             self.hitPolicy = 1
             self.misPolicy = 1
 
-            self.set        = int(self.cacheSize / (self.blockSize * self.assoc))
-            self.offset_bit = int(log(self.blockSize, 2))
-            self.index_bit  = int(log(self.set, 2))
-            self.tag_bit    = 8 - (self.offset_bit + self.index_bit)
-            
-            for _ in range(self.set):
-            
-                newSet = list()
-                for i in range(int(self.assoc)):
-                    newSet.append(SetLine())
+            self.build()
+            return
 
-                self.cachedSets.append(newSet)
-            
-            blocks = list()
-            for _ in range(self.blockSize):
-                blocks.append("00")
-            
-            for s in self.cachedSets:
-                for l in s:
-                    l.blocks = blocks
+        print("configure the cache:")
+        while True:
+            self.cacheSize = valid_input("cache size: "        , 8, 1 << addrBits)
+            self.blockSize = valid_input("data block size: "   , 1, 1 << addrBits)
+            self.assoc     = valid_input("associativity: "     , 1, 4, notAllow = 3)
+            self.repPolicy = valid_input("replacement policy: ", 1, 5)
+            self.hitPolicy = valid_input("write hit policy: "  , 1, 2)
+            self.misPolicy = valid_input("write miss policy: " , 1, 2)
+
+            try:
+                self.build()
+                break
+            except ValueError as error:                     # each value was in range, but they don't make a cache together
+                print(f"[ERROR] - {error}. Configure the cache again.")
+
+        print("cache successfully configured!")
 
-            for _ in range(self.set):
-                self.startCache.append(0)
+    def build(self):
+        """
+        Computes the cache geometry from the configured sizes and creates the empty cache state.
+        Every line of the cache lives at index (set * assoc + way) of the flat state arrays, and its
+        blocks live at (line * blockSize) of the data bytearray.
 
-            return
+        @param  there are no parameters except the reference to itself
+
+        @return no return value, a ValueError is raised when the configuration makes no sense, see check_config()
+        """
+
+        check_config(self.addrBits, self.cacheSize, self.blockSize, self.assoc, self.repPolicy, self.hitPolicy, self.misPolicy, self.prefetch)
 
-        print("configure the cache:")
-        self.cacheSize = valid_input("cache size: "        , 8, 256)
-        self.blockSize = valid_input("data block size: "   , 1, 256)
-        self.assoc     = valid_input("associativity: "     , 1, 4, notAllow = 3)
-        self.repPolicy = valid_input("replacement policy: ", 1, 2)
-        self.hitPolicy = valid_input("write hit policy: "  , 1, 2)
-        self.misPolicy = valid_input("write miss policy: " , 1, 2)
-        
         self.set        = int(self.cacheSize / (self.blockSize * self.assoc))
-        self.offset_bit = int(log(self.blockSize, 2))
-        self.index_bit  = int(log(self.set, 2))
-        self.tag_bit    = 8 - (self.offset_bit + self.index_bit)
+        self.offset_bit = self.blockSize.bit_length() - 1
+        self.index_bit  = self.set.bit_length() - 1
+        self.tag_bit    = self.addrBits - (self.offset_bit + self.index_bit)
+
+        self.offMask    = self.blockSize - 1                    # shift/mask decoder used by addressBits
+        self.setMask    = self.set - 1
+        self.tagShift   = self.offset_bit + self.index_bit
+
+        lines = self.set * self.assoc
+
+        self.tags       = array('q', [-1]) * lines              # tag of each line, -1 while the line is invalid
+        self.validBits  = bytearray(lines)                      # valid bit of each line
+        self.dirtyBits  = bytearray(lines)                      # dirty bit of each line
+        self.data       = bytearray(0 if self.tagsOnly else lines * self.blockSize) # blocks of every line, back to back
+        self.replacer   = self.new_replacer()
+
+        # wide sets also index their lines by block number ((tag << index_bit) | set), so looking up
+        # a tag doesn't cost more as the associativity grows
+        self.lineOf     = dict() if self.assoc > Cache.scanLimit else None
+
+        self.prefetcher = PREFETCHERS[self.prefetch](self) if self.prefetch else None
+        self.prefetched = None                                  # 1 while a prefetched line hasn't been used yet
+        self.issued     = None                                  # access number when each prefetched line was fetched
+        self.polluters  = dict()                                # blocks recently evicted to make room for a prefetch
+        self.clock      = 0                                     # demand accesses so far, the prefetchers' time
+
+        if self.prefetcher is not None:                         # only a cache that prefetches keeps track of them
+            self.prefetched = bytearray(lines)
+            self.issued     = array('q', bytes(8 * lines))
+    
+    def new_replacer(self):
+        """
+        Creates the replacement information of the empty cache
 
-        for _ in range(self.set):               # create self.set number of sets
-            
-            newSet = list()
-            for i in range(int(self.assoc)):    # create the associativity number of lines
-                newSet.append(SetLine())
+        @param  there are no parameters except the reference to itself
 
-            self.cachedSets.append(newSet)      # add the set to the over all Cache structure (cachedSets)
-            
-        blocks = list()
-        for _ in range(self.blockSize):         # create a list of empty bytes of the same size as block Size
-            blocks.append("00")
-            
-        for s in self.cachedSets:               # set all lines to those blocks
-            for l in s:
-                l.blocks = blocks
+        @return the Replacement object of the replacement policy
+        """
 
-        for _ in range(self.set):               # make sure all sets fill before evicting
-            self.startCache.append(0)
+        replacer = REPLACEMENT_POLICIES[self.repPolicy](self.set, self.assoc)
+        if self.rng is not None: replacer.rng = self.rng
+        return replacer
 
-        print("cache successfully configured!")
-    
     def read(self, address: str, ram: RAM):
         """
         Attemps to read an address from the cache, if there is a miss, the replacement policy is used and the block is copied from the RAM.
@@ -240,32 +586,22 @@ class Cache:
         @return there is no return value, but values are printed to the terminal
         """
 
-        tagBits, indBits, offBits = self.addressBits(address)
-
-        setNum = int(indBits,2)
-        tagHex = bin_to_hex(tagBits)
-        offNum = int(offBits,2)
-
-        lineIndex = self.find_line(setNum, tagHex)
+        setNum, tag, offNum, lineIndex, vicNum = self.load(int(address, 16), ram)
 
         print(f"set:{setNum}")
-        print(f"tag:{tagHex}")
+        print(f"tag:{tag:02x}")
 
         if lineIndex == -1: 
             print("hit:no")
-            vicNum = self.get_victum(setNum)
             print(f"eviction_line:{vicNum}")
-            self.cachedSets[setNum][vicNum].blocks = ram.load_blocks(self.blockSize, address)
-            self.cachedSets[setNum][vicNum].tagHex = tagHex
-            self.cachedSets[setNum][vicNum].validBit  = 1
             print(f"ram_address:{address}")
-            print(f"data:0x{self.cachedSets[setNum][vicNum].get_blocks()[offNum]}")
+            print(f"data:0x{self.get_block(setNum * self.assoc + vicNum, offNum):02X}")
 
         else:               
             print("hit:yes")
             print("eviction_line:-1")
             print("ram_address:-1")
-            print(f"data:0x{self.cachedSets[setNum][lineIndex].get_blocks()[offNum]}")
+            print(f"data:0x{self.get_block(setNum * self.assoc + lineIndex, offNum):02X}")
 
         return
 
@@ -279,35 +615,255 @@ class Cache:
 
         @return there is no return value, but values are printed to the terminal
         """
-        
-        tagBits, indBits, offBits = self.addressBits(address)
-        hexByte = hexByte.replace("0x","")
 
-        setNum = int(indBits,2)
-        tagHex = bin_to_hex(tagBits)
-
-        lineIndex = self.find_line(setNum, tagHex)
+        setNum, tag, lineIndex, vicNum, data = self.store(int(address, 16), int(hexByte, 16), ram)
 
         print(f"set:{setNum}")
-        print(f"tag:{tagHex}")
+        print(f"tag:{tag:02x}")
 
         if lineIndex == -1: 
             print("write_hit: no")
-            vicNum = self.get_victum(setNum)
             print(f"eviction_line:{vicNum}")
             print(f"ram_address:{address}")
-            print(f"data:0x{self.miss_data(address, vicNum, hexByte, ram)}")
-            print(f"dirty_bit:{self.cachedSets[setNum][vicNum].dirtyBit}")
+            print(f"data:0x{data:02X}")
+            print(f"dirty_bit:{self.dirtyBits[setNum * self.assoc + vicNum]}")
 
         else:               
             print("write_hit: yes")
             print("eviction_line:-1")
             print(f"ram_address:-1")
-            print(f"data:0x{self.hit_data(address, lineIndex, hexByte, ram)}")
-            print(f"dirty_bit:{self.cachedSets[setNum][lineIndex].dirtyBit}")
+            print(f"data:0x{data:02X}")
+            print(f"dirty_bit:{self.dirtyBits[setNum * self.assoc + lineIndex]}")
 
         return
 
+    def load(self, address: int, ram: RAM):
+        """
+        Performs a cache read without printing the result, filling the line from the RAM on a read-miss.
+
+        @param  address : the address trying to be read from the cache
+        @param  ram     : the RAM object we would read from if there is a read-miss
+
+        @return setNum    : the set the address maps to
+        @return tag       : the tag of the address
+        @return offNum    : the offset of the address inside the block
+        @return lineIndex : the line that was hit, -1 on a miss
+        @return vicNum    : the line that was filled on a miss, -1 on a hit
+        """
+
+        tag, setNum, offNum = self.addressBits(address)
+
+        lineIndex = self.find_line(setNum, tag)
+
+        if lineIndex == -1:
+            self.numReadMis += 1
+            vicNum = self.get_victum(setNum)
+            line   = setNum * self.assoc + vicNum
+            if self.listeners is not None: self.emit(Listener.READ_MISS, line, tag)
+            self.evict(line, ram)
+            blocks, dirty = self.fetch(address, ram)
+            self.fill(line, tag, blocks)
+            if dirty: self.dirtyBits[line] = 1
+            if self.prefetcher is not None: self.prefetch_access(address, -1, ram)
+            return setNum, tag, offNum, -1, vicNum
+
+        self.numReadHit += 1
+        if self.listeners is not None: self.emit(Listener.READ_HIT, setNum * self.assoc + lineIndex, tag)
+        self.touch(setNum * self.assoc + lineIndex)
+        if self.prefetcher is not None: self.prefetch_access(address, setNum * self.assoc + lineIndex, ram)
+        return setNum, tag, offNum, lineIndex, -1
+
+    def store(self, address: int, byte: int, ram: RAM):
+        """
+        Performs a cache write without printing the result, following the hit-policy or miss-policy.
+
+        @param  address : the address trying to be written to from the cache
+        @param  byte    : the byte being written to the cache/RAM
+        @param  ram     : the RAM object we would read from if there is a write-miss
+
+        @return setNum    : the set the address maps to
+        @return tag       : the tag of the address
+        @return lineIndex : the line that was hit, -1 on a miss
+        @return vicNum    : the line that was chosen for eviction on a miss, -1 on a hit
+        @return data      : the byte that was written
+        """
+
+        tag, setNum, offNum = self.addressBits(address)
+
+        lineIndex = self.find_line(setNum, tag)
+
+        if lineIndex == -1:
+            self.numWriteMis += 1
+            vicNum = self.get_victum(setNum)
+            if self.listeners is not None: self.emit(Listener.WRITE_MISS, setNum * self.assoc + vicNum, tag)
+            if self.misPolicy == 1: self.evict(setNum * self.assoc + vicNum, ram)
+            data = self.miss_data(address, tag, setNum, offNum, vicNum, byte, ram)
+            if self.prefetcher is not None: self.prefetch_access(address, -1, ram)
+            return setNum, tag, -1, vicNum, data
+
+        self.numWriteHit += 1
+        if self.listeners is not None: self.emit(Listener.WRITE_HIT, setNum * self.assoc + lineIndex, tag)
+        data = self.hit_data(address, setNum, offNum, lineIndex, byte, ram)
+        if self.prefetcher is not None: self.prefetch_access(address, setNum * self.assoc + lineIndex, ram)
+        return setNum, tag, lineIndex, -1, data
+
+    def evict(self, line: int, ram = None):
+        """
+        Evicts a line that is about to be replaced, writing its dirty data back to the RAM. Inside a Hierarchy
+        the line is also removed from the levels above an inclusive level, and handed to the level below.
+
+        @param  line   : the index of the line about to be replaced
+        @param  ram    : the backing store the line is written back to, the RAM or the next Cache of a Hierarchy.
+                         Without one the eviction is only counted
+
+        @return no return value
+        """
+
+        if self.validBits[line]:
+            if self.above is not None and self.inclusion == "inclusive": self.back_invalidate(line)
+
+            self.numEvict += 1
+            if self.prefetched is not None and self.prefetched[line]: self.numPrefetchUseless += 1
+            if self.dirtyBits[line]:
+                self.numWriteBack      += 1
+                self.numWriteBackBytes += self.blockSize
+            if self.listeners is not None:
+                self.emit(Listener.EVICTION, line, self.tags[line])
+                if self.dirtyBits[line]: self.emit(Listener.WRITEBACK, line, self.tags[line])
+            if ram is not None: self.release(line, ram)
+
+    def fill(self, line: int, tag: int, blocks: bytes):
+        """
+        Places a block copied from the RAM into a line, marks the line as valid and tells the replacement policy
+
+        @param  line   : the index of the line being filled
+        @param  tag    : the tag of the block
+        @param  blocks : the bytes of the block
+
+        @return no return value
+        """
+
+        if self.lineOf is not None:
+            setNum = line // self.assoc
+            if self.validBits[line]: del self.lineOf[(self.tags[line] << self.index_bit) | setNum]
+            self.lineOf[(tag << self.index_bit) | setNum] = line
+
+        if not self.tagsOnly:
+            start = line * self.blockSize
+            self.data[start : start + self.blockSize] = blocks
+        self.tags[line]       = tag
+        self.validBits[line]  = 1
+        self.dirtyBits[line]  = 0
+        if self.prefetched is not None: self.prefetched[line] = 0
+        self.replacer.fill(line)
+        if self.listeners is not None: self.emit(Listener.FILL, line, tag)
+
+    def subscribe(self, listener):
+        """
+        Starts telling a Listener about the events of the cache
+
+        @param  listener : the Listener, its event() method is called for every event
+
+        @return the listener, so it can be created and subscribed in one step
+        """
+
+        if self.listeners is None: self.listeners = []
+        self.listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener):
+        """
+        Stops telling a Listener about the events of the cache
+
+        @param  listener : a Listener that was subscribed
+
+        @return no return value
+        """
+
+        self.listeners.remove(listener)
+        if not self.listeners: self.listeners = None
+
+    def emit(self, kind: int, line: int, tag: int):
+        """
+        Tells every subscribed Listener about an event, only called while somebody listens
+
+        @param  kind   : the kind of event, one of the Listener constants
+        @param  line   : the index of the line the event happened to, -1 for a flush
+        @param  tag    : the tag involved, the tag of the block leaving the line for evictions and writebacks
+
+        @return no return value
+        """
+
+        setNum, way = divmod(line, self.assoc) if line >= 0 else (-1, -1)
+        for listener in self.listeners: listener.event(kind, setNum, way, tag)
+
+    def touch(self, line: int):
+        """
+        Updates the replacement information of a line that was hit
+
+        @param  line   : the index of the line being accessed
+
+        @return no return value
+        """
+
+        self.replacer.touch(line)
+
+    def get_blocks(self, line: int):
+        """
+        Grabs the blocks of a line
+
+        @param  line   : the index of the line
+
+        @return the blocks of the line
+        """
+
+        start = line * self.blockSize
+        return self.data[start : start + self.blockSize]
+
+    def get_block(self, line: int, offNum: int):
+        """
+        Grabs the content of one block of a line
+
+        @param  line   : the index of the line
+        @param  offNum : the offset of the block inside the line
+
+        @return the content of the specific block, 00 when the cache only keeps tags
+        """
+
+        if self.tagsOnly: return 0
+        return self.data[line * self.blockSize + offNum]
+
+    def stats(self) -> dict:
+        """
+        Collects the aggregate statistics of the cache
+
+        @param  there are no parameters except the reference to itself
+
+        @return a dictionary of the hit, miss, eviction and write-back counts, hits and misses also split between reads and writes
+        """
+
+        accesses = self.numHit + self.numMis
+
+        return {
+            "accesses"           : accesses,
+            "hits"               : self.numHit,
+            "misses"             : self.numMis,
+            "hit_rate"           : self.numHit / accesses if accesses else 0.0,
+            "read_hits"          : self.numReadHit,
+            "read_misses"        : self.numReadMis,
+            "write_hits"         : self.numWriteHit,
+            "write_misses"       : self.numWriteMis,
+            "evictions"          : self.numEvict,
+            "writebacks"         : self.numWriteBack,
+            "writeback_bytes"    : self.numWriteBackBytes,
+            "prefetches"         : self.numPrefetch,
+            "prefetch_useful"    : self.numPrefetchUseful,
+            "prefetch_late"      : self.numPrefetchLate,
+            "prefetch_useless"   : self.numPrefetchUseless,
+            "prefetch_accuracy"  : self.numPrefetchUseful / self.numPrefetch if self.numPrefetch else 0.0,
+            "prefetch_coverage"  : self.numPrefetchUseful / (self.numPrefetchUseful + self.numMis) if self.numPrefetchUseful + self.numMis else 0.0,
+            "prefetch_pollution" : self.numPollution,
+        }
 
     def flush(self):
         """
@@ -315,21 +871,20 @@ class Cache:
 
         @param  there are no parameters except the reference to itself
 
-        @return no return value, only "cache_cleared" printed to terminal
+        @return no return value
         """
 
-        print("cache_cleared")        
-        self.startCache = 0
-        blocks = list()
-        for _ in range(self.blockSize):
-            blocks.append("00")
-        
-        for s in self.cachedSets:
-            for l in s:
-                l.blocks   = blocks
-                l.validBit = 0
-                l.dirtyBit = 0
-                l.tagHex   = "00"
+        if self.listeners is not None: self.emit(Listener.FLUSH, -1, -1)
+        lines = self.set * self.assoc
+
+        self.data[:]      = bytes(len(self.data))
+        self.validBits[:] = bytes(lines)
+        self.dirtyBits[:] = bytes(lines)
+        self.tags         = array('q', [-1]) * lines
+        self.replacer     = self.new_replacer()
+        if self.prefetched is not None: self.prefetched[:] = bytes(lines)
+        self.polluters.clear()
+        if self.lineOf is not None: self.lineOf.clear()
 
     def view(self):
         """
@@ -342,7 +897,9 @@ class Cache:
         
         if   self.repPolicy == 1:   repPolicy = "random_replacement"
         elif self.repPolicy == 2:   repPolicy = "least_recently_used"
-        else:                       repPolicy = "least_freqently_used"
+        elif self.repPolicy == 3:   repPolicy = "least_freqently_used"
+        elif self.repPolicy == 4:   repPolicy = "first_in_first_out"
+        else:                       repPolicy = "tree_pseudo_least_recently_used"
             
         if self.hitPolicy == 1:     hitPolicy = "write_through"
         else:                       hitPolicy = "write_back"
@@ -360,14 +917,13 @@ class Cache:
         print(f"number_of_cache_misses:{self.numMis}")
         print("cache_content:")
 
-        for s in self.cachedSets:
-            for line in s:
-                content = ""
-                content += str(line.validBit) + " "
-                content += str(line.dirtyBit) + " "
-                content += line.tagHex + " "
-                for i in line.blocks: content += i + " "
-                print(content)
+        for line in range(self.set * self.assoc):
+            content = ""
+            content += str(self.validBits[line]) + " "
+            content += str(self.dirtyBits[line]) + " "
+            content += f"{self.tags[line] if self.validBits[line] else 0:02x} "
+            content += self.get_blocks(line).hex(" ").upper() + " "
+            print(content)
 
         return
 
@@ -381,62 +937,55 @@ class Cache:
         """
 
         with open("cache.txt","w") as file:
-            for s in self.cachedSets:
-                for l in s:
-                    for b in l.blocks:
-                        file.write(b + " ")
-                    file.write("\n")
+            for line in range(self.set * self.assoc):
+                file.write(self.get_blocks(line).hex(" ").upper() + " \n")
 
         return
 
-    def find_line(self, setNum: int, tagHex: str):
+    def find_line(self, setNum: int, tag: int):
         """
         Searchs the current set for a specific tag value and returns the index if found.
         If not found, -1 is returned
 
         @param  setNum   : set index we are looking at in the cache
-        @param  tagHex   : tag in hex we are looking for in the cache
+        @param  tag      : tag we are looking for in the cache
 
-        @return vaule -1 : tagHex not found in set
-        @return value n  : tagHex found at line n in the set
+        @return vaule -1 : tag not found in set
+        @return value n  : tag found at line n in the set
         """
 
-        currSet   = self.cachedSets[setNum]
+        first     = setNum * self.assoc
         lineIndex = -1
-        
-        for i in range(len(currSet)):
-            if currSet[i].validBit == 1 and currSet[i].tagHex == tagHex:
-                
-                print(currSet[i].tagHex)
-                print(currSet[i].blocks)
 
-                lineIndex = i
-                break
+        if self.lineOf is not None:
+            line = self.lineOf.get((tag << self.index_bit) | setNum, -1)
+        else:
+            try:                                                # invalid lines hold tag -1, so they never match
+                line = self.tags.index(tag, first, first + self.assoc)
+            except ValueError:
+                line = -1
+
+        if line != -1:
+            lineIndex = line - first
 
         if    lineIndex != -1 : self.numHit += 1
         else:                   self.numMis += 1
         
         return lineIndex
 
-    def addressBits(self, hexAdd: str):
+    def addressBits(self, address: int):
         """
-        Takes the address we are looking for in hex and breaks it into it's tag, index, and offset bits
+        Takes the address we are looking for and breaks it into it's tag, index, and offset using the
+        shift/mask decoder computed when the cache geometry was built
 
-        @param  hexAdd   : Hex address being broken down 
+        @param  address  : address being broken down
 
-        @return tagBits  : tag bits of the address using cache.properties
-        @return indBits  : index bits of the address using cache.properties
-        @return offBits  : offset bits of the address using cache.properties
+        @return tag      : tag of the address using cache.properties
+        @return setNum   : index of the address using cache.properties
+        @return offNum   : offset of the address using cache.properties
         """
 
-        binary  = hex_to_bin(hexAdd)
-
-        tagBits = binary[:self.tag_bit]
-        indBits = binary[self.tag_bit : self.index_bit + self.tag_bit]
-        offBits = binary[-self.offset_bit:]
-
-        if indBits == "": indBits = "0"
-        return tagBits, indBits, offBits
+        return address >> self.tagShift, (address >> self.offset_bit) & self.setMask, address & self.offMask
     
     def get_victum(self, setNum: int):
         """
@@ -446,278 +995,3752 @@ class Cache:
 
         @return index of the line to be evicted
         """
-        
-        if self.repPolicy == 1:
-            if self.startCache[setNum] <= self.assoc-1:
-                temp = self.startCache[setNum]
-                self.startCache[setNum] += 1
-                return temp
-            else:
-                return randint(0,self.assoc - 1)
 
-        else:
-            if self.startCache[setNum] <= self.assoc-1:
-                temp = self.startCache[setNum]
-                self.startCache[setNum] += 1
-                return temp
-            else:
-                currSet     = self.cachedSets[setNum]
-                leastRecent = currSet[0]
-                for i in currSet:
-                    if leastRecent.lastAccess > i.lastAccess: leastRecent = i
-                return currSet.index(leastRecent)
+        first = setNum * self.assoc
+        empty = self.validBits.find(0, first, first + self.assoc)      # make sure all sets fill before evicting
 
-    def hit_data(self, address: str, lineIndex:str, hexByte: str, ram: RAM):
+        if empty != -1: return empty - first
+        return self.replacer.victim(setNum)
+
+    def hit_data(self, address: int, setNum: int, offNum: int, lineIndex: int, byte: int, ram: RAM):
         """
         Acts on write-hits, depending on the hit-policy.
 
         @param  address   : address being written to
+        @param  setNum    : the set the address maps to
+        @param  offNum    : the offset of the address inside the block
         @param  lineIndex : the line number that was hit
-        @param  hexByte   : the byte being written
+        @param  byte      : the byte being written
         @param  ram       : ram being written to
 
         @return the byte that was written
         """
 
-        tagBits, indBits, offBits = self.addressBits(address)
-
-        setNum = int(indBits,2)
-        offNum = int(offBits,2)
+        line = setNum * self.assoc + lineIndex
 
         if self.hitPolicy == 1:
 
-            self.cachedSets[setNum][lineIndex].blocks[offNum] = hexByte
-            ram.write_block(self.blockSize, offNum, address, hexByte)
+            self.touch(line)
+            if self.tagsOnly:
+                ram.count_transfer(1, 1)
+                return byte
+
+            self.data[line * self.blockSize + offNum] = byte
+            ram.write_block(self.blockSize, offNum, address, byte)
             
-            return hexByte
+            return byte
         
         else:
 
-            self.cachedSets[setNum][lineIndex].dirtyBit  = 1
-            self.cachedSets[setNum][lineIndex].get_blocks()[offNum] = hexByte
+            self.dirtyBits[line] = 1
+            self.touch(line)
+            if not self.tagsOnly: self.data[line * self.blockSize + offNum] = byte
 
-            return hexByte
+            return byte
 
 
-    def miss_data(self, address: str, vicNum: int, hexByte: str, ram: RAM):
+    def miss_data(self, address: int, tag: int, setNum: int, offNum: int, vicNum: int, byte: int, ram: RAM):
         """
         Acts on write-misses, depending on what the miss-policy is
 
         @param  address   : address being written to
+        @param  tag       : the tag of the address
+        @param  setNum    : the set the address maps to
+        @param  offNum    : the offset of the address inside the block
         @param  vicNum    : the line number that is being evicted
-        @param  hexByte   : the byte being written
+        @param  byte      : the byte being written
         @param  ram       : ram being written to
 
         @return the byte that was written
         """
 
-        tagBits, indBits, offBits = self.addressBits(address)
-
-        setNum = int(indBits,2)
-        tagHex = bin_to_hex(tagBits)
-        offNum = int(offBits,2)
-
         if self.misPolicy == 1:
 
-            self.cachedSets[setNum][vicNum].blocks               = ram.load_blocks(self.blockSize, address)
-            self.cachedSets[setNum][vicNum].tagHex               = tagHex
-            self.cachedSets[setNum][vicNum].validBit             = 1
-            self.cachedSets[setNum][vicNum].dirtyBit             = 1
-            self.cachedSets[setNum][vicNum].get_blocks()[offNum] = hexByte
-            return hexByte
+            line = setNum * self.assoc + vicNum
+
+            blocks, dirty = self.fetch(address, ram)
+            self.fill(line, tag, blocks)
+            self.dirtyBits[line] = 1
+            if not self.tagsOnly: self.data[line * self.blockSize + offNum] = byte
+            return byte
         
         else:
 
-            return ram.write_block(self.blockSize, address, hexByte)
+            if self.tagsOnly:
+                ram.count_transfer(1, 1)
+                return byte
 
-            
-
-class SetLine:
-    validBit  = 0
-    dirtyBit  = 0
-    tagHex   = "00"
+            return ram.write_block(self.blockSize, offNum, address, byte)
 
-    NumofAccess = 0
-    lastAccess  = 0
+    def fetch(self, address: int, ram):
+        """
+        Copies the block of an address out of the backing store on a miss. An exclusive level takes the
+        block out of the level below instead, along with its dirty bit. A cache that only keeps tags only
+        counts the transfer.
 
-    blocks = list()
+        @param  address   : the address that missed
+        @param  ram       : the backing store, the RAM or the next Cache of a Hierarchy
 
-    def __init__(self):
+        @return blocks    : the bytes of the block, None when the cache only keeps tags
+        @return dirty     : 1 when the block holds data that the RAM doesn't have yet
         """
-        Initializes the SetLine
 
-        @param  no parameters other than the reference to itself
+        if self.tagsOnly:
+            ram.count_transfer(self.blockSize)
+            return None, 0
+
+        if self.inclusion == "exclusive" and isinstance(ram, Cache): return ram.take_block(address)
+        return ram.load_blocks(self.blockSize, address), 0
 
-        @return empty SetLine object
+    def prefetch_access(self, address: int, line: int, ram):
         """
+        Keeps the prefetch statistics of a demand access and lets the prefetcher react to it
 
-        self.validBit    = 0
-        self.dirtyBit    = 0
-        self.tagHex      = "00"
-        self.NumofAccess = 0
-        self.lastAccess  = 0
+        @param  address   : the address that was accessed
+        @param  line      : the line that was hit, -1 on a miss
+        @param  ram       : the backing store the prefetches are fetched from
 
-    def get_blocks(self):
+        @return no return value
         """
-        Grabs the blocks of the SetLine
 
-        @param   no parameters other than the reference to itself
+        self.clock += 1
+        kind        = Prefetcher.HIT
+
+        if line == -1:
+            kind  = Prefetcher.MISS
+            block = address >> self.offset_bit
+            if block in self.polluters:
+                del self.polluters[block]
+                self.numPollution += 1
+        elif self.prefetched[line]:
+            kind = Prefetcher.PREFETCH_HIT
+            self.prefetched[line] = 0
+            self.numPrefetchUseful += 1
+            if self.clock - self.issued[line] < self.prefetcher.latency: self.numPrefetchLate += 1
+
+        demand = line if line != -1 else self.line_of(address)                  # the line the access filled, if it allocated one
+        for target in self.prefetcher.access(address, kind):
+            self.prefetch_block(target, ram, demand)
+
+    def prefetch_block(self, address: int, ram, demand: int = -1):
+        """
+        Fetches a block into the cache ahead of a demand access, unless it is already cached. The prefetch is
+        dropped when it would evict the line of the demand access, whose data the access hands back.
 
-        @returns the blocks of the SetLine
-        """    
+        @param  address   : an address of the block
+        @param  ram       : the backing store the block is fetched from
+        @param  demand    : optional line used by the demand access that triggered the prefetch
 
-        self.NumofAccess += 1
-        self.lastAccess   = time()
-        return self.blocks
-    
-    def get_block(self, index: int):
+        @return no return value
         """
-        Grabs the content of one block
 
-        @param index : the index of the block we are grabing
+        if address < 0 or address >> self.addrBits or self.line_of(address) != -1: return
 
-        @returns the content of the specific block
-        """   
+        tag, setNum, _ = self.addressBits(address)
+        line           = setNum * self.assoc + self.get_victum(setNum)
+        if line == demand: return
 
-        return self.blocks[index]
+        if self.validBits[line] and not self.prefetched[line]:         # remember who the prefetch pushed out
+            self.polluters[(self.tags[line] << self.index_bit) | setNum] = None
+            if len(self.polluters) > len(self.tags): del self.polluters[next(iter(self.polluters))]
 
-def valid_input(instr: str, min: int, max: int, notAllow = None) -> int:
-    """
-    Checks to see if cache configuration inputs are valid according to restraints
+        self.evict(line, ram)
 
-    @param  instr       : the input instruction
-    @param  min         : minimum allowed number in input
-    @param  max         : maximum allowed number in input
-    @param  notAllow    : number that is not allowed in input
+        blocks, dirty = self.fetch(address, ram)
+        self.fill(line, tag, blocks)
+        if dirty: self.dirtyBits[line] = 1
 
-    @return userIn      : returns the users input integer
-    """
+        self.prefetched[line] = 1
+        self.issued[line]     = self.clock
+        self.numPrefetch     += 1
 
-    try:               userIn = int(input(instr))
-    except Exception:  userIn = 0
+    def block_address(self, line: int) -> int:
+        """
+        Rebuilds the address of the first byte of the block held by a line
 
-    while userIn < min or userIn > max or userIn == notAllow:
-        if notAllow == None:
+        @param  line      : the index of the line
+
+        @return the address of the block
+        """
+
+        return ((self.tags[line] << self.index_bit) | (line // self.assoc)) << self.offset_bit
+
+    def line_of(self, address: int) -> int:
+        """
+        Finds the line holding an address without counting a hit or a miss
+
+        @param  address   : the address being looked up
+
+        @return the index of the line, -1 when the block isn't cached
+        """
+
+        tag, setNum, _ = self.addressBits(address)
+        first          = setNum * self.assoc
+
+        if self.lineOf is not None: return self.lineOf.get((tag << self.index_bit) | setNum, -1)
+        try:
+            return self.tags.index(tag, first, first + self.assoc)
+        except ValueError:
+            return -1
+
+    def invalidate(self, line: int):
+        """
+        Empties a line without writing it back
+
+        @param  line      : the index of the line
+
+        @return no return value
+        """
+
+        if self.lineOf is not None and self.validBits[line]:
+            del self.lineOf[(self.tags[line] << self.index_bit) | (line // self.assoc)]
+
+        self.tags[line]       = -1
+        self.validBits[line]  = 0
+        self.dirtyBits[line]  = 0
+        if self.prefetched is not None: self.prefetched[line] = 0
+
+    def release(self, line: int, ram):
+        """
+        Hands a line that is being evicted to the backing store. An exclusive level moves every victim down,
+        the others only write dirty blocks back.
+
+        @param  line      : the index of the line
+        @param  ram       : the backing store, the RAM or the next Cache of a Hierarchy
+
+        @return no return value
+        """
+
+        if self.tagsOnly:
+            if self.dirtyBits[line]: ram.count_transfer(self.blockSize, 1)
+        elif self.inclusion == "exclusive" and isinstance(ram, Cache):
+            ram.insert_block(self.block_address(line), self.get_blocks(line), self.dirtyBits[line])
+        elif self.dirtyBits[line]:
+            ram.write_blocks(self.block_address(line), self.get_blocks(line))
+
+    def back_invalidate(self, line: int):
+        """
+        Removes every copy of a line's block from the levels above, merging their dirty data into the line
+
+        @param  line      : the index of the line about to be evicted
+
+        @return no return value
+        """
+
+        address = self.block_address(line)
+        start   = line * self.blockSize
+
+        for sub in range(0, self.blockSize, self.above.blockSize):
+            blocks = self.above.invalidate_block(address + sub)
+            if blocks is not None:
+                self.data[start + sub : start + sub + len(blocks)] = blocks
+                self.dirtyBits[line] = 1
+
+    def invalidate_block(self, address: int):
+        """
+        Removes a block from this level and the levels above it, as asked by an inclusive level below
+
+        @param  address   : the address of the block
+
+        @return the bytes of the block when they were dirty, None otherwise
+        """
+
+        line = self.line_of(address)
+        if line == -1: return None
+
+        if self.above is not None: self.back_invalidate(line)
+
+        self.numBackInval += 1
+        blocks = self.get_blocks(line) if self.dirtyBits[line] else None
+        self.invalidate(line)
+        return blocks
+
+    def take_block(self, address: int):
+        """
+        Hands a block to the exclusive level above, removing it from this level. On a miss the block is
+        taken from further down without being placed in this level.
+
+        @param  address   : the address being read by the level above
+
+        @return blocks    : the bytes of the block
+        @return dirty     : 1 when the block holds data that the RAM doesn't have yet
+        """
+
+        tag, setNum, _ = self.addressBits(address)
+        lineIndex      = self.find_line(setNum, tag)
+
+        if lineIndex == -1:
+            self.numReadMis += 1
+            return self.fetch(address, self.below)
+
+        self.numReadHit += 1
+        line   = setNum * self.assoc + lineIndex
+        blocks = self.get_blocks(line)
+        dirty  = self.dirtyBits[line]
+        self.invalidate(line)
+        return blocks, dirty
+
+    def insert_block(self, address: int, blocks: bytes, dirty: int):
+        """
+        Places a block evicted from the exclusive level above into this level
+
+        @param  address   : the address of the block
+        @param  blocks    : the bytes of the block
+        @param  dirty     : the dirty bit of the block
+
+        @return no return value
+        """
+
+        tag, setNum, _ = self.addressBits(address)
+        line           = setNum * self.assoc + self.get_victum(setNum)
+
+        self.evict(line, self.below)
+        self.fill(line, tag, blocks)
+        self.dirtyBits[line] = dirty
+
+    def load_blocks(self, numBlocks: int, address: int):
+        """
+        Serves a miss of the level above, so a Cache can be the backing store of another Cache
+
+        @param  numBlocks : the block size of the level above
+        @param  address   : the current address being read
+
+        @return the specified number of blocks found at the address
+        """
+
+        setNum, _, offNum, lineIndex, vicNum = self.load(address, self.below)
+
+        start = (setNum * self.assoc + (vicNum if lineIndex == -1 else lineIndex)) * self.blockSize
+        start += offNum & -numBlocks
+        return bytes(self.data[start : start + numBlocks])
+
+    def write_block(self, numBlocks: int, offNum: int, address: int, byte: int):
+        """
+        Serves a write-through of the level above, following this level's own hit-policy and miss-policy
+
+        @param  numBlocks : the block size of the level above
+        @param  offNum    : the offset of the byte inside the block of the level above
+        @param  address   : the specified address
+        @param  byte      : the byte that is being written
+
+        @return the byte that was written
+        """
+
+        address = (address // numBlocks) * numBlocks + offNum
+
+        if self.inclusion == "exclusive":                   # the block isn't kept here while the level above has it
+            line = self.line_of(address)
+            if line == -1: return self.below.write_block(numBlocks, offNum, address, byte)
+            self.data[line * self.blockSize + (address & self.offMask)] = byte
+            self.dirtyBits[line] = 1
+            return byte
+
+        return self.store(address, byte, self.below)[4]
+
+    def write_blocks(self, address: int, blocks: bytes):
+        """
+        Takes a dirty block written back by the level above
+
+        @param  address   : the address of the block
+        @param  blocks    : the bytes of the block
+
+        @return no return value
+        """
+
+        line = self.line_of(address)
+
+        if line == -1 and self.misPolicy == 1:
+            tag, setNum, _ = self.addressBits(address)
+            line           = setNum * self.assoc + self.get_victum(setNum)
+            self.evict(line, self.below)
+            self.fill(line, tag, self.fetch(address, self.below)[0])
+
+        if line == -1:
+            self.below.write_blocks(address, blocks)
+            return
+
+        start = line * self.blockSize + (address & self.offMask)
+        self.data[start : start + len(blocks)] = blocks
+
+        if self.hitPolicy == 1: self.below.write_blocks(address, blocks)
+        else:                   self.dirtyBits[line] = 1
+
+
+class Hierarchy:
+    """
+    Chains several Cache levels in front of the RAM. Every level misses into the next one through the same
+    load_blocks/write_block interface the RAM offers, so the hierarchy is driven just like a lone cache.
+
+    The inclusion policy decides what the levels below the L1 hold:
+        nine      : non-inclusive non-exclusive, every level fills on its own misses and evicts on its own
+        inclusive : evicting a block from a level also invalidates it in the levels above
+        exclusive : a block lives in only one level, misses move it up and evictions move it down
+    """
+
+    inclusionPolicies = ("nine", "inclusive", "exclusive")
+
+    def __init__(self, levels: list, ram: RAM, inclusion: str = "nine"):
+        """
+        Connects the levels, from the L1 down, and the RAM
+
+        @param  levels    : the Cache of every level, the L1 first
+        @param  ram       : the RAM behind the last level
+        @param  inclusion : the inclusion policy, one of Hierarchy.inclusionPolicies
+
+        @return the Hierarchy object
+        """
+
+        if inclusion not in Hierarchy.inclusionPolicies:
+            raise ValueError(f"unknown inclusion policy '{inclusion}'")
+        if any(level.tagsOnly for level in levels):
+            raise ValueError("the levels of a hierarchy pass their blocks on, they can't only keep tags")
+
+        for upper, lower in zip(levels, levels[1:]):
+            if lower.blockSize < upper.blockSize:
+                raise ValueError("a level can't have smaller blocks than the level above it")
+            if inclusion == "exclusive" and lower.blockSize != upper.blockSize:
+                raise ValueError("an exclusive hierarchy needs the same block size on every level")
+
+            upper.below = lower
+            lower.above = upper
+
+        levels[-1].below = ram
+        for level in levels: level.inclusion = inclusion
+
+        self.levels    = levels
+        self.ram       = ram
+        self.inclusion = inclusion
+
+    def load(self, address: int, ram: RAM = None):
+        """
+        Reads an address through the L1, see Cache.load(). The RAM is the one given to the constructor.
+        """
+
+        return self.levels[0].load(address, self.levels[0].below)
+
+    def store(self, address: int, byte: int, ram: RAM = None):
+        """
+        Writes an address through the L1, see Cache.store(). The RAM is the one given to the constructor.
+        """
+
+        return self.levels[0].store(address, byte, self.levels[0].below)
+
+    def stats(self) -> dict:
+        """
+        Collects the statistics of every level, each one prefixed with the name of the level (l1_, l2_, ...)
+
+        @param  there are no parameters except the reference to itself
+
+        @return a flat dictionary of the statistics
+        """
+
+        stats = dict()
+        for num, level in enumerate(self.levels, 1):
+            for key, value in level.stats().items(): stats[f"l{num}_{key}"] = value
+            stats[f"l{num}_back_invalidations"] = level.numBackInval
+
+        return stats
+
+def check_config(addrBits: int, cacheSize: int, blockSize: int, assoc: int, repPolicy: int = 1, hitPolicy: int = 1,
+                 misPolicy: int = 1, prefetch: int = 0):
+    """
+    Checks a cache configuration before a Cache is built from it: the block size has to be a power of two,
+    the lines have to split into a power of two number of sets, the cache has to fit in the address space
+    and the policies have to exist
+
+    @param  addrBits  : the width of an address
+    @param  cacheSize : the cache size
+    @param  blockSize : the block size
+    @param  assoc     : the associativity
+    @param  repPolicy : optional replacement policy, see REPLACEMENT_POLICIES
+    @param  hitPolicy : optional write hit policy
+    @param  misPolicy : optional write miss policy
+    @param  prefetch  : optional prefetcher, see PREFETCHERS
+
+    @return no return value, a ValueError describes the first problem found
+    """
+
+    if blockSize < 1 or blockSize & (blockSize - 1): raise ValueError(f"the block size {blockSize} isn't a power of two")
+    if assoc < 1:                                    raise ValueError(f"the associativity {assoc} isn't positive")
+
+    sets = cacheSize // (blockSize * assoc)
+    if sets < 1 or sets & (sets - 1) or sets * blockSize * assoc != cacheSize:
+        raise ValueError(f"a cache of {cacheSize} bytes doesn't split into a power of two number of sets of {assoc} lines of {blockSize} bytes")
+
+    if cacheSize > 1 << addrBits:                    raise ValueError(f"the cache size {cacheSize} is larger than the {addrBits} bit address space")
+    if repPolicy not in REPLACEMENT_POLICIES:        raise ValueError(f"unknown replacement policy {repPolicy}")
+    if hitPolicy not in (1, 2):                      raise ValueError(f"unknown write hit policy {hitPolicy}")
+    if misPolicy not in (1, 2):                      raise ValueError(f"unknown write miss policy {misPolicy}")
+    if prefetch and prefetch not in PREFETCHERS:     raise ValueError(f"unknown prefetcher {prefetch}")
+
+def hierarchy_levels(text: str, addrBits: int = 8, repPolicy: int = 1, hitPolicy: int = 1, misPolicy: int = 1) -> list:
+    """
+    Builds the levels of a hierarchy from the command line
+
+    @param  text      : comma separated levels, the L1 first, each one size:block:assoc[:replacement[:write-hit[:write-miss]]]
+    @param  addrBits  : the width of an address
+    @param  repPolicy : replacement policy of the levels that don't give one
+    @param  hitPolicy : write hit policy of the levels that don't give one
+    @param  misPolicy : write miss policy of the levels that don't give one
+
+    @return the list of Cache objects
+    """
+
+    return [Cache(addrBits = addrBits, **config) for config in hierarchy_configs(text, repPolicy, hitPolicy, misPolicy)]
+
+def hierarchy_configs(text: str, repPolicy: int = 1, hitPolicy: int = 1, misPolicy: int = 1) -> list:
+    """
+    Parses the levels of a hierarchy from the command line, see hierarchy_levels()
+
+    @return a list of dictionaries of Cache parameters, the L1 first
+    """
+
+    configs = list()
+    for level in text.split(","):
+        values = [int(value, 0) for value in level.split(":")]
+        if not 3 <= len(values) <= 6: raise ValueError(f"the level {level} isn't size:block:assoc[:replacement[:write-hit[:write-miss]]]")
+        values += [repPolicy, hitPolicy, misPolicy][len(values) - 3:]
+        configs.append(dict(zip(("cacheSize", "blockSize", "assoc", "repPolicy", "hitPolicy", "misPolicy"), values)))
+
+    return configs
+
+class MultiCore:
+    """
+    Simulates N cores, each with a private Cache, sharing one RAM over a snooping bus kept coherent with the
+    MESI or MOESI protocol. Every line of a core holds one of the states below, next to its valid and dirty
+    bits (a line is valid unless Invalid, and dirty when Modified or Owned):
+        M : modified, the only copy, newer than the RAM
+        O : owned (MOESI only), newer than the RAM, other cores may hold Shared copies that this core supplies
+        E : exclusive, the only copy, same as the RAM
+        S : shared, other cores may hold copies too
+        I : invalid
+
+    Instead of asking every core on every miss, the bus keeps the set of cores holding each block (a snoop
+    filter) and the core owning it, so a read miss costs the same at any core count and a write only visits
+    the cores that really hold the block.
+    The private caches are always write-back and write-allocate.
+    """
+
+    INVALID, SHARED, EXCLUSIVE, OWNED, MODIFIED = range(5)
+
+    protocols = ("mesi", "moesi")
+
+    def __init__(self, cores: list, ram: RAM, protocol: str = "mesi"):
+        """
+        Connects the private caches of the cores to the RAM
+
+        @param  cores    : the Cache of every core, they must all have the same block size
+        @param  ram      : the RAM shared by the cores
+        @param  protocol : the coherence protocol, one of MultiCore.protocols
+
+        @return the MultiCore object
+        """
+
+        if protocol not in MultiCore.protocols:
+            raise ValueError(f"unknown coherence protocol '{protocol}'")
+        if len({c.blockSize for c in cores}) != 1:
+            raise ValueError("every core needs the same block size")
+        if any(c.tagsOnly for c in cores):
+            raise ValueError("the cores supply blocks to each other, they can't only keep tags")
+
+        for c in cores:
+            c.states    = bytearray(len(c.tags))        # coherence state of each line
+            c.hitPolicy = 2
+            c.misPolicy = 1
+
+        self.cores      = cores
+        self.ram        = ram
+        self.owned      = protocol == "moesi"
+        self.protocol   = protocol
+        self.offset_bit = cores[0].offset_bit
+
+        self.holders     = dict()       # block -> bit mask of the cores holding a valid copy
+        self.owner       = dict()       # block -> the core holding it Modified, Owned or Exclusive
+        self.lost        = dict()       # block -> {core : bit mask of the offsets written by other cores since its copy was invalidated}
+        self.falseBlocks = dict()       # block -> number of false sharing misses
+
+        self.numBusRead      = 0        # read misses put on the bus
+        self.numBusReadX     = 0        # write misses put on the bus, invalidating the other copies
+        self.numBusUpgrade   = 0        # writes to Shared or Owned lines, invalidating the other copies
+        self.numInval        = 0        # lines invalidated in other cores
+        self.numIntervention = 0        # misses served by another core's cache instead of the RAM
+        self.numTrueSharing  = 0        # misses on blocks another core invalidated, touching a byte it wrote
+        self.numFalseSharing = 0        # misses on blocks another core invalidated, touching none of the bytes it wrote
+
+    def set_state(self, c: Cache, line: int, state: int):
+        """
+        Changes the coherence state of a valid line, keeping its dirty bit in step
+
+        @param  c      : the Cache of the core
+        @param  line   : the index of the line
+        @param  state  : the new state, not INVALID
+
+        @return no return value
+        """
+
+        c.states[line]    = state
+        c.dirtyBits[line] = state >= MultiCore.OWNED
+
+    def sharing_miss(self, core: int, block: int, offNum: int):
+        """
+        Classifies a miss on a block that another core took away by writing to it. It is a true sharing miss
+        when the core touches a byte written since, and a false sharing miss when it only shared the block.
+
+        @param  core   : the core that missed
+        @param  block  : the block number of the address
+        @param  offNum : the offset of the address inside the block
+
+        @return no return value
+        """
+
+        writers = self.lost.get(block)
+        if writers is None or core not in writers: return
+
+        written = writers.pop(core)
+        if not writers: del self.lost[block]
+
+        if (written >> offNum) & 1:
+            self.numTrueSharing += 1
+        else:
+            self.numFalseSharing += 1
+            self.falseBlocks[block] = self.falseBlocks.get(block, 0) + 1
+
+    def allocate(self, core: int, setNum: int, tag: int, block: int, blocks: bytes) -> int:
+        """
+        Places a block into a core's cache, writing back the Modified or Owned victim
+
+        @param  core   : the core filling the block
+        @param  setNum : the set the block maps to
+        @param  tag    : the tag of the block
+        @param  block  : the block number
+        @param  blocks : the bytes of the block
+
+        @return the index of the line that was filled
+        """
+
+        c    = self.cores[core]
+        line = setNum * c.assoc + c.get_victum(setNum)
+
+        if c.validBits[line]:
+            victim = c.block_address(line) >> self.offset_bit
+            mask   = self.holders[victim] & ~(1 << core)
+            if mask: self.holders[victim] = mask
+            else:    del self.holders[victim]
+            if self.owner.get(victim) == core: del self.owner[victim]
+            c.evict(line, self.ram)
+
+        c.fill(line, tag, blocks)
+        self.holders[block] = self.holders.get(block, 0) | (1 << core)
+        return line
+
+    def load(self, core: int, address: int):
+        """
+        Reads an address from a core
+
+        @param  core    : the core reading
+        @param  address : the address being read
+
+        @return the byte that was read
+        """
+
+        c = self.cores[core]
+        tag, setNum, offNum = c.addressBits(address)
+        lineIndex = c.find_line(setNum, tag)
+
+        if lineIndex != -1:
+            line = setNum * c.assoc + lineIndex
+            c.numReadHit += 1
+            c.touch(line)
+            return c.data[line * c.blockSize + offNum]
+
+        c.numReadMis += 1
+        self.numBusRead += 1
+        block = address >> self.offset_bit
+        if block in self.lost: self.sharing_miss(core, block, offNum)
+
+        owner = self.owner.get(block)
+
+        if owner is None:
+            blocks = self.ram.load_blocks(c.blockSize, address)
+        else:                                               # the owner supplies the block, the Shared copies stay as they are
+            o      = self.cores[owner]
+            oLine  = o.line_of(address)
+            state  = o.states[oLine]
+            blocks = o.get_blocks(oLine)
+            self.numIntervention += 1
+
+            if state == MultiCore.MODIFIED and self.owned:
+                self.set_state(o, oLine, MultiCore.OWNED)
+            elif state != MultiCore.OWNED:
+                if state == MultiCore.MODIFIED:
+                    self.ram.write_blocks(block << self.offset_bit, blocks)
+                    o.numWriteBack      += 1
+                    o.numWriteBackBytes += o.blockSize
+                self.set_state(o, oLine, MultiCore.SHARED)
+                del self.owner[block]
+
+        shared = self.holders.get(block, 0)
+        line   = self.allocate(core, setNum, tag, block, blocks)
+
+        if shared: self.set_state(c, line, MultiCore.SHARED)
+        else:
+            self.set_state(c, line, MultiCore.EXCLUSIVE)
+            self.owner[block] = core
+
+        return c.data[line * c.blockSize + offNum]
+
+    def store(self, core: int, address: int, byte: int):
+        """
+        Writes a byte to an address from a core, invalidating every other copy of the block
+
+        @param  core    : the core writing
+        @param  address : the address being written to
+        @param  byte    : the byte being written
+
+        @return the byte that was written
+        """
+
+        c = self.cores[core]
+        tag, setNum, offNum = c.addressBits(address)
+        lineIndex = c.find_line(setNum, tag)
+        block     = address >> self.offset_bit
+        others    = self.holders.get(block, 0) & ~(1 << core)
+
+        owner     = self.owner.get(block)
+
+        if lineIndex != -1:
+            line = setNum * c.assoc + lineIndex
+            c.numWriteHit += 1
+            c.touch(line)
+            if others: self.numBusUpgrade += 1
+        else:
+            c.numWriteMis += 1
+            self.numBusReadX += 1
+            if block in self.lost: self.sharing_miss(core, block, offNum)
+
+            if owner is None: blocks = self.ram.load_blocks(c.blockSize, address)
+            else:
+                o      = self.cores[owner]
+                blocks = o.get_blocks(o.line_of(address))
+                self.numIntervention += 1
+
+        while others:                                       # invalidate every other copy
+            bit     = others & -others
+            others ^= bit
+            j       = bit.bit_length() - 1
+            o       = self.cores[j]
+            oLine   = o.line_of(address)
+
+            o.invalidate(oLine)
+            o.states[oLine] = MultiCore.INVALID
+            self.holders[block] &= ~bit
+            self.lost.setdefault(block, dict())[j] = 0
+            self.numInval += 1
+
+        if lineIndex == -1: line = self.allocate(core, setNum, tag, block, blocks)
+
+        writers = self.lost.get(block)
+        if writers is not None:
+            for j in writers: writers[j] |= 1 << offNum
+
+        self.set_state(c, line, MultiCore.MODIFIED)
+        self.owner[block] = core
+        c.data[line * c.blockSize + offNum] = byte
+        return byte
+
+    def false_sharing(self, top: int = 10) -> list:
+        """
+        Lists the blocks with the most false sharing misses
+
+        @param  top    : the number of blocks listed
+
+        @return a list of (block address, false sharing misses) tuples, the worst block first
+        """
+
+        worst = sorted(self.falseBlocks.items(), key = lambda item: item[1], reverse = True)[:top]
+        return [(block << self.offset_bit, count) for block, count in worst]
+
+    def stats(self) -> dict:
+        """
+        Collects the bus statistics and the statistics of every core, each one prefixed with the core (core0_, core1_, ...)
+
+        @param  there are no parameters except the reference to itself
+
+        @return a flat dictionary of the statistics
+        """
+
+        stats = {
+            "bus_reads"            : self.numBusRead,
+            "bus_read_exclusives"  : self.numBusReadX,
+            "bus_upgrades"         : self.numBusUpgrade,
+            "invalidations"        : self.numInval,
+            "interventions"        : self.numIntervention,
+            "true_sharing_misses"  : self.numTrueSharing,
+            "false_sharing_misses" : self.numFalseSharing,
+        }
+
+        for num, c in enumerate(self.cores):
+            for key, value in c.stats().items(): stats[f"core{num}_{key}"] = value
+
+        return stats
+
+def multicore_records(tracefiles: list):
+    """
+    Interleaves the traces of the cores. With one trace file, every record starts with the number of the core,
+    "<core> R <address>" or "<core> W <address> <byte>". With several, file n is the trace of core n and the
+    files are interleaved one record at a time.
+
+    @param  tracefiles : the trace files, see trace_records()
+
+    @return a generator of (core, op, address, byte) tuples
+    """
+
+    if len(tracefiles) > 1:
+        active = [(core, trace_records(tracefile)) for core, tracefile in enumerate(tracefiles)]
+        while active:
+            running = list()
+            for core, stream in active:
+                record = next(stream, None)
+                if record is None: continue
+                yield (core,) + record
+                running.append((core, stream))
+            active = running
+        return
+
+    with open_trace(tracefiles[0]) as file:
+        for lineNum, line in enumerate(io.TextIOWrapper(file), 1):
+            record = line.split()
+            if not record or record[0][0] == "#": continue
+
+            op = record[1] if len(record) > 2 else ""
+            if   op == "R" or op == "r": yield int(record[0]), 0, int(record[2], 16), 0
+            elif op == "W" or op == "w": yield int(record[0]), 1, int(record[2], 16), int(record[3], 16)
+            else:
+                raise ValueError(f"{tracefiles[0]}:{lineNum}: invalid trace record '{line.strip()}'")
+
+def replay_multicore(mc: MultiCore, records) -> dict:
+    """
+    Feeds (core, op, address, byte) records through the cores without printing anything per access
+
+    @param  mc        : the MultiCore that would be manipulated
+    @param  records   : an iterable of (core, op, address, byte) tuples, see multicore_records()
+
+    @return the statistics after the records, see MultiCore.stats()
+    """
+
+    load  = mc.load
+    store = mc.store
+    reads = writes = 0
+
+    for core, op, address, byte in records:
+        if op:
+            store(core, address, byte)
+            writes += 1
+        else:
+            load(core, address)
+            reads += 1
+
+    stats = mc.stats()
+    stats["reads"]  = reads
+    stats["writes"] = writes
+    stats["ram_bytes_read"]    = mc.ram.bytesRead
+    stats["ram_bytes_written"] = mc.ram.bytesWritten
+    return stats
+
+class Timing:
+    """
+    Adds up the time taken by the accesses to a Cache or a Hierarchy. Every level costs its hit latency each
+    time it is accessed, plus its miss penalty each time it misses. Every request to the RAM costs its latency
+    plus the time to move the bytes over the bus, busWidth bytes every busCycles cycles.
+
+    Write-throughs and write-backs to the RAM stall the access that caused them, unless a write buffer is used.
+    Writes then wait in the buffer while the RAM works through them one at a time, and an access only stalls
+    when the buffer is full.
+
+    The latencies are found from what the counters of the levels and of the RAM did during the access, so the
+    caches themselves don't pay anything for the timing model. For the same reason the caches can't prefetch:
+    the RAM reads of a prefetch would be charged to the access that triggered it.
+    """
+
+    def __init__(self, sim, ram: RAM, hitLatency: list = (1,), missPenalty: list = (0,), ramLatency: int = 100,
+                 busWidth: int = 8, busCycles: int = 1, writeBuffer: int = 0):
+        """
+        Initializes the timing of a simulation
+
+        @param  sim         : the Cache or Hierarchy being timed
+        @param  ram         : the RAM behind it
+        @param  hitLatency  : the hit latency of every level in cycles, the last value is used for the levels after it
+        @param  missPenalty : the cycles added by a miss of every level on top of the time the levels below take
+        @param  ramLatency  : the cycles of a RAM request before the first byte moves
+        @param  busWidth    : the bytes moved by the RAM bus per transfer
+        @param  busCycles   : the cycles taken by a transfer, the bandwidth is busWidth / busCycles bytes per cycle
+        @param  writeBuffer : the number of RAM writes that can wait in the write buffer, 0 for none
+
+        @return the Timing object, a ValueError is raised when a level prefetches
+        """
+
+        self.sim    = sim
+        self.ram    = ram
+        self.levels = sim.levels if isinstance(sim, Hierarchy) else [sim]
+
+        if any(level.prefetcher is not None for level in self.levels):
+            raise ValueError("the timing model can't tell prefetches from demand accesses")
+
+        self.hitLatency  = [hitLatency[min(n, len(hitLatency) - 1)] for n in range(len(self.levels))]
+        self.missPenalty = [missPenalty[min(n, len(missPenalty) - 1)] for n in range(len(self.levels))]
+        self.ramLatency  = ramLatency
+        self.busWidth    = busWidth
+        self.busCycles   = busCycles
+        self.writeBuffer = writeBuffer
+
+        self.cycles      = 0            # time of all the accesses so far
+        self.stalls      = 0            # cycles spent waiting for RAM writes, directly or on a full write buffer
+        self.pending     = list()       # cycle at which each write in the buffer is done, oldest first
+        self.histograms  = (dict(), dict())     # latency -> number of reads, and of writes
+        self.counters    = self.snapshot()
+
+    def snapshot(self) -> list:
+        """
+        Reads the counters the latencies are worked out from
+
+        @return the accesses and misses of every level, then the RAM reads, bytes read, writes and bytes written
+        """
+
+        counters = list()
+        for level in self.levels: counters += (level.numHit + level.numMis, level.numMis)
+        return counters + [self.ram.numReads, self.ram.bytesRead, self.ram.numWrites, self.ram.bytesWritten]
+
+    def transfer(self, requests: int, numBytes: int) -> int:
+        """
+        Computes the cycles of RAM requests
+
+        @param  requests : the number of requests
+        @param  numBytes : the bytes they move
+
+        @return the number of cycles
+        """
+
+        return requests * self.ramLatency + -(-numBytes // self.busWidth) * self.busCycles
+
+    def account(self, op: int) -> int:
+        """
+        Works out the latency of the access that was just simulated and adds it up
+
+        @param  op     : 0 for a read, 1 for a write
+
+        @return the latency of the access in cycles
+        """
+
+        counters = self.snapshot()
+        before   = self.counters
+        latency  = 0
+
+        for n in range(len(self.levels)):
+            latency += (counters[2 * n] - before[2 * n]) * self.hitLatency[n] + (counters[2 * n + 1] - before[2 * n + 1]) * self.missPenalty[n]
+
+        latency += self.transfer(counters[-4] - before[-4], counters[-3] - before[-3])
+
+        writes = counters[-2] - before[-2]
+        if writes:
+            service = self.transfer(writes, counters[-1] - before[-1])
+
+            if not self.writeBuffer:
+                latency     += service
+                self.stalls += service
+            else:
+                now = self.cycles + latency
+                while self.pending and self.pending[0] <= now: self.pending.pop(0)
+
+                if len(self.pending) >= self.writeBuffer:       # wait for the oldest write to leave the buffer
+                    stall        = self.pending.pop(0) - now
+                    latency     += stall
+                    self.stalls += stall
+                    now         += stall
+
+                self.pending.append(max(now, self.pending[-1] if self.pending else now) + service)
+
+        self.counters = counters
+        self.cycles  += latency
+
+        histogram = self.histograms[op]
+        histogram[latency] = histogram.get(latency, 0) + 1
+        return latency
+
+    def load(self, address: int, ram: RAM = None):
+        """
+        Reads an address, see Cache.load(), and adds up its latency
+        """
+
+        result = self.sim.load(address, self.ram)
+        self.account(0)
+        return result
+
+    def store(self, address: int, byte: int, ram: RAM = None):
+        """
+        Writes an address, see Cache.store(), and adds up its latency
+        """
+
+        result = self.sim.store(address, byte, self.ram)
+        self.account(1)
+        return result
+
+    def stats(self) -> dict:
+        """
+        Collects the statistics of the simulation along with the total cycles, the average memory access time of
+        all accesses, reads and writes, and the latency histograms as read_latency_<cycles>/write_latency_<cycles> counts
+
+        @param  there are no parameters except the reference to itself
+
+        @return a flat dictionary of the statistics
+        """
+
+        stats  = self.sim.stats()
+        reads  = sum(self.histograms[0].values())
+        writes = sum(self.histograms[1].values())
+
+        readCycles  = sum(latency * count for latency, count in self.histograms[0].items())
+        writeCycles = sum(latency * count for latency, count in self.histograms[1].items())
+
+        stats["cycles"]       = self.cycles
+        stats["amat"]         = self.cycles / (reads + writes) if reads + writes else 0.0
+        stats["read_amat"]    = readCycles / reads if reads else 0.0
+        stats["write_amat"]   = writeCycles / writes if writes else 0.0
+        stats["write_stalls"] = self.stalls
+
+        for name, histogram in zip(("read", "write"), self.histograms):
+            for latency in sorted(histogram): stats[f"{name}_latency_{latency}"] = histogram[latency]
+
+        return stats
+
+class StackDistance:
+    """
+    Computes the LRU stack distance of every access to a stream of blocks, which is the number of other
+    blocks used since the block was last used. An access hits in an LRU cache of C lines exactly when its
+    distance is less than C, so one pass gives the misses of every cache size at once.
+
+    The last access of every block is marked in a Fenwick tree indexed by time, so counting the blocks used
+    since is O(log n). Once the tree is full it is rebuilt with only the marks still in use, so memory grows
+    with the number of different blocks, not with the length of the trace.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty analysis
+
+        @param  no parameters other than the reference to itself
+
+        @return the StackDistance object
+        """
+
+        self.last  = dict()     # block -> time of its last access
+        self.size  = 16
+        self.tree  = [0] * (self.size + 1)
+        self.now   = 0
+        self.hist  = list()     # hist[d] is the number of accesses with distance d
+        self.cold  = 0          # first accesses to a block, they miss in every cache
+        self.total = 0
+
+    def access(self, block: int) -> int:
+        """
+        Records an access to a block
+
+        @param  block : the block number of the address (address >> offset_bit)
+
+        @return the stack distance of the access, -1 for the first access to the block
+        """
+
+        if self.now == self.size: self.compact()
+
+        tree = self.tree
+        last = self.last.get(block)
+        self.total += 1
+
+        if last is None:
+            self.cold += 1
+            distance   = -1
+        else:
+            distance = 0                                        # marks after the last access = prefix(now) - prefix(last + 1)
+            i = self.now
+            while i > 0:
+                distance += tree[i]
+                i &= i - 1
+            i = last + 1
+            while i > 0:
+                distance -= tree[i]
+                i &= i - 1
+
+            i = last + 1                                        # remove the old mark
+            while i <= self.size:
+                tree[i] -= 1
+                i += i & -i
+
+            hist = self.hist
+            if distance >= len(hist): hist.extend([0] * (distance + 1 - len(hist)))
+            hist[distance] += 1
+
+        i = self.now + 1                                        # mark the new access
+        while i <= self.size:
+            tree[i] += 1
+            i += i & -i
+
+        self.last[block] = self.now
+        self.now += 1
+        return distance
+
+    def compact(self):
+        """
+        Rebuilds the tree with only the marks still in use, renumbering them in the order they were made
+
+        @param  no parameters other than the reference to itself
+
+        @return no return value
+        """
+
+        order = sorted(self.last, key = self.last.get)
+        for time, block in enumerate(order): self.last[block] = time
+
+        self.now  = len(order)
+        self.size = 2 * self.now + 16
+        self.tree = tree = [0] * (self.size + 1)
+
+        for i in range(1, self.size + 1):                       # linear time build of a tree with the first
+            if i <= self.now: tree[i] += 1                      # now positions set to 1
+            parent = i + (i & -i)
+            if parent <= self.size: tree[parent] += tree[i]
+
+    def misses(self, lines: int) -> int:
+        """
+        Counts the misses an LRU cache with a given number of lines would have had
+
+        @param  lines : the number of lines of the cache
+
+        @return the number of misses
+        """
+
+        return self.cold + sum(self.hist[lines:])
+
+def miss_curve(tracefile: str, blockSize: int, setCounts: list = (1,)) -> list:
+    """
+    Computes the miss ratio of LRU caches of every size in a single pass over a trace, by keeping the
+    stack distances of each set separately for every set count. One set is the fully associative curve.
+    Every access allocates a line, like a write-allocate cache.
+
+    @param  tracefile : the trace being analyzed
+    @param  blockSize : the data block size of the caches
+    @param  setCounts : optional set counts, powers of two, to compute curves for
+
+    @return a list of rows with sets, assoc, cache_size, misses and miss_ratio, one row for every power of
+            two associativity up to the one where only cold misses are left
+    """
+
+    offset = blockSize.bit_length() - 1
+    stacks = {sets: [StackDistance() for _ in range(sets)] for sets in setCounts}
+
+    for op, address, byte in trace_records(tracefile):
+        block = address >> offset
+        for sets, setStacks in stacks.items():
+            setStacks[block & (sets - 1)].access(block)
+
+    rows = list()
+    for sets, setStacks in stacks.items():
+        total    = sum(stack.total for stack in setStacks)
+        maxAssoc = max(len(stack.hist) for stack in setStacks)
+
+        assoc = 1
+        while True:
+            misses = sum(stack.misses(assoc) for stack in setStacks)
+            rows.append(dict(sets = sets, assoc = assoc, cache_size = sets * assoc * blockSize,
+                             misses = misses, miss_ratio = misses / total if total else 0.0))
+            if assoc >= maxAssoc: break
+            assoc *= 2
+
+    return rows
+
+def check_miss_curve(ramfile: str, tracefile: str, blockSize: int, rows: list, addrBits: int = 8) -> list:
+    """
+    Cross-checks a miss curve against the Cache with least recently used replacement
+
+    @param  ramfile   : the file to initialize the RAM with
+    @param  tracefile : the trace the curve was computed for
+    @param  blockSize : the data block size of the curve
+    @param  rows      : the rows returned by miss_curve()
+    @param  addrBits  : optional width of an address
+
+    @return the rows whose misses don't match the simulation, with the simulated misses added
+    """
+
+    mismatches = list()
+
+    for row in rows:
+        ram   = RAM(ramfile, debug = True, addrBits = addrBits)
+        cache = Cache(cacheSize = row["cache_size"], blockSize = blockSize, assoc = row["assoc"],
+                      repPolicy = 2, hitPolicy = 1, misPolicy = 1, addrBits = addrBits)
+
+        misses = replay(ram, cache, tracefile)["misses"]
+        if misses != row["misses"]: mismatches.append(dict(row, simulated_misses = misses))
+
+    return mismatches
+
+class Replacement:
+    """
+    Base of the replacement policies. A replacement policy keeps its own information about the lines of
+    every set, using the same line index (set * assoc + way) as the cache, and picks the next line to evict.
+    Every operation costs the same no matter how large the associativity is.
+    """
+
+    rng = None              # the cache's own random.Random, the random choices use the shared one of the random module without it
+
+    def __init__(self, sets: int, assoc: int):
+        """
+        Initializes the replacement information of an empty cache
+
+        @param  sets  : the number of sets of the cache
+        @param  assoc : the number of lines per set
+
+        @return the Replacement object
+        """
+
+        self.assoc = assoc
+
+    def fill(self, line: int):
+        """
+        Records that a new block was placed into a line
+
+        @param  line  : the index of the line
+
+        @return no return value
+        """
+
+        self.touch(line)
+
+    def touch(self, line: int):
+        """
+        Records that a line was hit
+
+        @param  line  : the index of the line
+
+        @return no return value
+        """
+
+        pass
+
+    def victim(self, setNum: int) -> int:
+        """
+        Picks the line of a full set that is next to be evicted
+
+        @param  setNum : the set being processed
+
+        @return the line number inside the set
+        """
+
+        raise NotImplementedError
+
+class RandomReplacement(Replacement):
+    """
+    Evicts a random line of the set
+    """
+
+    def victim(self, setNum: int) -> int:
+        if self.rng is None: return randint(0, self.assoc - 1)
+        return self.rng.randint(0, self.assoc - 1)
+
+class LRUReplacement(Replacement):
+    """
+    Evicts the least recently used line. Every set keeps its lines in a doubly linked list ordered from
+    least to most recently used, so moving a line to the front and finding the victim are both O(1).
+    """
+
+    def __init__(self, sets: int, assoc: int):
+        super().__init__(sets, assoc)
+        lines = sets * assoc
+
+        self.prev = array('q', range(-1, lines - 1))           # the lines start out ordered by way
+        self.next = array('q', range(1, lines + 1))
+        self.head = array('q', range(0, lines, assoc))         # least recently used line of each set
+        self.tail = array('q', range(assoc - 1, lines, assoc)) # most recently used line of each set
+
+        for first in range(0, lines, assoc):
+            self.prev[first]             = -1
+            self.next[first + assoc - 1] = -1
+
+    def touch(self, line: int):
+        setNum = line // self.assoc
+        tail   = self.tail[setNum]
+        if line == tail: return
+
+        before = self.prev[line]                                # unlink the line, it can't be the tail
+        after  = self.next[line]
+        if before == -1: self.head[setNum] = after
+        else:            self.next[before] = after
+        self.prev[after] = before
+
+        self.next[tail]     = line                              # and append it after the tail
+        self.prev[line]     = tail
+        self.next[line]     = -1
+        self.tail[setNum]   = line
+
+    def victim(self, setNum: int) -> int:
+        return self.head[setNum] - setNum * self.assoc
+
+class LFUReplacement(Replacement):
+    """
+    Evicts the least frequently used line, the least recently used one among lines with the same count.
+    Every set keeps its lines in buckets by access count, as well as the lowest count in use, so counting
+    an access and finding the victim are both O(1).
+    """
+
+    def __init__(self, sets: int, assoc: int):
+        super().__init__(sets, assoc)
+
+        self.count   = array('Q', bytes(8 * sets * assoc))      # access count of each line
+        self.minimum = array('Q', bytes(8 * sets))              # lowest count in use in each set
+        self.buckets = [{0: dict.fromkeys(range(s * assoc, (s + 1) * assoc))} for s in range(sets)]
+
+    def move(self, line: int, count: int):
+        setNum  = line // self.assoc
+        buckets = self.buckets[setNum]
+        old     = self.count[line]
+
+        bucket = buckets[old]                                   # dicts keep insertion order, so the first
+        del bucket[line]                                        # line of a bucket is its least recent one
+        if not bucket: del buckets[old]
+
+        if count in buckets: buckets[count][line] = None
+        else:                buckets[count] = {line: None}
+
+        self.count[line] = count
+        if old == self.minimum[setNum] and old not in buckets or count < self.minimum[setNum]:
+            self.minimum[setNum] = count
+
+    def fill(self, line: int):
+        self.move(line, 1)
+
+    def touch(self, line: int):
+        self.move(line, self.count[line] + 1)
+
+    def victim(self, setNum: int) -> int:
+        return next(iter(self.buckets[setNum][self.minimum[setNum]])) - setNum * self.assoc
+
+class FIFOReplacement(LRUReplacement):
+    """
+    Evicts the line that was filled the longest time ago. Every set keeps its lines in the same linked list
+    as LRUReplacement, but only a fill moves a line to the back, so the head is the oldest fill even when
+    lines were invalidated and filled again out of order.
+    """
+
+    def fill(self, line: int):
+        LRUReplacement.touch(self, line)
+
+    def touch(self, line: int):
+        pass
+
+class PLRUReplacement(Replacement):
+    """
+    Evicts a line using tree pseudo-LRU. Every set keeps a binary tree of assoc - 1 bits, each pointing
+    towards the half of the set that was used less recently. Uses the tree of the next power of two when
+    the associativity isn't a power of two, and picks a random way when the tree points at a way past
+    the last one.
+    """
+
+    def __init__(self, sets: int, assoc: int):
+        super().__init__(sets, assoc)
+        self.levels = (assoc - 1).bit_length()
+        self.width  = 1 << self.levels
+        self.bits   = bytearray(sets * self.width)              # node n of a set's tree is at set * width + n
+
+    def touch(self, line: int):
+        setNum = line // self.assoc
+        way    = line - setNum * self.assoc
+        base   = setNum * self.width
+        node   = 1
+
+        for level in range(self.levels - 1, -1, -1):            # point every node on the path away from the way
+            bit = (way >> level) & 1
+            self.bits[base + node] = bit ^ 1
+            node = 2 * node + bit
+
+    def victim(self, setNum: int) -> int:
+        base = setNum * self.width
+        node = 1
+
+        for _ in range(self.levels):
+            node = 2 * node + self.bits[base + node]
+
+        way = node - self.width
+        if way < self.assoc: return way
+        return randint(0, self.assoc - 1) if self.rng is None else self.rng.randint(0, self.assoc - 1)
+
+REPLACEMENT_POLICIES = {1: RandomReplacement, 2: LRUReplacement, 3: LFUReplacement, 4: FIFOReplacement, 5: PLRUReplacement}
+
+class Prefetcher:
+    """
+    Base of the prefetchers. A prefetcher watches the demand accesses of a cache and picks the blocks to fetch
+    ahead of time, the cache then fetches every one of them that isn't cached yet (see Cache.prefetch_block()).
+    A prefetched line used within `latency` accesses of being fetched counts as late, it would not have arrived in time.
+    """
+
+    MISS, HIT, PREFETCH_HIT = 0, 1, 2   # kinds of demand access, PREFETCH_HIT is the first use of a prefetched line
+
+    def __init__(self, cache, degree: int = 2, latency: int = 8):
+        """
+        Initializes a prefetcher for a cache
+
+        @param  cache   : the Cache being prefetched into
+        @param  degree  : the number of blocks fetched per prediction
+        @param  latency : the number of accesses a prefetch takes to arrive
+
+        @return the Prefetcher object
+        """
+
+        self.blockSize = cache.blockSize
+        self.degree    = degree
+        self.latency   = latency
+
+    def access(self, address: int, kind: int) -> list:
+        """
+        Watches a demand access
+
+        @param  address : the address that was accessed
+        @param  kind    : MISS, HIT or PREFETCH_HIT
+
+        @return the addresses of the blocks to prefetch
+        """
+
+        raise NotImplementedError
+
+class NextLinePrefetcher(Prefetcher):
+    """
+    Fetches the blocks following a block that missed, and again when a prefetched block is first used (tagged prefetching)
+    """
+
+    def access(self, address: int, kind: int) -> list:
+        if kind == Prefetcher.HIT: return []
+
+        block = address - address % self.blockSize
+        return [block + self.blockSize * n for n in range(1, self.degree + 1)]
+
+class StridePrefetcher(Prefetcher):
+    """
+    Detects constant strides between the accesses to each 4KB region. Traces carry no program counter, so the
+    region of the address stands in for it. Once the same stride is seen three times in a row, the next blocks
+    along it are prefetched.
+    """
+
+    regionBits = 12
+    tableSize  = 256        # regions remembered, the oldest one is dropped first
+
+    def __init__(self, cache, degree: int = 2, latency: int = 8):
+        super().__init__(cache, degree, latency)
+        self.table = dict()     # region -> [last address, stride, confidence]
+
+    def access(self, address: int, kind: int) -> list:
+        region = address >> StridePrefetcher.regionBits
+        entry  = self.table.get(region)
+
+        if entry is None:
+            self.table[region] = [address, 0, 0]
+            if len(self.table) > StridePrefetcher.tableSize: del self.table[next(iter(self.table))]
+            return []
+
+        stride   = address - entry[0]
+        entry[0] = address
+
+        if stride == 0: return []
+        if stride != entry[1]:
+            entry[1] = stride
+            entry[2] = 0
+            return []
+
+        entry[2] += 1
+        if entry[2] < 2: return []
+
+        if abs(stride) < self.blockSize: stride = self.blockSize if stride > 0 else -self.blockSize     # run ahead by whole blocks
+        return [address + stride * n for n in range(1, self.degree + 1)]
+
+class StreamPrefetcher(Prefetcher):
+    """
+    Detects streams of misses to consecutive blocks, going up or down, and runs ahead of each stream.
+    Every stream is kept by the next block it expects, and moves along each time that block is used.
+    """
+
+    streams = 8             # streams followed at once
+    history = 16            # recent misses remembered to start new streams
+
+    def __init__(self, cache, degree: int = 2, latency: int = 8):
+        super().__init__(cache, degree, latency)
+        self.expected = dict()  # next block of a stream -> direction of the stream
+        self.misses   = dict()  # recent missing blocks, oldest first
+
+    def access(self, address: int, kind: int) -> list:
+        if kind == Prefetcher.HIT: return []
+
+        block     = address // self.blockSize
+        direction = self.expected.pop(block, 0)
+
+        if not direction and kind == Prefetcher.MISS:
+            if   block - 1 in self.misses: direction = 1
+            elif block + 1 in self.misses: direction = -1
+
+            self.misses[block] = None
+            if len(self.misses) > StreamPrefetcher.history: del self.misses[next(iter(self.misses))]
+
+        if not direction: return []
+
+        self.expected[block + direction] = direction
+        if len(self.expected) > StreamPrefetcher.streams: del self.expected[next(iter(self.expected))]
+        return [(block + direction * n) * self.blockSize for n in range(1, self.degree + 1)]
+
+PREFETCHERS = {1: NextLinePrefetcher, 2: StridePrefetcher, 3: StreamPrefetcher}
+
+class Listener:
+    """
+    Base class of the observers of a Cache. A Listener subscribed with Cache.subscribe() has its event()
+    method called for every hit, miss, eviction, writeback, fill and flush of the cache, along with the
+    set, way and tag involved. Nothing is emitted while a cache has no listeners.
+    """
+
+    READ_HIT    = 0
+    READ_MISS   = 1         # the way of a miss is the line chosen for the block
+    WRITE_HIT   = 2
+    WRITE_MISS  = 3
+    EVICTION    = 4         # the tag of an eviction or writeback is the one of the block leaving the line
+    WRITEBACK   = 5
+    FILL        = 6
+    FLUSH       = 7         # flushes have set, way and tag -1
+
+    names       = ("read_hit", "read_miss", "write_hit", "write_miss", "eviction", "writeback", "fill", "flush")
+
+    def event(self, kind: int, setNum: int, way: int, tag: int):
+        """
+        Called for every event of the cache the listener is subscribed to
+
+        @param  kind   : the kind of event, one of the constants above
+        @param  setNum : the set of the line involved
+        @param  way    : the way of the line involved inside its set
+        @param  tag    : the tag involved
+
+        @return no return value
+        """
+
+        pass
+
+    def close(self):
+        """
+        Finishes the output of the listener once the simulation is over
+
+        @param  there are no parameters except the reference to itself
+
+        @return no return value
+        """
+
+        pass
+
+class TerminalListener(Listener):
+    """
+    Prints the tag and blocks of every line that is hit, and announces flushes, the output of the menu
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def event(self, kind: int, setNum: int, way: int, tag: int):
+        if kind == Listener.READ_HIT or kind == Listener.WRITE_HIT:
+            print(f"{tag:02x}")
+            print([f"{b:02X}" for b in self.cache.get_blocks(setNum * self.cache.assoc + way)])
+        elif kind == Listener.FLUSH:
+            print("cache_cleared")
+
+EVENT_MAGIC  = b"CSIMEVT1"
+EVENT_RECORD = struct.Struct("<Biiq")   # kind, set, way, tag
+
+class EventLog(Listener):
+    """
+    Writes every event to a binary file: EVENT_MAGIC followed by one EVENT_RECORD per event.
+    The records are gathered in a buffer and written out a megabyte at a time, see read_events().
+    """
+
+    def __init__(self, eventfile: str):
+        self.file   = open(eventfile, 'wb')
+        self.buffer = bytearray(EVENT_MAGIC)
+        self.pack   = EVENT_RECORD.pack
+        self.events = 0
+
+    def event(self, kind: int, setNum: int, way: int, tag: int):
+        self.buffer += self.pack(kind, setNum, way, tag)
+        self.events += 1
+        if len(self.buffer) >= TRACE_BUFFER:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def close(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+        self.file.close()
+
+def read_events(eventfile: str):
+    """
+    Reads back a file written by an EventLog
+
+    @param  eventfile : the binary event file
+
+    @return an iterator of (kind, set, way, tag) tuples
+    """
+
+    with open(eventfile, 'rb') as file:
+        if file.read(len(EVENT_MAGIC)) != EVENT_MAGIC: raise ValueError(f"{eventfile} is not an event log")
+        data = file.read()
+
+    return EVENT_RECORD.iter_unpack(data)
+
+class SetHeatmap(Listener):
+    """
+    Counts the events of every kind in every set, showing which sets are hot and which ones thrash.
+    The counts are written as one row per set by write_results() when the listener is closed.
+    """
+
+    def __init__(self, sets: int, outfile: str = None):
+        self.outfile = outfile
+        self.counts  = [array('Q', bytes(8 * sets)) for _ in Listener.names]
+
+    def event(self, kind: int, setNum: int, way: int, tag: int):
+        if setNum >= 0: self.counts[kind][setNum] += 1
+
+    def rows(self) -> list:
+        """
+        Collects the counts of the heatmap
+
+        @param  there are no parameters except the reference to itself
+
+        @return a list with a dictionary of the set number and its count of every kind of event, for every set
+        """
+
+        return [dict(set = setNum, **{name: counts[setNum] for name, counts in zip(Listener.names, self.counts)})
+                for setNum in range(len(self.counts[0]))]
+
+    def close(self):
+        write_results(self.rows(), self.outfile)
+
+class SampledListener(Listener):
+    """
+    Forwards only one in every `period` events to another listener, so a long simulation can be
+    observed at a fraction of the cost and output size
+    """
+
+    def __init__(self, listener: Listener, period: int):
+        self.listener = listener
+        self.period   = period
+        self.skipped  = 0
+
+    def event(self, kind: int, setNum: int, way: int, tag: int):
+        self.skipped += 1
+        if self.skipped == self.period:
+            self.skipped = 0
+            self.listener.event(kind, setNum, way, tag)
+
+    def close(self):
+        self.listener.close()
+
+class MissClassifier(Listener):
+    """
+    Sorts the misses of a cache into the three Cs while it runs. A miss is compulsory the first time its block
+    is used, a capacity miss when a fully associative LRU cache of the same size would have missed too, and a
+    conflict miss when that cache would have hit. Many conflict misses call for more associativity, many
+    capacity misses for a bigger cache.
+
+    The fully associative cache is shadowed by a dict of its blocks kept in LRU order, oldest first, so
+    every access costs a few dict operations. A flush empties the shadow as well, so the misses after it
+    count as capacity misses.
+    """
+
+    kinds = ("compulsory", "capacity", "conflict")
+
+    def __init__(self, cache):
+        self.indexBits  = cache.index_bit
+        self.offsetBits = cache.offset_bit
+        self.lines      = cache.set * cache.assoc                       # capacity of the shadow
+        self.noAllocate = cache.misPolicy == 2                          # write misses don't bring their block in
+        self.shadow     = dict()                                        # blocks of the fully associative cache, LRU first
+        self.seen       = set()                                         # blocks used so far
+        self.counts     = [0, 0, 0]                                     # misses of each kind
+        self.perSet     = [array('Q', bytes(8 * cache.set)) for _ in MissClassifier.kinds]
+        self.perBlock   = dict()                                        # block -> misses of each kind
+
+    def event(self, kind: int, setNum: int, way: int, tag: int):
+        if kind > Listener.WRITE_MISS:                                  # only the accesses matter
+            if kind == Listener.FLUSH: self.shadow.clear()
+            return
+
+        block  = (tag << self.indexBits) | setNum
+        shadow = self.shadow
+        inLRU  = shadow.pop(block, 0) is None
+
+        if kind == Listener.READ_MISS or kind == Listener.WRITE_MISS:
+            if   block not in self.seen: c = 0
+            elif inLRU:                  c = 2
+            else:                        c = 1
+
+            self.counts[c]         += 1
+            self.perSet[c][setNum] += 1
+            counts = self.perBlock.get(block)
+            if counts is None: counts = self.perBlock[block] = [0, 0, 0]
+            counts[c] += 1
+
+            if kind == Listener.WRITE_MISS and self.noAllocate:
+                self.seen.add(block)
+                if inLRU: shadow[block] = None
+                return
+
+        shadow[block] = None                                            # most recently used
+        if not inLRU:
+            self.seen.add(block)
+            if len(shadow) > self.lines: del shadow[next(iter(shadow))]
+
+    def stats(self) -> dict:
+        """
+        Collects the totals of the classification
+
+        @param  there are no parameters except the reference to itself
+
+        @return a dictionary of the number of compulsory, capacity and conflict misses
+        """
+
+        return {f"{kind}_misses": count for kind, count in zip(MissClassifier.kinds, self.counts)}
+
+    def rows(self) -> list:
+        """
+        Collects the classification of the misses of every set
+
+        @param  there are no parameters except the reference to itself
+
+        @return a list with a dictionary of the set number and its misses of each kind, for every set
+        """
+
+        return [dict(set = setNum, **{kind: counts[setNum] for kind, counts in zip(MissClassifier.kinds, self.perSet)})
+                for setNum in range(len(self.perSet[0]))]
+
+    def blocks(self, top: int = 10) -> list:
+        """
+        Lists the blocks with the most misses
+
+        @param  top    : the number of blocks listed
+
+        @return a list of (block address, compulsory, capacity, conflict misses) tuples, the worst block first
+        """
+
+        worst = sorted(self.perBlock.items(), key = lambda item: sum(item[1]), reverse = True)[:top]
+        return [(block << self.offsetBits, *counts) for block, counts in worst]
+
+def valid_input(instr: str, min: int, max: int, notAllow = None) -> int:
+    """
+    Checks to see if cache configuration inputs are valid according to restraints
+
+    @param  instr       : the input instruction
+    @param  min         : minimum allowed number in input
+    @param  max         : maximum allowed number in input
+    @param  notAllow    : number that is not allowed in input
+
+    @return userIn      : returns the users input integer
+    """
+
+    try:               userIn = int(input(instr))
+    except Exception:  userIn = 0
+
+    while userIn < min or userIn > max or userIn == notAllow:
+        if notAllow == None:
             print(f"[ERROR] - Invaild value. Enter value between {min} and {max}.")
         else:
-            print(f"[ERROR] - Invaild value. Enter value between {min} and {max}, not including {notAllow}.")
-        
-        try:               userIn = int(input(instr))
-        except Exception:  userIn = 0
-    
-    return userIn
+            print(f"[ERROR] - Invaild value. Enter value between {min} and {max}, not including {notAllow}.")
+        
+        try:               userIn = int(input(instr))
+        except Exception:  userIn = 0
+    
+    return userIn
+
+def ram_format(ramfile: str) -> str:
+    """
+    Picks the format of a RAM file from its extension
+
+    @param  ramfile     : the name of the RAM file
+
+    @return "bin" for a raw binary image (.bin, .img), "hex" for a compact hex file (.hex), otherwise "txt"
+    """
+
+    extension = os.path.splitext(ramfile)[1].lower()
+
+    if   extension in (".bin", ".img"): return "bin"
+    elif extension == ".hex":           return "hex"
+    else:                               return "txt"
+
+def simulate(r: RAM, c: Cache):
+    """
+    Function driving the simulation of the cache. Allows the user to input commands, addresses, and bytes to modify the cache.
+
+    @param  r      : the RAM that would be manipulated
+    @param  c      : the Cache that would be manipulated
+
+
+    @return None, the output of each of the previous functions/methods would be output to the terminal
+    """
+
+    terminal = c.subscribe(TerminalListener(c))
+    try:
+        menu(r, c)
+    finally:
+        c.unsubscribe(terminal)
+
+def menu(r: RAM, c: Cache):
+    """
+    Runs the menu of simulate() until the user quits
+
+    @param  r      : the RAM that would be manipulated
+    @param  c      : the Cache that would be manipulated
+
+    @return None
+    """
+
+    print("*** Cache simulator menu ***")
+    print("type one command:")
+    print("1. cache-read")
+    print("2. cache-write")
+    print("3. cache-flush")
+    print("4. cache-view")
+    print("5. memory-view")
+    print("6. cache-dump")
+    print("7. memory-dump")
+    print("8. quit")
+    print("****************************")
+
+    userIn  = input().replace("0b","")
+
+    if userIn == "quit": return
+
+    inputLen = len(userIn.split(" "))
+
+    if   inputLen == 1:
+        command = userIn
+    elif inputLen == 2:
+        command  = userIn.split(" ")[0]
+        address  = userIn.split(" ")[1]
+    elif inputLen == 3:
+        command  = userIn.split(" ")[0]
+        address  = userIn.split(" ")[1]
+        hexByte  = userIn.split(" ")[2]
+
+    while True:
+
+        if   command == "cache-read":
+            c.read(address, r)
+        elif command == "cache-write":
+            c.write(address, hexByte, r)
+        elif command == "cache-flush":
+            c.flush()
+        elif command == "cache-view":
+            c.view()
+        elif command == "memory-view":
+            r.view()
+        elif command == "cache-dump":
+            c.dump()
+        elif command == "memory-dump":
+            r.dump()
+        else:
+            print("invalid command, try again.")
+
+        print("*** Cache simulator menu ***")
+        print("type one command:")
+        print("1. cache-read")
+        print("2. cache-write")
+        print("3. cache-flush")
+        print("4. cache-view")
+        print("5. memory-view")
+        print("6. cache-dump")
+        print("7. memory-dump")
+        print("8. quit")
+        print("****************************")
+        
+        userIn  = input()
+
+        if userIn == "quit": return
+
+        inputLen = len(userIn.split(" "))
+
+        if   inputLen == 1:
+            command  = userIn
+        elif inputLen == 2:
+            command  = userIn.split(" ")[0]
+            address  = userIn.split(" ")[1]
+        elif inputLen == 3:
+            command  = userIn.split(" ")[0]
+            address  = userIn.split(" ")[1]
+            hexByte  = userIn.split(" ")[2]
+
+def batch(r: RAM, c: Cache, lines, out, jsonl: bool = False) -> int:
+    """
+    Runs the commands of simulate() from a script instead of the menu, with the same output as the menu
+    but without the menu itself, all of it going through one buffered writer. With jsonl every command
+    writes one JSON object on a line of its own instead, for scripts to compare.
+
+    @param  r      : the RAM that would be manipulated
+    @param  c      : the Cache that would be manipulated
+    @param  lines  : an iterable of lines, only the ones starting with a command are run (see SIMULATE_COMMANDS),
+                     so a session typed into the menu can be run as is. quit stops the script
+    @param  out    : the text file the output is written to
+    @param  jsonl  : optional, write JSON lines instead of the output of the menu
+
+    @return the number of commands run
+    """
+
+    terminal = None if jsonl else c.subscribe(TerminalListener(c))
+    commands = 0
+
+    try:
+        with contextlib.redirect_stdout(out):
+            for line in lines:
+                if not line.startswith(SIMULATE_COMMANDS): continue
+                words = line.split()
+                if words[0] == "quit": break
+
+                commands += 1
+                if jsonl: out.write(json.dumps(command_result(r, c, words)) + "\n")
+                else:     run_command(r, c, words)
+    finally:
+        if terminal is not None: c.unsubscribe(terminal)
+
+    return commands
+
+def run_command(r: RAM, c: Cache, words: list):
+    """
+    Runs one command of simulate(), printing its output
+
+    @param  r      : the RAM that would be manipulated
+    @param  c      : the Cache that would be manipulated
+    @param  words  : the command followed by its address and byte
+
+    @return no return value
+    """
+
+    command = words[0]
+
+    try:
+        if   command == "cache-read"  and len(words) == 2: c.read(words[1], r)
+        elif command == "cache-write" and len(words) == 3: c.write(words[1], words[2], r)
+        elif command == "cache-flush" : c.flush()
+        elif command == "cache-view"  : c.view()
+        elif command == "memory-view" : r.view()
+        elif command == "cache-dump"  : c.dump()
+        elif command == "memory-dump" : r.dump()
+        else:                           print("invalid command, try again.")
+    except ValueError:                                      # an address or byte that isn't hex
+        print("invalid command, try again.")
+
+def command_result(r: RAM, c: Cache, words: list) -> dict:
+    """
+    Runs one command of simulate() and collects its result instead of printing it
+
+    @param  r      : the RAM that would be manipulated
+    @param  c      : the Cache that would be manipulated
+    @param  words  : the command followed by its address and byte
+
+    @return a dictionary of the command and its result: the set, tag, hit, eviction line and data of reads and
+            writes (plus the dirty bit of writes), the printed lines of the other commands, or an error
+    """
+
+    command = words[0]
+    result  = {"command": command}
+
+    try:
+        if command == "cache-read" and len(words) == 2:
+            setNum, tag, offNum, lineIndex, vicNum = c.load(int(words[1], 16), r)
+            line = setNum * c.assoc + (vicNum if lineIndex == -1 else lineIndex)
+            result.update(address = words[1], set = setNum, tag = tag, hit = lineIndex != -1, eviction_line = vicNum,
+                          data = c.get_block(line, offNum))
+
+        elif command == "cache-write" and len(words) == 3:
+            setNum, tag, lineIndex, vicNum, data = c.store(int(words[1], 16), int(words[2], 16), r)
+            line = setNum * c.assoc + (vicNum if lineIndex == -1 else lineIndex)
+            result.update(address = words[1], set = setNum, tag = tag, hit = lineIndex != -1, eviction_line = vicNum,
+                          data = data, dirty_bit = c.dirtyBits[line])
+
+        elif command == "cache-flush":                                                 # the menu's line comes from its TerminalListener
+            c.flush()
+            result["output"] = ["cache_cleared"]
+
+        elif command in ("cache-view", "memory-view", "cache-dump", "memory-dump"):
+            text = io.StringIO()
+            with contextlib.redirect_stdout(text): run_command(r, c, words)
+            result["output"] = text.getvalue().splitlines()
+
+        else:
+            result["error"] = "invalid command"
+
+    except ValueError:
+        result["error"] = "invalid address or byte"
+
+    return result
+
+FRAME_HEADER  = struct.Struct("<I")     # length of a frame of the simulation server
+ACCESS_RECORD = struct.Struct("<BQB")   # op (0 read, 1 write), address, byte written
+ACCESS_RESULT = struct.Struct("<BB")    # hit, byte read or written
+
+class Session:
+    """
+    A RAM and a Cache hosted by a SimulationServer, along with the count of the requests it served
+    """
+
+    def __init__(self, ram: RAM, cache: Cache):
+        self.ram      = ram
+        self.cache    = cache
+        self.requests = 0
+        self.accesses = 0
+
+    def stats(self) -> dict:
+        """
+        Collects the statistics of the session
+
+        @param  there are no parameters except the reference to itself
+
+        @return the statistics of the cache, see Cache.stats(), the traffic with the RAM and the requests served
+        """
+
+        stats = self.cache.stats()
+        stats["ram_bytes_read"]    = self.ram.bytesRead
+        stats["ram_bytes_written"] = self.ram.bytesWritten
+        stats["requests"]          = self.requests
+        stats["batched_accesses"]  = self.accesses
+        return stats
+
+class SimulationServer:
+    """
+    Hosts named sessions, each a RAM and a Cache, for clients connecting over a Unix or TCP socket, so a warm
+    cache can be queried again and again without starting the simulator every time.
+
+    Every message is a frame: its length (FRAME_HEADER) followed by an opcode and the body of the request.
+    Accesses come in batches of ACCESS_RECORDs and are answered with one ACCESS_RESULT each, all the other
+    requests and answers are JSON. An answer starts with a status, 0 when the request succeeded and 1 followed
+    by a JSON {"error": ...} when it failed, in which case the request changed nothing. Clients can send any
+    number of requests before reading the answers, which come back in order.
+    Every request is carried out in one go on the event loop, so the other clients wait for it. That is why
+    a batch holds at most maxAccesses accesses.
+    """
+
+    OPEN        = 1         # {"session", Cache parameters, "addrBits", "ramRange", "seed"} creates a session
+    ACCESS      = 2         # length of the session name (1 byte), the name, the ACCESS_RECORDs
+    VIEW        = 3         # {"session", "memory": false} -> {"output": the lines printed by cache-view or memory-view}
+    FLUSH       = 4         # {"session"}
+    STATS       = 5         # {"session"} -> the statistics of the session, see Session.stats()
+    CLOSE       = 6         # {"session"}
+    LIST        = 7         # {} -> {"sessions": the names of the sessions}
+
+    maxFrame    = 1 << 20   # larger frames close the connection
+    maxAccesses = 1 << 16   # accesses of a batch, about a tenth of a second of simulation
+
+    def __init__(self, ramfile: str, addrBits: int = 8):
+        """
+        Initializes a server without any sessions
+
+        @param  ramfile  : the file the RAM of every session is initialized with
+        @param  addrBits : the width of an address of the sessions that don't give one
+
+        @return the SimulationServer object
+        """
+
+        self.ramfile  = ramfile
+        self.addrBits = addrBits
+        self.sessions = dict()      # name -> Session
+
+    def serve(self, address: str):
+        """
+        Serves clients until the process is stopped
+
+        @param  address : host:port to listen on TCP, anything else is the path of a Unix socket
+
+        @return no return value
+        """
+
+        import asyncio                                                                  # only imported by the server
+
+        asyncio.run(self.run(address))
+
+    async def run(self, address: str):
+        """
+        Listens on the address and serves clients, see serve()
+        """
+
+        import asyncio
+
+        host, _, port = address.rpartition(":")
+        if port.isdigit(): server = await asyncio.start_server(self.handle, host or "127.0.0.1", int(port))
+        else:              server = await asyncio.start_unix_server(self.handle, address)
+
+        print(f"listening:{address}", flush = True)
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        """
+        Answers the requests of one client in order, until it disconnects
+
+        @param  reader : the asyncio StreamReader of the connection
+        @param  writer : the asyncio StreamWriter of the connection
+
+        @return no return value
+        """
+
+        import asyncio
+
+        try:
+            while True:
+                length, = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                if not 1 <= length <= SimulationServer.maxFrame: break
+
+                writer.write(self.answer(await reader.readexactly(length)))
+                if writer.transport.get_write_buffer_size() > TRACE_BUFFER: await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):                          # the client went away
+            pass
+        finally:
+            writer.close()
+
+    def answer(self, frame: bytes) -> bytes:
+        """
+        Carries out one request
+
+        @param  frame  : the frame of the request, without its length
+
+        @return the frame of the answer, with its length
+        """
+
+        opcode = frame[0]
+        body   = memoryview(frame)[1:]
+
+        try:
+            if opcode == SimulationServer.ACCESS: reply = b"\x00" + self.access(body)
+            else:                                 reply = b"\x00" + json.dumps(self.request(opcode, json.loads(bytes(body) or b"{}"))).encode()
+        except Exception as error:                                                      # a bad request fails on its own, the server goes on
+            reply = b"\x01" + json.dumps({"error": str(error)}).encode()
+
+        return FRAME_HEADER.pack(len(reply)) + reply
+
+    def session(self, name: str) -> Session:
+        """
+        Looks up a session and counts the request
+
+        @param  name   : the name of the session
+
+        @return the Session object
+        """
+
+        session = self.sessions.get(name)
+        if session is None: raise ValueError(f"there is no session {name}")
+
+        session.requests += 1
+        return session
+
+    def access(self, body: memoryview) -> bytes:
+        """
+        Simulates a batch of accesses of a session. Every address is checked first, so a batch with an address
+        that doesn't fit in the address space is refused as a whole
+
+        @param  body   : the session name and the ACCESS_RECORDs, see SimulationServer
+
+        @return one ACCESS_RESULT per access
+        """
+
+        end     = 1 + body[0]
+        session = self.session(bytes(body[1:end]).decode())
+        records = body[end:]
+        if len(records) % ACCESS_RECORD.size: raise ValueError("the batch isn't made of whole access records")
+        if len(records) > SimulationServer.maxAccesses * ACCESS_RECORD.size:
+            raise ValueError(f"a batch holds at most {SimulationServer.maxAccesses} accesses")
+
+        for number, (_, address, _) in enumerate(ACCESS_RECORD.iter_unpack(records)):
+            if address >= session.ram.size:
+                raise ValueError(f"the address {address:x} of access {number} doesn't fit in {session.ram.addrBits} bits, nothing was simulated")
+
+        r, c        = session.ram, session.cache
+        load, store = c.load, c.store
+        results     = bytearray(len(records) // ACCESS_RECORD.size * ACCESS_RESULT.size)
+        i           = 0
+
+        for op, address, byte in ACCESS_RECORD.iter_unpack(records):
+            if op:
+                setNum, tag, lineIndex, vicNum, data = store(address, byte, r)
+            else:
+                setNum, tag, offNum, lineIndex, vicNum = load(address, r)
+                data = c.get_block(setNum * c.assoc + (vicNum if lineIndex == -1 else lineIndex), offNum)
+
+            results[i]     = lineIndex != -1
+            results[i + 1] = data
+            i += 2
+
+        session.accesses += i // 2
+        return bytes(results)
+
+    def request(self, opcode: int, request: dict) -> dict:
+        """
+        Carries out a JSON request, see SimulationServer
+
+        @param  opcode  : the kind of request
+        @param  request : the body of the request
+
+        @return the body of the answer
+        """
+
+        if opcode == SimulationServer.OPEN: return self.open(request)
+        if opcode == SimulationServer.LIST: return {"sessions": list(self.sessions)}
+
+        session = self.session(request.get("session"))
+
+        if opcode == SimulationServer.VIEW:
+            text = io.StringIO()
+            with contextlib.redirect_stdout(text):
+                if request.get("memory"): session.ram.view()
+                else:                     session.cache.view()
+            return {"output": text.getvalue().splitlines()}
+
+        if opcode == SimulationServer.FLUSH:
+            session.cache.flush()
+            return {}
+
+        if opcode == SimulationServer.STATS:
+            return session.stats()
+
+        if opcode == SimulationServer.CLOSE:
+            del self.sessions[request["session"]]
+            return {}
+
+        raise ValueError(f"unknown opcode {opcode}")
+
+    def open(self, request: dict) -> dict:
+        """
+        Creates a session. Its cache has its own random number generator (seed 0 by default), so sessions
+        don't change each other's results
+
+        @param  request : the name of the session along with the parameters of its Cache (cacheSize, blockSize,
+                          assoc, repPolicy, hitPolicy, misPolicy, prefetch), its addrBits, ramRange and seed
+
+        @return the geometry of the cache
+        """
+
+        name = request.get("session")
+        if not isinstance(name, str) or not 0 < len(name.encode()) < 256: raise ValueError("a session needs a name of 1 to 255 bytes")
+        if name in self.sessions:                                          raise ValueError(f"the session {name} already exists")
+
+        addrBits = request.get("addrBits", self.addrBits)
+        config   = dict(cacheSize = 32, blockSize = 8, assoc = 4)
+        config.update({key: request[key] for key in ("cacheSize", "blockSize", "assoc", "repPolicy", "hitPolicy", "misPolicy", "prefetch")
+                       if key in request})
+        check_config(addrBits, **config)
+
+        ramRange = request.get("ramRange")
+        ram      = RAM(self.ramfile, debug = ramRange is None, addrBits = addrBits, initRange = tuple(ramRange) if ramRange else None)
+        cache    = Cache(addrBits = addrBits, seed = request.get("seed", 0), **config)
+
+        self.sessions[name] = Session(ram, cache)
+        return {"sets": cache.set, "offset_bits": cache.offset_bit, "index_bits": cache.index_bit, "tag_bits": cache.tag_bit}
+
+class SimulationClient:
+    """
+    Talks to a SimulationServer. Requests can be sent ahead with send() and send_access(), and their answers
+    read later with receive(), in the same order.
+    """
+
+    def __init__(self, address: str):
+        """
+        Connects to a server
+
+        @param  address : host:port of a TCP server, anything else is the path of a Unix socket
+
+        @return the SimulationClient object
+        """
+
+        import socket                                                                   # only imported by clients
+
+        host, _, port = address.rpartition(":")
+        if port.isdigit():
+            self.sock = socket.create_connection((host or "127.0.0.1", int(port)))
+        else:
+            self.sock = socket.socket(socket.AF_UNIX)
+            self.sock.connect(address)
+
+        self.file = self.sock.makefile('rwb', buffering = TRACE_BUFFER)
+
+    def send(self, opcode: int, **request):
+        """
+        Sends a JSON request without waiting for its answer
+
+        @param  opcode  : the kind of request, see SimulationServer
+        @param  request : the body of the request
+
+        @return no return value
+        """
+
+        body = json.dumps(request).encode()
+        self.file.write(FRAME_HEADER.pack(len(body) + 1) + bytes((opcode,)) + body)
+
+    def send_access(self, session: str, records):
+        """
+        Sends a batch of accesses without waiting for its answer
+
+        @param  session : the name of the session
+        @param  records : an iterable of (op, address, byte) tuples, op is 0 for reads and 1 for writes
+
+        @return no return value
+        """
+
+        name = session.encode()
+        body = bytearray((SimulationServer.ACCESS, len(name))) + name
+        for record in records: body += ACCESS_RECORD.pack(*record)
+
+        self.file.write(FRAME_HEADER.pack(len(body)) + body)
+
+    def receive(self) -> bytes:
+        """
+        Reads the answer of the oldest request that wasn't answered yet
+
+        @param  there are no parameters except the reference to itself
+
+        @return the body of the answer, a RuntimeError is raised with the message of a request that failed
+        """
+
+        self.file.flush()
+        header = self.file.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size: raise ConnectionError("the server closed the connection")
+
+        reply = self.file.read(FRAME_HEADER.unpack(header)[0])
+        if reply[0]: raise RuntimeError(json.loads(reply[1:])["error"])
+        return reply[1:]
+
+    def request(self, opcode: int, **request) -> dict:
+        """
+        Sends a JSON request and waits for its answer, see SimulationServer
+
+        @return the body of the answer
+        """
+
+        self.send(opcode, **request)
+        return json.loads(self.receive())
+
+    def access(self, session: str, records) -> list:
+        """
+        Sends accesses and waits for their results, in batches of SimulationServer.maxAccesses one after the
+        other. When a batch fails, the RuntimeError tells how many accesses before it were simulated
+
+        @return a list of (hit, byte) tuples, one per access
+        """
+
+        records = list(records)
+        results = list()
+        step    = SimulationServer.maxAccesses
+
+        for start in range(0, max(len(records), 1), step):
+            self.send_access(session, records[start : start + step])
+            try:
+                results += ACCESS_RESULT.iter_unpack(self.receive())
+            except RuntimeError as error:
+                raise RuntimeError(f"{error}, {start} accesses were simulated before this batch") from None
+
+        return results
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+TRACE_BUFFER = 1 << 20   # bytes read from a trace file at a time
+
+def open_trace(tracefile: str, mode: str = "rb"):
+    """
+    Opens a trace file as a buffered binary stream, decompressing it on the fly when its extension is
+    .gz, .bz2, .xz, .zst or .lz4
+
+    @param  tracefile : the trace file
+    @param  mode      : "rb" to read the trace, "wb" to create it
+
+    @return the binary file object
+    """
+
+    ext = os.path.splitext(tracefile)[1].lower()
+
+    if   ext == ".gz" : file = gzip.open(tracefile, mode)
+    elif ext == ".bz2": file = bz2.open(tracefile, mode)
+    elif ext == ".xz" : file = lzma.open(tracefile, mode)
+    elif ext == ".zst":
+        if zstandard is None: raise RuntimeError(".zst traces need the zstandard package")
+        file = zstandard.open(tracefile, mode)
+    elif ext == ".lz4":
+        if lz4 is None: raise RuntimeError(".lz4 traces need the lz4 package")
+        file = lz4.frame.open(tracefile, mode)
+    else:
+        return open(tracefile, mode, buffering = TRACE_BUFFER)
+
+    if mode == "rb": return io.BufferedReader(file, TRACE_BUFFER)
+    return io.BufferedWriter(file, TRACE_BUFFER)
+
+def trace_records(tracefile: str):
+    """
+    Streams the records of a trace file, one buffer in memory at a time. The trace can be compressed (see
+    open_trace()) and be either a binary trace (see write_trace()) or text, one record per line:
+        "R <address>" and "W <address> <byte>" lines
+        "cache-read <address>" and "cache-write <address> <byte>" lines, as typed into simulate()
+
+    @param  tracefile : the trace file, blank lines, lines starting with '#' and the view/dump/quit commands are skipped,
+                        a cache-flush is skipped with a warning
+
+    @return a generator of (op, address, byte) tuples, op is 0 for reads and 1 for writes, byte is 0 for reads
+    """
+
+    with open_trace(tracefile) as file:
+        if file.peek(len(DECODED_MAGIC))[:len(DECODED_MAGIC)] == DECODED_MAGIC:
+            for ops, addrs, values in trace_chunks(file):
+                yield from zip(ops, addrs.cast('Q'), values)
+            return
+
+        yield from text_records(enumerate(io.TextIOWrapper(file), 1), tracefile)
+
+def command_records(commandfile: str):
+    """
+    Streams the accesses of a session of commands typed into simulate(), for example the input redirected
+    into the program. The lines that answer the RAM and cache prompts are skipped.
+
+    @param  commandfile : the file of commands, can be compressed (see open_trace())
+
+    @return a generator of (op, address, byte) tuples, see trace_records()
+    """
+
+    with open_trace(commandfile) as file:
+        lines = enumerate(io.TextIOWrapper(file), 1)
+        yield from text_records(((lineNum, line) for lineNum, line in lines if line.startswith(SIMULATE_COMMANDS)), commandfile)
+
+SIMULATE_COMMANDS = ("cache-", "memory-", "quit")
+
+def text_records(lines, tracefile: str):
+    """
+    Parses the records of a text trace
+
+    @param  lines     : an iterable of (line number, line) tuples
+    @param  tracefile : the name of the trace, for the error messages
+
+    @return a generator of (op, address, byte) tuples, see trace_records()
+    """
+
+    for lineNum, line in lines:
+        record = line.split()
+        if not record or record[0][0] == "#": continue
+
+        op = record[0]
+        if   op == "R" or op == "r" or op == "cache-read" : yield 0, int(record[1], 16), 0
+        elif op == "W" or op == "w" or op == "cache-write": yield 1, int(record[1], 16), int(record[2], 16)
+        elif op in ("cache-view", "memory-view", "cache-dump", "memory-dump", "quit"): continue
+        elif op == "cache-flush":                                                       # a trace has no way to record it
+            print(f"{tracefile}:{lineNum}: cache-flush skipped, the accesses after it find the lines still cached", file = sys.stderr)
+        else:
+            raise ValueError(f"{tracefile}:{lineNum}: invalid trace record '{line.strip()}'")
+
+def replay(r: RAM, c: Cache, tracefile: str) -> dict:
+    """
+    Function driving a non-interactive simulation of the cache. Streams a trace file of "R <address>" and
+    "W <address> <byte>" records through the cache without printing anything per access.
+
+    @param  r         : the RAM that would be manipulated
+    @param  c         : the Cache that would be manipulated
+    @param  tracefile : the trace file, one record per line, blank lines and lines starting with '#' are skipped
+
+    @return the aggregate statistics of the cache after the trace, see Cache.stats()
+    """
+
+    return replay_records(r, c, trace_records(tracefile))
+
+def replay_records(r: RAM, c: Cache, records) -> dict:
+    """
+    Feeds (op, address, byte) records through the cache without printing anything per access
+
+    @param  r         : the RAM that would be manipulated
+    @param  c         : the Cache that would be manipulated
+    @param  records   : an iterable of (op, address, byte) tuples, op is 0 for reads and 1 for writes
+
+    @return the aggregate statistics of the cache after the records, see Cache.stats()
+    """
+
+    if isinstance(c, Cache) and c.tagsOnly and c.prefetcher is None and c.listeners is None and c.above is None:
+        return tags_replay(r, c, records)
+
+    load  = c.load
+    store = c.store
+    reads = writes = 0
+
+    for op, address, byte in records:
+        if op:
+            store(address, byte, r)
+            writes += 1
+        else:
+            load(address, r)
+            reads += 1
+
+    stats = c.stats()
+    stats["reads"]  = reads
+    stats["writes"] = writes
+    stats["ram_bytes_read"]    = r.bytesRead
+    stats["ram_bytes_written"] = r.bytesWritten
+    return stats
+
+def tags_replay(r: RAM, c: Cache, records) -> dict:
+    """
+    Feeds (op, address, byte) records through a cache that only keeps tags, with the whole access done inline
+    in one loop instead of through Cache.load() and Cache.store(). The cache ends up in the same state with
+    the same statistics, and the RAM with the same traffic. Used by replay_records() for a lone tags-only
+    cache without a prefetcher or listeners.
+
+    @param  r         : the RAM that only counts the traffic
+    @param  c         : the Cache that would be manipulated, see Cache.tagsOnly
+
+    @return the aggregate statistics of the cache after the records, see Cache.stats()
+    """
+
+    tags, valid, dirty  = c.tags, c.validBits, c.dirtyBits
+    lineOf              = c.lineOf
+    index, find         = tags.index, valid.find
+    touch, fill, victim = c.replacer.touch, c.replacer.fill, c.replacer.victim
+    assoc, indexBit     = c.assoc, c.index_bit
+    offsetBit, setMask  = c.offset_bit, c.setMask
+    tagShift            = c.tagShift
+    writeThrough        = c.hitPolicy == 1
+    allocate            = c.misPolicy == 1
+
+    readHit = readMis = writeHit = writeMis = evicts = writeBacks = writeThroughs = 0
+
+    for op, address, byte in records:
+        setNum = (address >> offsetBit) & setMask
+        tag    = address >> tagShift
+        first  = setNum * assoc
+
+        if lineOf is not None:
+            line = lineOf.get((tag << indexBit) | setNum, -1)
+        else:
+            try:
+                line = index(tag, first, first + assoc)
+            except ValueError:
+                line = -1
+
+        if line != -1:                                                                  # hit
+            if not op:
+                readHit += 1
+            else:
+                writeHit += 1
+                if writeThrough: writeThroughs += 1
+                else:            dirty[line] = 1
+            touch(line)
+            continue
+
+        empty = find(0, first, first + assoc)                                           # miss, the victim is picked either way
+        line  = empty if empty != -1 else first + victim(setNum)
+
+        if op:
+            writeMis += 1
+            if not allocate:
+                writeThroughs += 1
+                continue
+        else:
+            readMis += 1
+
+        if valid[line]:
+            evicts += 1
+            if dirty[line]: writeBacks += 1
+            if lineOf is not None: del lineOf[(tags[line] << indexBit) | setNum]
+
+        if lineOf is not None: lineOf[(tag << indexBit) | setNum] = line
+        tags[line]  = tag
+        valid[line] = 1
+        dirty[line] = op                                                                # write-allocate leaves the line dirty
+        fill(line)
+
+    hits   = readHit + writeHit
+    misses = readMis + writeMis
+    fills  = misses - (0 if allocate else writeMis)
+
+    c.numHit            += hits
+    c.numMis            += misses
+    c.numReadHit        += readHit
+    c.numReadMis        += readMis
+    c.numWriteHit       += writeHit
+    c.numWriteMis       += writeMis
+    c.numEvict          += evicts
+    c.numWriteBack      += writeBacks
+    c.numWriteBackBytes += writeBacks * c.blockSize
+    r.bytesRead         += fills * c.blockSize
+    r.numReads          += fills
+    r.bytesWritten      += writeBacks * c.blockSize + writeThroughs
+    r.numWrites         += writeBacks + writeThroughs
+
+    stats = c.stats()
+    stats["reads"]  = readHit + readMis
+    stats["writes"] = writeHit + writeMis
+    stats["ram_bytes_read"]    = r.bytesRead
+    stats["ram_bytes_written"] = r.bytesWritten
+    return stats
+
+def data_mismatches(r: RAM, c: Cache, lines = None) -> list:
+    """
+    Compares the blocks held by the cache with the RAM. A valid line that isn't dirty has to hold exactly what
+    the RAM holds at its address, so under write-through every clean line is checked against the RAM.
+
+    @param  r         : the RAM behind the cache
+    @param  c         : the Cache keeping the blocks, not a tags-only one
+    @param  lines     : optional indexes of the lines being checked, every line by default
+
+    @return one dictionary per line that differs from the RAM, empty when the cache is consistent
+    """
+
+    mismatches = list()
+
+    for line in range(len(c.tags)) if lines is None else lines:
+        if not c.validBits[line] or c.dirtyBits[line]: continue
+
+        address = c.block_address(line)
+        blocks  = bytes(c.get_blocks(line))
+        stored  = r.read_bytes(address, c.blockSize)
+        if blocks == stored: continue
+
+        mismatches.append(dict(line = line, set = line // c.assoc, way = line % c.assoc, address = f"{address:x}",
+                               cache = blocks.hex(), ram = stored.hex()))
+
+    return mismatches
+
+def checked_replay(r: RAM, c: Cache, records) -> tuple:
+    """
+    Feeds (op, address, byte) records through the cache like replay_records(), checking the line of every
+    access against the RAM right after it, and every line once at the end, see data_mismatches()
+
+    @param  r         : the RAM behind the cache
+    @param  c         : the Cache being checked, not a tags-only one
+
+    @return stats      : the aggregate statistics of the cache after the records
+    @return mismatches : the lines that differed from the RAM, with the number of the access that left them so
+    """
+
+    if c.tagsOnly: raise ValueError("a tags-only cache has no data to check")
+
+    mismatches = list()
+    reads = writes = 0
+
+    for op, address, byte in records:
+        if op:
+            setNum, _, lineIndex, vicNum, _ = c.store(address, byte, r)
+            writes += 1
+        else:
+            setNum, _, _, lineIndex, vicNum = c.load(address, r)
+            reads += 1
+
+        line = setNum * c.assoc + (lineIndex if lineIndex != -1 else vicNum)
+        for mismatch in data_mismatches(r, c, (line,)):
+            mismatch["access"] = reads + writes
+            mismatches.append(mismatch)
+
+    for mismatch in data_mismatches(r, c):
+        mismatch["access"] = reads + writes
+        mismatches.append(mismatch)
+
+    stats = c.stats()
+    stats["reads"]  = reads
+    stats["writes"] = writes
+    stats["ram_bytes_read"]    = r.bytesRead
+    stats["ram_bytes_written"] = r.bytesWritten
+    return stats, mismatches
+
+def sampled_replay(r: RAM, c: Cache, records, setStep: int = 1, period: int = 0, window: int = 0, warmup: int = 0) -> dict:
+    """
+    Estimates the statistics of a trace while simulating only part of it. Set sampling simulates the accesses
+    to one set in every setStep and skips the others. Time sampling splits the trace into periods and only
+    simulates the end of each one: warmup accesses that bring the cache back up to date without being
+    counted, then a window of measured accesses. Both can be combined.
+
+    The hit rate is estimated from the measured accesses, and its 95% confidence interval from how much it
+    varies between the sampled sets, or between the windows when time sampling. The counts are extrapolated
+    to the whole trace. Skipped writes never reach the RAM, so only the statistics are meaningful.
+
+    @param  r         : the RAM that would be manipulated
+    @param  c         : the Cache that would be manipulated
+    @param  records   : an iterable of (op, address, byte) tuples, op is 0 for reads and 1 for writes
+    @param  setStep   : optional, only one in every setStep sets is simulated
+    @param  period    : optional length of a time sampling period in accesses, 0 measures every access
+    @param  window    : the measured accesses at the end of each period
+    @param  warmup    : the accesses simulated without being counted before each window
+
+    @return the estimated statistics of the trace, the hit rate along with its confidence interval
+    """
+
+    if setStep < 1:                           raise ValueError("the set step has to be at least 1")
+    if period and (window < 1 or warmup < 0): raise ValueError("time sampling needs a window of at least 1 access and no negative warm-up")
+    if period and window + warmup > period:   raise ValueError("the warm-up and the window don't fit in a period")
+
+    load      = c.load
+    store     = c.store
+    offsetBit = c.offset_bit
+    setMask   = c.setMask
+    skip      = period - window - warmup                            # accesses skipped at the start of each period
+    measure   = period - window                                     # first measured access of each period
+    units     = dict()                                              # set, or window, -> [hits, accesses] measured
+    total     = reads = writes = 0
+
+    for op, address, byte in records:
+        periodNum, position = divmod(total, period) if period else (0, measure)
+        total += 1
+        if op: writes += 1
+        else:  reads  += 1
+
+        if position < skip: continue
+        setNum = (address >> offsetBit) & setMask
+        if setNum % setStep: continue
+
+        if position < measure:
+            if op: store(address, byte, r)
+            else:  load(address, r)
+            continue
+
+        hits = c.numHit
+        if op: store(address, byte, r)
+        else:  load(address, r)
+
+        key  = (periodNum, setNum) if setStep > 1 else periodNum
+        unit = units.get(key)
+        if unit is None: unit = units[key] = [0, 0]
+        unit[0] += c.numHit - hits
+        unit[1] += 1
+
+    population     = (total // window if period else 1) * (c.set if setStep > 1 else 1)  # units the samples were taken from
+    rate, interval = ratio_interval(list(units.values()), population)
+    sampled        = sum(accesses for _, accesses in units.values())
+
+    return {
+        "accesses"          : total,
+        "reads"             : reads,
+        "writes"            : writes,
+        "sampled_accesses"  : sampled,
+        "sample_fraction"   : sampled / total if total else 0.0,
+        "samples"           : len(units),
+        "hits"              : round(rate * total),
+        "misses"            : total - round(rate * total),
+        "hit_rate"          : rate,
+        "hit_rate_low"      : max(rate - interval, 0.0),
+        "hit_rate_high"     : min(rate + interval, 1.0),
+    }
+
+def ratio_interval(units: list, population: int, z: float = 1.96) -> tuple:
+    """
+    Estimates a hit rate from sampled units of accesses, sets or windows of the trace, with the ratio estimator
+    of cluster sampling
+
+    @param  units      : a list of [hits, accesses] of every sampled unit
+    @param  population : the number of units the samples were taken from, for the finite population correction
+    @param  z          : optional z-score of the interval, 1.96 for 95% confidence
+
+    @return a (hit rate, half width of its confidence interval) tuple, the half width is infinite with less than 2 units
+    """
+
+    n        = len(units)
+    hits     = sum(h for h, _ in units)
+    accesses = sum(a for _, a in units)
+    if not accesses: return 0.0, float("inf")
+
+    rate = hits / accesses
+    if n < 2: return rate, float("inf")
+
+    mean     = accesses / n
+    spread   = sum((h - rate * a) ** 2 for h, a in units) / (n - 1)
+    variance = max(1 - n / population, 0.0) * spread / (n * mean * mean)
+
+    return rate, z * variance ** 0.5
+
+CHECKPOINT_MAGIC = b"CSIMCKP1"
+CHECKPOINT_FULL  = 1 << 63      # set in the page count of a record that holds every page instead of building on the records before it
+
+def save_checkpoint(checkpointfile: str, sim, ram: RAM) -> int:
+    """
+    Saves the complete state of a simulation: every line of the cache with its tag, valid, dirty and replacement
+    information, the statistics, the random generator and the RAM. The file is the magic bytes followed by
+    one record per checkpoint, each being the length of the pickled state (8 bytes), the pickled state, the
+    number of pages (8 bytes, CHECKPOINT_FULL is set when the record holds every page) and every page as its
+    number (8 bytes) and registers.
+    Saving again to the same file appends a record with only the RAM pages written to since the last one, as long
+    as nothing else was appended to the file in between. Any other save to an existing checkpoint file, such as a
+    simulation forked from an earlier record, appends a record with every page, so the file is never truncated.
+
+    @param  checkpointfile : the checkpoint file
+    @param  sim            : the Cache, Hierarchy or MultiCore being saved, along with the RAM behind it
+    @param  ram            : the RAM of the simulation
+
+    @return the number of the record that was written, see load_checkpoint()
+    """
+
+    state = pickle.dumps((sim, ram, getstate()), protocol = pickle.HIGHEST_PROTOCOL)
+
+    existing    = os.path.exists(checkpointfile) and os.path.getsize(checkpointfile) > 0
+    incremental = existing and ram.checkpoint is not None and os.path.abspath(ram.checkpoint) == os.path.abspath(checkpointfile) \
+                  and os.path.getsize(checkpointfile) == ram.checkpointSize
+    pages       = ram.checkpointPages if incremental else ram.pages.keys()
+
+    if existing:
+        records = ram.checkpointRecords if incremental else checkpoint_records(checkpointfile)
+
+    with open(checkpointfile, 'ab' if existing else 'wb') as file:
+        if not existing: file.write(CHECKPOINT_MAGIC)
+
+        file.write(len(state).to_bytes(8, "little"))
+        file.write(state)
+        file.write((len(pages) | (0 if incremental else CHECKPOINT_FULL)).to_bytes(8, "little"))
+        for pageNum in sorted(pages):
+            file.write(pageNum.to_bytes(8, "little"))
+            file.write(ram.pages[pageNum])
+
+        records = records + 1 if existing else 1
+        size    = file.tell()
+
+    ram.checkpoint        = checkpointfile
+    ram.checkpointRecords = records
+    ram.checkpointSize    = size
+    ram.checkpointPages.clear()
+    return records - 1
+
+def checkpoint_records(checkpointfile: str) -> int:
+    """
+    Counts the records of a checkpoint file without unpickling them
+
+    @param  checkpointfile : the checkpoint file
+
+    @return the number of checkpoints in the file, a ValueError is raised when it isn't a checkpoint file
+    """
+
+    records = 0
+
+    with open(checkpointfile, 'rb') as file:
+        if file.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC: raise ValueError(f"{checkpointfile} is not a checkpoint file")
+
+        while True:
+            header = file.read(8)
+            if not header: break
+
+            file.seek(int.from_bytes(header, "little"), os.SEEK_CUR)
+            count = int.from_bytes(file.read(8), "little") & ~CHECKPOINT_FULL
+            file.seek(count * (8 + RAM.pageSize), os.SEEK_CUR)
+            records += 1
+
+    return records
+
+def load_checkpoint(checkpointfile: str, record: int = -1):
+    """
+    Restores a simulation saved by save_checkpoint(). Every call returns new objects, so several
+    continuations can be forked from the same checkpoint.
+
+    @param  checkpointfile : the checkpoint file
+    @param  record         : optional number of the checkpoint inside the file, the last one by default
+
+    @return sim            : the restored Cache, Hierarchy or MultiCore
+    @return ram            : the restored RAM
+    """
+
+    pages = dict()
+    state = None
+
+    with open(checkpointfile, 'rb') as file:
+        if file.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC: raise ValueError(f"{checkpointfile} is not a checkpoint file")
+
+        records = 0
+        while record < 0 or records <= record:
+            header = file.read(8)
+            if not header: break
+
+            state = file.read(int.from_bytes(header, "little"))
+            count = int.from_bytes(file.read(8), "little")
+            if count & CHECKPOINT_FULL: pages.clear()                                  # a full record doesn't build on the ones before it
+            for _ in range(count & ~CHECKPOINT_FULL):
+                pageNum        = int.from_bytes(file.read(8), "little")
+                pages[pageNum] = bytearray(file.read(RAM.pageSize))
+            records += 1
+        size = file.tell()
+
+    if state is None or record >= records: raise ValueError(f"{checkpointfile} has no checkpoint {record}")
+
+    sim, ram, randomState = pickle.loads(state)
+    ram.pages.update(pages)
+    setstate(randomState)
+
+    ram.checkpoint        = checkpointfile if record < 0 else None      # only the last checkpoint can be extended
+    ram.checkpointRecords = records
+    ram.checkpointSize    = size
+    return sim, ram
+
+FAST_MIN_SPREAD = 8     # fast_reads() gives up on LRU batches where one set gets more than 1/8 of the accesses
+FAST_MIN_RUN    = 256   # fast_replay() simulates shorter runs of reads between two writes one access at a time
+
+def load_numpy():
+    """
+    Imports numpy the first time the vectorized fast path needs it, so starting the simulator doesn't wait for it
+
+    @param  there are no parameters
+
+    @return the numpy module, or None when numpy isn't installed
+    """
+
+    global numpy
+
+    if numpy is None:
+        try:
+            import numpy as module
+        except ImportError:
+            return None
+        numpy = module
+
+    return numpy
+
+def fast_path_ok(c: Cache) -> bool:
+    """
+    Checks if the vectorized fast path can simulate reads on a cache: numpy has to be installed, the cache
+    has to be direct-mapped or use least recently used replacement, and it can't hold dirty lines, prefetch,
+    have listeners or only keep tags
+
+    @param  c         : the Cache being checked
+
+    @return True when fast_reads() can be used
+    """
+
+    return load_numpy() is not None and (c.assoc == 1 or c.repPolicy == 2) and c.dirtyBits.count(1) == 0 and c.prefetcher is None \
+           and c.listeners is None and not c.tagsOnly
+
+def fast_reads(r: RAM, c: Cache, addresses) -> bool:
+    """
+    Simulates a batch of reads with numpy instead of one Cache.load() call per access. The addresses are
+    decoded into blocks and sets in one shot using the same bit split as Cache.addressBits, and grouped
+    by set. Direct-mapped caches compare every access with the previous one of its set. LRU caches step
+    through the k-th access of every set at once, keeping each set's blocks in recency order along with the
+    way each of them sits in. A miss takes the way of the least recently used entry, which is where
+    Cache.get_victum() puts it as long as the empty lines of a set are at the least recently used end, lowest
+    way last, as they always are unless lines were invalidated. The cache's counters, lines, ways and
+    replacement order end up exactly as Cache.load() would have left them.
+
+    @param  r         : the RAM the cache reads from
+    @param  c         : the Cache being simulated, see fast_path_ok()
+    @param  addresses : the addresses being read, any integer sequence or numpy array
+
+    @return False without simulating anything when the batch is too skewed towards few sets to gain from it,
+            or when the empty lines of a set aren't where Cache.get_victum() would fill them in order
+    """
+
+    load_numpy()
+    A = c.assoc
+    blocks = numpy.asarray(addresses, dtype = numpy.uint64) >> numpy.uint64(c.offset_bit)
+    blocks = blocks.astype(numpy.int64)
+    sets   = blocks & c.setMask
+    n      = len(blocks)
+    if n == 0: return True
+
+    order   = numpy.argsort(sets, kind = "stable")
+    sBlocks = blocks[order]
+    counts  = numpy.bincount(sets, minlength = c.set)
+    starts  = numpy.cumsum(counts) - counts
+    touched = numpy.nonzero(counts)[0]
+
+    if A > 1 and counts.max() * FAST_MIN_SPREAD > n: return False                      # one step per access of the busiest set
+
+    state = numpy.full((len(touched), A), -1, dtype = numpy.int64)                     # blocks of each touched set, most recent first
+    slots = numpy.empty((len(touched), A), dtype = numpy.int64)                         # and the lines they sit in
+    for row, setNum in enumerate(touched.tolist()):
+        lines = recency_order(c, setNum)
+        empty = [line for line in lines if not c.validBits[line]]
+        if empty != sorted(empty, reverse = True) or any(c.validBits[line] for line in lines[len(lines) - len(empty):]): return False
+
+        slots[row] = lines
+        for col, line in enumerate(lines):
+            if c.validBits[line]: state[row, col] = (c.tags[line] << c.index_bit) | setNum
+
+    if A == 1:
+        previous = numpy.empty(n, dtype = numpy.int64)
+        previous[1:] = sBlocks[:-1]
+        previous[starts[touched]] = state[:, 0]
+
+        hit    = previous == sBlocks
+        hits   = int(hit.sum())
+        evicts = int((~hit & (previous != -1)).sum())
+        state[:, 0] = sBlocks[starts[touched] + counts[touched] - 1]
+
+    else:
+        byCount = numpy.argsort(-counts[touched], kind = "stable")                      # the sets still going at step k are a prefix
+        state   = state[byCount]
+        slots   = slots[byCount]
+        touched = touched[byCount]
+        base    = starts[touched]
+        active  = numpy.searchsorted(-counts[touched], -numpy.arange(counts.max()), side = "left")
+        cols    = numpy.arange(A)
+        hits    = evicts = 0
+
+        for k, m in enumerate(active.tolist()):
+            rows = state[:m]
+            b    = sBlocks[base[:m] + k]
+            eq   = rows == b[:, None]
+            hit  = eq.any(axis = 1)
+            pos  = numpy.where(hit, eq.argmax(axis = 1), A - 1)
+
+            hits   += int(hit.sum())
+            evicts += int((~hit & (rows[:, A - 1] != -1)).sum())
+
+            shifted = numpy.empty_like(rows)                                            # move the block to the front
+            shifted[:, 1:] = rows[:, :-1]
+            shifted[:, 0]  = b
+            front     = cols[None, :] <= pos[:, None]
+            state[:m] = numpy.where(front, shifted, rows)
+
+            ways = slots[:m]                                                            # along with its line, a miss takes the last one
+            shifted[:, 1:] = ways[:, :-1]
+            shifted[:, 0]  = ways[numpy.arange(m), pos]
+            slots[:m] = numpy.where(front, shifted, ways)
+
+    misses = n - hits
+    c.numHit     += hits
+    c.numMis     += misses
+    c.numReadHit += hits
+    c.numReadMis += misses
+    c.numEvict   += evicts
+    r.bytesRead  += misses * c.blockSize
+    r.numReads   += misses
+
+    for row, setNum in enumerate(touched.tolist()):                                     # write the final state back into the cache
+        final   = [(b, line) for b, line in zip(state[row].tolist(), slots[row].tolist()) if b != -1]
+        changed = [(b, line) for b, line in final if not c.validBits[line] or (c.tags[line] << c.index_bit) | setNum != b]
+
+        for b, line in changed:                                                         # a block may have moved to another line,
+            if c.lineOf is not None and c.validBits[line]:                              # so forget the old blocks before filling
+                del c.lineOf[(c.tags[line] << c.index_bit) | setNum]
+            c.validBits[line] = 0
+
+        for b, line in changed: c.fill(line, b >> c.index_bit, r.read_bytes(b << c.offset_bit, c.blockSize))
+        for b, line in reversed(final): c.replacer.touch(line)
+
+    return True
+
+def recency_order(c: Cache, setNum: int) -> list:
+    """
+    Lists the lines of a set from the most to the least recently used one
+
+    @param  c         : the Cache being looked at
+    @param  setNum    : the set being listed
+
+    @return the line indices, just the lines in order for a direct-mapped cache
+    """
+
+    if c.assoc == 1: return [setNum]
+
+    order = list()
+    line  = c.replacer.tail[setNum]
+    while line != -1:
+        order.append(line)
+        line = c.replacer.prev[line]
+
+    return order
+
+def fast_replay(r: RAM, c: Cache, tracefile: str, batch: int = 1 << 22) -> dict:
+    """
+    Replays a trace like replay(), simulating the runs of reads between two writes with fast_reads() whenever
+    the cache allows it and falling back to Cache.load()/Cache.store() for the rest. A run can span chunks of
+    the decoded trace, and runs shorter than FAST_MIN_RUN aren't worth a batch.
+
+    @param  r         : the RAM that would be manipulated
+    @param  c         : the Cache that would be manipulated
+    @param  tracefile : the trace being replayed
+    @param  batch     : optional number of reads simulated per fast_reads() call
+
+    @return the aggregate statistics of the cache after the trace, see Cache.stats(), along with fast_reads,
+            the number of reads that took the fast path
+    """
+
+    load_numpy()
+    mapped = mappable_trace(tracefile)                                                  # binary traces are read in place
+    if mapped: decodedfile = tracefile
+    else:
+        fd, decodedfile = tempfile.mkstemp(suffix = ".trace")
+        os.close(fd)
+
+    reads = writes = fastReads = 0
+    pending = list()
+
+    def flush_reads():
+        nonlocal fastReads
+        addresses = numpy.concatenate(pending) if len(pending) > 1 else pending[0]
+        pending.clear()
+        if len(addresses) >= FAST_MIN_RUN and fast_path_ok(c) and fast_reads(r, c, addresses):
+            fastReads += len(addresses)
+        else:
+            for address in addresses.tolist(): c.load(address, r)
+
+    try:
+        if not mapped: decode_trace(tracefile, decodedfile)
+        with open(decodedfile, 'rb') as file, mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as image:
+            chunks = decoded_chunks(image)
+            try:
+                for ops, addrs, values in chunks:
+                    if numpy is None:
+                        for op, address, byte in zip(ops, addrs.cast('Q'), values):
+                            if op: c.store(address, byte, r)
+                            else:  c.load(address, r)
+                        writes += sum(ops)
+                        reads  += len(ops) - sum(ops)
+                        continue
+
+                    addrArray = numpy.frombuffer(addrs, dtype = "<u8")
+                    stores    = numpy.flatnonzero(numpy.frombuffer(ops, dtype = numpy.uint8)).tolist()
+                    start     = 0
+
+                    for write in stores:                                                # the reads before a write go first
+                        if write > start: pending.append(addrArray[start:write])
+                        if pending: flush_reads()
+                        c.store(int(addrArray[write]), values[write], r)
+                        start = write + 1
+
+                    if start < len(ops): pending.append(addrArray[start:])
+                    if sum(len(p) for p in pending) >= batch: flush_reads()
+                    writes += len(stores)
+                    reads  += len(ops) - len(stores)
+
+                if pending: flush_reads()
+
+            finally:                                                                    # the image can't be closed while views into it remain
+                chunks.close()
+                pending.clear()
+                ops = addrs = values = addrArray = None
+
+    finally:
+        if not mapped: os.remove(decodedfile)
+
+    stats = c.stats()
+    stats["reads"]  = reads
+    stats["writes"] = writes
+    stats["fast_reads"] = fastReads
+    stats["ram_bytes_read"]    = r.bytesRead
+    stats["ram_bytes_written"] = r.bytesWritten
+    return stats
+
+def fast_path_benchmark(ramfile: str, accesses: int = 10_000_000, sample: int = 500_000, addrBits: int = 32, **config) -> dict:
+    """
+    Measures the speedup of fast_reads() over Cache.load() on a synthetic read-only trace, 80% of it in a
+    hot 256KB region and the rest spread over the whole address space. Both paths simulate the first sample
+    accesses and have to agree, then the fast path simulates the whole trace.
+
+    @param  ramfile   : the file to initialize the RAM with
+    @param  accesses  : optional length of the trace
+    @param  sample    : optional number of accesses simulated by both paths
+    @param  addrBits  : optional width of an address
+    @param  config    : optional Cache parameters, a 64KB 4-way LRU cache with 64 byte blocks by default
+
+    @return the accesses per second of both paths and the speedup
+    """
+
+    if load_numpy() is None: raise RuntimeError("the fast path needs numpy")
+
+    config = dict(dict(cacheSize = 1 << 16, blockSize = 64, assoc = 4, repPolicy = 2), **config)
+    rng    = numpy.random.default_rng(0)
+    hot    = rng.integers(0, 1 << 18, accesses, dtype = numpy.uint64) + numpy.uint64(1 << (addrBits - 1))
+    cold   = rng.integers(0, 1 << addrBits, accesses, dtype = numpy.uint64)
+    trace  = numpy.where(rng.random(accesses) < 0.8, hot, cold)
+
+    caches = list()
+    for fast in (False, True):
+        ram   = RAM(ramfile, debug = True, addrBits = addrBits)
+        cache = Cache(addrBits = addrBits, **config)
+
+        start = perf_counter()
+        if fast: fast_reads(ram, cache, trace[:sample])
+        else:
+            for address in trace[:sample].tolist(): cache.load(address, ram)
+        caches.append((cache.numHit, cache.numMis, perf_counter() - start))
+
+    if caches[0][:2] != caches[1][:2]: raise AssertionError(f"fast path disagrees: {caches[0][:2]} != {caches[1][:2]}")
 
-def hex_to_bin(hexAdd: str) -> str:
+    ram   = RAM(ramfile, debug = True, addrBits = addrBits)
+    cache = Cache(addrBits = addrBits, **config)
+    start = perf_counter()
+    for first in range(0, accesses, 1 << 22): fast_reads(ram, cache, trace[first : first + (1 << 22)])
+    elapsed = perf_counter() - start
+
+    scalarRate = sample / caches[0][2]
+    fastRate   = accesses / elapsed
+    return {"accesses" : accesses, "hit_rate" : cache.numHit / accesses,
+            "scalar_accesses_per_sec" : scalarRate, "fast_accesses_per_sec" : fastRate, "speedup" : fastRate / scalarRate}
+
+DECODED_MAGIC = b"CSIMTRC1"
+DECODED_CHUNK = 1 << 16
+
+def decode_trace(tracefile: str, decodedfile: str) -> int:
     """
-    Function to convert hexadecimal string to binary string
+    Decodes a trace once into a binary file that any number of processes can memory-map
 
-    @param  hexAdd      : Hex address being converted
+    @param  tracefile   : the trace being decoded, see trace_records()
+    @param  decodedfile : the binary file being created, see write_trace()
 
-    @return binNum      : converted binary number without 0b and with zero padding
+    @return the number of records decoded
     """
 
-    binNum = bin(int(hexAdd, 16))
-    binNum = binNum.replace("0b", "")
-    return binNum.zfill(8)
+    return write_trace(trace_records(tracefile), decodedfile)
 
-def bin_to_hex(binAdd: str) -> str:
+def write_trace(records, tracefile: str) -> int:
     """
-    Function to convert binary string to hexadecimal string
+    Writes records into a binary trace, compressed when the extension of the file asks for it (see open_trace()).
+    The file is the magic bytes followed by chunks of up to DECODED_CHUNK records, each chunk being its record
+    count (8 bytes), the addresses (8 bytes each), the ops (1 byte each) and the bytes being written (1 byte each),
+    so every column of a chunk can be used in place through a memoryview or numpy.frombuffer()
 
-    @param  binAdd      : Hex address being converted
+    @param  records     : an iterable of (op, address, byte) tuples, see trace_records()
+    @param  tracefile   : the binary file being created
 
-    @return hexNum      : converted hexadecimal number without 0x and with zero padding
+    @return the number of records written
     """
 
-    binNum = int(binAdd, 2)
-    hexNum = hex(binNum).replace("0x","")
-    return hexNum.zfill(2)
+    total = 0
 
-def simulate(r: RAM, c: Cache):
+    def write_chunk(file, ops, addrs, values):
+        file.write(len(ops).to_bytes(8, "little"))
+        file.write(addrs.tobytes())
+        file.write(ops)
+        file.write(values)
+
+    with open_trace(tracefile, 'wb') as file:
+        file.write(DECODED_MAGIC)
+        ops, addrs, values = bytearray(), array('Q'), bytearray()
+
+        for op, address, byte in records:
+            ops.append(op)
+            addrs.append(address)
+            values.append(byte)
+
+            if len(ops) == DECODED_CHUNK:
+                write_chunk(file, ops, addrs, values)
+                total += len(ops)
+                ops, addrs, values = bytearray(), array('Q'), bytearray()
+
+        if ops:
+            write_chunk(file, ops, addrs, values)
+            total += len(ops)
+
+    return total
+
+def decoded_records(image):
     """
-    Function driving the simulation of the cache. Allows the user to input commands, addresses, and bytes to modify the cache.
+    Reads the records of a decoded trace without copying them
 
-    @param  r      : the RAM that would be manipulated
-    @param  c      : the Cache that would be manipulated
+    @param  image     : the memory-mapped (or otherwise loaded) decoded trace, see decode_trace()
+
+    @return a generator of (op, address, byte) tuples
+    """
 
+    for ops, addrs, values in decoded_chunks(image):
+        yield from zip(ops, addrs.cast('Q'), values)
 
-    @return None, the output of each of the previous functions/methods would be output to the terminal
+def decoded_chunks(image):
     """
+    Reads the chunks of a decoded trace without copying them
 
-    print("*** Cache simulator menu ***")
-    print("type one command:")
-    print("1. cache-read")
-    print("2. cache-write")
-    print("3. cache-flush")
-    print("4. cache-view")
-    print("5. memory-view")
-    print("6. cache-dump")
-    print("7. memory-dump")
-    print("8. quit")
-    print("****************************")
+    @param  image     : the memory-mapped (or otherwise loaded) decoded trace, see decode_trace()
 
-    userIn  = input().replace("0b","")
+    @return a generator of (ops, addresses, bytes) memoryviews, the addresses are 8 little-endian bytes each
+    """
 
-    if userIn == "quit": return
+    view = memoryview(image)
+    if bytes(view[:len(DECODED_MAGIC)]) != DECODED_MAGIC: raise ValueError("not a decoded trace")
 
-    inputLen = len(userIn.split(" "))
+    pos = len(DECODED_MAGIC)
+    while pos < len(view):
+        count = int.from_bytes(view[pos : pos + 8], "little")
+        pos  += 8
+        addrs  = view[pos : pos + 8 * count]
+        pos   += 8 * count
+        ops    = view[pos : pos + count]
+        pos   += count
+        values = view[pos : pos + count]
+        pos   += count
 
-    if   inputLen == 1:
-        command = userIn
-    elif inputLen == 2:
-        command  = userIn.split(" ")[0]
-        address  = userIn.split(" ")[1]
-    elif inputLen == 3:
-        command  = userIn.split(" ")[0]
-        address  = userIn.split(" ")[1]
-        hexByte  = userIn.split(" ")[2]
+        yield ops, addrs, values
 
+def mappable_trace(tracefile: str) -> bool:
+    """
+    Checks whether a trace is an uncompressed binary trace, which can be memory-mapped as it is
+
+    @param  tracefile : the trace file
+
+    @return True when the file starts with the magic bytes of a binary trace
+    """
+
+    with open(tracefile, 'rb') as file:
+        return file.read(len(DECODED_MAGIC)) == DECODED_MAGIC
+
+def trace_chunks(file):
+    """
+    Streams the chunks of a binary trace from a file object, so compressed traces never have to be held in
+    memory. Uncompressed traces can be memory-mapped and read with decoded_chunks() instead.
+
+    @param  file      : the binary trace, opened with open_trace()
+
+    @return a generator of (ops, addresses, bytes) memoryviews into a buffer that is reused for every chunk
+    """
+
+    if file.read(len(DECODED_MAGIC)) != DECODED_MAGIC: raise ValueError("not a decoded trace")
+
+    buffer = bytearray(10 * DECODED_CHUNK)
     while True:
+        header = file.read(8)
+        if not header: return
 
-        if   command == "cache-read":
-            c.read(address, r)
-        elif command == "cache-write":
-            c.write(address, hexByte, r)
-        elif command == "cache-flush":
-            c.flush()
-        elif command == "cache-view":
-            c.view()
-        elif command == "memory-view":
-            r.view()
-        elif command == "cache-dump":
-            c.dump()
-        elif command == "memory-dump":
-            r.dump()
-        else:
-            print("invalid command, try again.")
+        count = int.from_bytes(header, "little")
+        if count > DECODED_CHUNK: buffer = bytearray(10 * count)
 
-        print("*** Cache simulator menu ***")
-        print("type one command:")
-        print("1. cache-read")
-        print("2. cache-write")
-        print("3. cache-flush")
-        print("4. cache-view")
-        print("5. memory-view")
-        print("6. cache-dump")
-        print("7. memory-dump")
-        print("8. quit")
-        print("****************************")
-        
-        userIn  = input()
+        view = memoryview(buffer)[: 10 * count]
+        if file.readinto(view) != len(view): raise ValueError("truncated trace")
 
-        if userIn == "quit": return
+        yield view[8 * count : 9 * count], view[: 8 * count], view[9 * count :]
 
-        inputLen = len(userIn.split(" "))
+WORKLOADS = ("sequential", "strided", "uniform", "zipf", "pointer_chase", "matmul")
 
-        if   inputLen == 1:
-            command  = userIn
-        elif inputLen == 2:
-            command  = userIn.split(" ")[0]
-            address  = userIn.split(" ")[1]
-        elif inputLen == 3:
-            command  = userIn.split(" ")[0]
-            address  = userIn.split(" ")[1]
-            hexByte  = userIn.split(" ")[2]
+def workload_records(name: str, accesses: int, addrBits: int = 32, seed: int = 0):
+    """
+    Generates a deterministic synthetic trace, the same every time for the same parameters
+
+    @param  name      : the pattern, one of WORKLOADS
+                            sequential    : consecutive words, a quarter of them written
+                            strided       : a stride of 1088 bytes, which crosses sets and blocks, a quarter written
+                            uniform       : uniformly random addresses, a quarter written
+                            zipf          : random 64 byte blocks with Zipf popularity, a few blocks take most accesses, a quarter written
+                            pointer_chase : reads following a linked list laid out in random order, one 64 byte node per block
+                            matmul        : the reads and writes of a tiled 64x64 matrix multiplication of 8 byte elements
+    @param  accesses  : the number of records
+    @param  addrBits  : the width of an address, the trace stays inside a 16MB footprint or the whole address space if smaller
+    @param  seed      : the seed of the random patterns
+
+    @return a generator of (op, address, byte) tuples, see trace_records()
+    """
+
+    rng    = Random(seed)
+    span   = min(1 << addrBits, 1 << 24)
+    blocks = max(1, min(span // 64, 1 << 16))
+
+    if name == "sequential":
+        for i in range(accesses): yield int(rng.random() < 0.25), (i * 4) % span, i & 0xFF
+
+    elif name == "strided":
+        for i in range(accesses): yield int(rng.random() < 0.25), (i * 1088) % span, i & 0xFF
+
+    elif name == "uniform":
+        for i in range(accesses): yield int(rng.random() < 0.25), rng.randrange(span), i & 0xFF
+
+    elif name == "zipf":
+        cdf   = list(accumulate(1 / rank for rank in range(1, blocks + 1)))
+        scale = span // 64 or 1
+        for i in range(accesses):
+            rank = bisect(cdf, rng.random() * cdf[-1])
+            yield int(rng.random() < 0.25), ((rank * 2654435761) % scale * 64 + rng.randrange(64)) % span, i & 0xFF
+
+    elif name == "pointer_chase":
+        order = list(range(blocks))
+        rng.shuffle(order)
+        for i in range(accesses): yield 0, (order[i % blocks] * 64) % span, 0
+
+    elif name == "matmul":
+        n, tile = 64, 16
+        a, b, c = 0, n * n * 8, 2 * n * n * 8
+        count   = 0
+        while True:
+            for ii, jj, kk in product(range(0, n, tile), repeat = 3):
+                for i, j in product(range(ii, ii + tile), range(jj, jj + tile)):
+                    for k in range(kk, kk + tile):
+                        for record in ((0, (a + (i * n + k) * 8) % span, 0), (0, (b + (k * n + j) * 8) % span, 0)):
+                            if count == accesses: return
+                            yield record
+                            count += 1
+
+                    if count == accesses: return
+                    yield 1, (c + (i * n + j) * 8) % span, count & 0xFF
+                    count += 1
+
+    else:
+        raise ValueError(f"unknown workload '{name}'")
+
+def benchmark_run(config: dict) -> dict:
+    """
+    Runs one benchmark in a process of its own, so its peak memory use is its own
+
+    @param  config  : the Cache parameters, along with the ramfile, tracefile and addrBits of the run
+
+    @return the throughput, peak RSS and checksum of the run
+    """
+
+    config = dict(config)
+    ramfile, tracefile, addrBits = config.pop("ramfile"), config.pop("tracefile"), config.pop("addrBits")
+
+    ram   = RAM(ramfile, debug = True, addrBits = addrBits)
+    cache = Cache(addrBits = addrBits, seed = 0, **config)                             # random replacement gives the same result every time
+
+    with open(tracefile, 'rb') as file:
+        image = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+
+    start   = perf_counter()
+    stats   = replay_records(ram, cache, decoded_records(image))
+    elapsed = perf_counter() - start
+
+    accesses = stats["reads"] + stats["writes"]
+    return {
+        "accesses_per_sec" : round(accesses / elapsed) if elapsed else 0,
+        "peak_rss_kb"      : resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else 0,
+        "checksum"         : f"{zlib.crc32(bytes(cache.data), zlib.crc32(json.dumps(stats, sort_keys = True).encode())):08x}",
+    }
+
+def benchmark(ramfile: str, accesses: int = 100_000, workers: int = 1, baselinefile: str = None,
+              tolerance: float = 0.25, save: bool = False, addrBits: int = 32) -> list:
+    """
+    Runs every workload generator through every replacement and write policy combination of a 32KB 8-way
+    cache with 64 byte blocks, measuring the accesses per second, the peak RSS and a checksum of the results.
+    Every run gets a process of its own. Compared to a baseline, a run is "changed" when its checksum differs,
+    so its results changed, and "slower" when its throughput dropped by more than the tolerance.
+
+    @param  ramfile      : the file to initialize the RAM with
+    @param  accesses     : the number of accesses of every workload
+    @param  workers      : optional number of runs at a time, more than one makes the throughput less reliable
+    @param  baselinefile : optional JSON file of earlier results to compare against
+    @param  tolerance    : optional fraction of throughput a run can lose before it is flagged
+    @param  save         : optional, write the results to the baseline file instead of comparing them
+    @param  addrBits     : optional width of an address
+
+    @return the results of every run, with a "status" of ok, changed, slower or new when compared to a baseline
+    """
+
+    from concurrent.futures import ProcessPoolExecutor                                 # only imported by the runs that need it
+
+    tracefiles = dict()
+    configs    = list()
+
+    try:
+        for name in WORKLOADS:
+            fd, tracefiles[name] = tempfile.mkstemp(suffix = ".trace")
+            os.close(fd)
+            write_trace(workload_records(name, accesses, addrBits), tracefiles[name])
+
+            for repPolicy, hitPolicy, misPolicy in product(REPLACEMENT_POLICIES, (1, 2), (1, 2)):
+                configs.append(dict(ramfile = ramfile, tracefile = tracefiles[name], addrBits = addrBits,
+                                    cacheSize = 32768, blockSize = 64, assoc = 8,
+                                    repPolicy = repPolicy, hitPolicy = hitPolicy, misPolicy = misPolicy))
+
+        with ProcessPoolExecutor(max_workers = workers, max_tasks_per_child = 1) as pool:
+            runs = list(pool.map(benchmark_run, configs))
+
+    finally:
+        for tracefile in tracefiles.values(): os.remove(tracefile)
+
+    names   = [name for name in WORKLOADS for _ in range(len(configs) // len(WORKLOADS))]
+    results = [dict(workload = name, repPolicy = config["repPolicy"], hitPolicy = config["hitPolicy"], misPolicy = config["misPolicy"],
+                    accesses = accesses, **run) for name, config, run in zip(names, configs, runs)]
+
+    if baselinefile is not None and save:
+        with open(baselinefile, 'w') as file:
+            json.dump(results, file, indent = 1)
+
+    elif baselinefile is not None:
+        with open(baselinefile, 'r') as file:
+            baseline = {(row["workload"], row["repPolicy"], row["hitPolicy"], row["misPolicy"], row["accesses"]) : row for row in json.load(file)}
+
+        for row in results:
+            old = baseline.get((row["workload"], row["repPolicy"], row["hitPolicy"], row["misPolicy"], row["accesses"]))
+
+            if   old is None                                                           : row["status"] = "new"
+            elif old["checksum"] != row["checksum"]                                    : row["status"] = "changed"
+            elif row["accesses_per_sec"] < old["accesses_per_sec"] * (1 - tolerance)   : row["status"] = "slower"
+            else                                                                       : row["status"] = "ok"
+
+    return results
+
+def sweep_configs(cacheSizes: list, blockSizes: list, assocs: list,
+                  repPolicies: list = (1,), hitPolicies: list = (1,), misPolicies: list = (1,), prefetchers: list = (0,)) -> list:
+    """
+    Lists every combination of the cache parameters that makes a valid cache
+
+    @param  cacheSizes  : the cache sizes to try
+    @param  blockSizes  : the block sizes to try
+    @param  assocs      : the associativities to try
+    @param  repPolicies : the replacement policies to try
+    @param  hitPolicies : the write hit policies to try
+    @param  misPolicies : the write miss policies to try
+    @param  prefetchers : the prefetchers to try
+
+    @return a list of dictionaries of Cache parameters
+    """
+
+    configs = list()
+
+    for cacheSize, blockSize, assoc, repPolicy, hitPolicy, misPolicy, prefetch in product(cacheSizes, blockSizes, assocs, repPolicies,
+                                                                                         hitPolicies, misPolicies, prefetchers):
+        sets = cacheSize // (blockSize * assoc) if blockSize * assoc else 0
+        if sets < 1 or sets & (sets - 1) or blockSize & (blockSize - 1) or sets * blockSize * assoc != cacheSize: continue
+
+        configs.append(dict(cacheSize = cacheSize, blockSize = blockSize, assoc = assoc,
+                            repPolicy = repPolicy, hitPolicy = hitPolicy, misPolicy = misPolicy, prefetch = prefetch))
+
+    return configs
+
+sweepState = dict()     # state of a sweep worker process, set up once by sweep_init
+
+def sweep_init(ramfile: str, decodedfile: str, addrBits: int):
+    """
+    Sets up a sweep worker process by memory-mapping the decoded trace it shares with the other workers
+
+    @param  ramfile     : the file to initialize the RAM with
+    @param  decodedfile : the decoded trace, see decode_trace()
+    @param  addrBits    : the width of an address
+
+    @return no return value
+    """
+
+    with open(decodedfile, 'rb') as file:
+        sweepState["trace"] = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+
+    sweepState["ramfile"]  = ramfile
+    sweepState["addrBits"] = addrBits
+
+def sweep_run(config: dict) -> dict:
+    """
+    Simulates one configuration of a sweep on a fresh RAM and Cache
+
+    @param  config  : the Cache parameters, see sweep_configs()
+
+    @return the parameters and statistics of the run
+    """
+
+    ram   = RAM(sweepState["ramfile"], debug = True, addrBits = sweepState["addrBits"])
+    cache = Cache(addrBits = sweepState["addrBits"], seed = 0, **config)              # random replacement gives the same result every time
+
+    result = dict(config)
+    result.update(replay_records(ram, cache, decoded_records(sweepState["trace"])))
+    return result
+
+def sweep(ramfile: str, tracefile: str, configs: list, workers: int = None, addrBits: int = 8) -> list:
+    """
+    Runs a design-space sweep, simulating the trace for every configuration in parallel processes.
+    The trace is decoded once into a temporary binary file that every worker memory-maps, unless it already is
+    an uncompressed binary trace.
+
+    @param  ramfile   : the file to initialize the RAM with
+    @param  tracefile : the trace being simulated
+    @param  configs   : the Cache parameters of every configuration, see sweep_configs()
+    @param  workers   : optional number of worker processes, defaults to the number of CPUs
+    @param  addrBits  : optional width of an address
+
+    @return the parameters and statistics of every configuration, in the same order as configs
+    """
+
+    from concurrent.futures import ProcessPoolExecutor                                 # only imported by the runs that need it
+
+    if mappable_trace(tracefile):                                                       # binary traces are shared as they are
+        with ProcessPoolExecutor(max_workers = workers, initializer = sweep_init,
+                                 initargs = (ramfile, tracefile, addrBits)) as pool:
+            return list(pool.map(sweep_run, configs))
+
+    fd, decodedfile = tempfile.mkstemp(suffix = ".trace")
+    os.close(fd)
+
+    try:
+        decode_trace(tracefile, decodedfile)
+
+        with ProcessPoolExecutor(max_workers = workers, initializer = sweep_init,
+                                 initargs = (ramfile, decodedfile, addrBits)) as pool:
+            return list(pool.map(sweep_run, configs))
+
+    finally:
+        os.remove(decodedfile)
+
+def write_results(results: list, outfile: str = None):
+    """
+    Writes a table of sweep results as CSV, or as JSON when the file name ends in .json
+
+    @param  results   : the results returned by sweep()
+    @param  outfile   : optional name of the file, the CSV is printed to the terminal without it
+
+    @return no return value
+    """
+
+    if outfile is not None and outfile.lower().endswith(".json"):
+        with open(outfile, 'w') as file:
+            json.dump(results, file, indent = 1)
+        return
+
+    file = open(outfile, 'w', newline = "") if outfile is not None else sys.stdout
+    try:
+        writer = csv.DictWriter(file, fieldnames = list(results[0]) if results else [])
+        writer.writeheader()
+        writer.writerows(results)
+    finally:
+        if outfile is not None: file.close()
+
+def print_stats(stats: dict):
+    """
+    Prints the statistics returned by replay() to the terminal in the format:
+    <statistic>:<value>
+
+    @param  stats  : the statistics being printed
+
+    @return no return value
+    """
+
+    for key, value in stats.items():
+        if isinstance(value, float): print(f"{key}:{value:.6f}")
+        else:                        print(f"{key}:{value}")
+
+def int_list(text: str) -> list:
+    """
+    Parses a comma separated list of integers from the command line
+
+    @param  text      : the argument, for example "1024,2048,4096"
+
+    @return the list of integers
+    """
+
+    return [int(value, 0) for value in text.split(",")]
+
+def timed(args, sim, ram: RAM):
+    """
+    Wraps a simulation in a Timing model when the command line asks for one
+
+    @param  args      : the parsed command line
+    @param  sim       : the Cache or Hierarchy being simulated
+    @param  ram       : the RAM behind it
+
+    @return the Timing object, or sim itself without --timing
+    """
+
+    if not args.timing: return sim
+    return Timing(sim, ram, args.hit_latency, args.miss_penalty, args.ram_latency, args.bus_width, args.bus_cycles, args.write_buffer)
+
+def event_listeners(args, cache: Cache) -> list:
+    """
+    Subscribes the listeners the command line asks for to a cache
+
+    @param  args      : the parsed command line
+    @param  cache     : the Cache being simulated
+
+    @return the subscribed listeners, to be closed and unsubscribed after the simulation
+    """
+
+    listeners = []
+    if args.event_log: listeners.append(EventLog(args.event_log))
+    if args.heatmap:   listeners.append(SetHeatmap(cache.set, args.heatmap))
+    if args.event_sample > 1: listeners = [SampledListener(listener, args.event_sample) for listener in listeners]
+
+    return [cache.subscribe(listener) for listener in listeners]
+
+def config_arguments(configfile: str) -> list:
+    """
+    Reads a config file into command line arguments. The file is TOML when its name ends in .toml and JSON
+    otherwise, and holds one key per flag, for example cache-size = [1024, 2048] or "write_hit": 2.
+    Flags that are switched on are true, lists become comma separated values.
+
+    @param  configfile : the config file
+
+    @return the list of arguments, to be parsed ahead of the actual command line so that it overrides them
+    """
+
+    if configfile.lower().endswith(".toml"):
+        try:
+            import tomllib                                                              # comes with python 3.11
+        except ImportError:
+            raise RuntimeError(".toml config files need python 3.11 or newer")
+
+        with open(configfile, 'rb') as file:
+            config = tomllib.load(file)
+    else:
+        with open(configfile) as file:
+            config = json.load(file)
+
+    arguments = list()
+    for key, value in config.items():
+        flag = "--" + key.replace("_", "-")
+
+        if   value is True:                         arguments.append(flag)
+        elif value is False or value is None:       continue
+        elif isinstance(value, list):               arguments += [flag, ",".join(map(str, value))]
+        else:                                       arguments += [flag, str(value)]
+
+    return arguments
+
+def check_args(args):
+    """
+    Checks the command line up front, so a bad configuration is reported before anything is simulated
+
+    @param  args      : the parsed command line
+
+    @return no return value, a ValueError describes the first problem found
+    """
+
+    if not 1 <= args.address_bits <= 63: raise ValueError(f"--address-bits {args.address_bits} has to be between 1 and 63")
+
+    values  = (args.cache_size, args.block_size, args.assoc, args.replacement, args.write_hit, args.write_miss, args.prefetch)
+    configs = sweep_configs(*values)
+
+    if all(len(value) == 1 for value in values):
+        check_config(args.address_bits, *(value[0] for value in values))
+    elif not configs:
+        raise ValueError("no combination of --cache-size, --block-size and --assoc makes a valid cache")
+
+    for config in configs: check_config(args.address_bits, **config)
+
+    if args.hierarchy:
+        for config in hierarchy_configs(args.hierarchy, args.replacement[0], args.write_hit[0], args.write_miss[0]):
+            check_config(args.address_bits, **config)
+
+    if args.ram_range is not None and (len(args.ram_range) != 2 or not 0 <= args.ram_range[0] <= args.ram_range[1]):
+        raise ValueError("--ram-range takes the first and the last address initialized, START,END")
+
+    if args.cores is not None and args.cores < 1:     raise ValueError("--cores has to be at least 1")
+    if args.workers is not None and args.workers < 1: raise ValueError("--workers has to be at least 1")
+    if args.event_sample < 1:                         raise ValueError("--event-sample has to be at least 1")
+    if args.sample_sets < 1:                          raise ValueError("--sample-sets has to be at least 1")
+
+    if args.sample_period and (args.sample_window < 1 or args.sample_warmup < 0 or args.sample_window + args.sample_warmup > args.sample_period):
+        raise ValueError("--sample-window and --sample-warmup have to fit in the --sample-period")
+
+    modes = [option for option, value in (("--convert", args.convert), ("--miss-curve", args.miss_curve), ("--checkpoint", args.checkpoint),
+                                          ("--cores", args.cores), ("--hierarchy", args.hierarchy)) if value]
+    if len(modes) > 1: raise ValueError(f"{modes[0]} can't be combined with {modes[1]}")
+
+    given = {"--timing"         : args.timing,                      # the options that only some kinds of runs use
+             "--fast"           : args.fast,
+             "--tags-only"      : args.tags_only,
+             "--check-data"     : args.check_data,
+             "--event-log"      : args.event_log,
+             "--heatmap"        : args.heatmap,
+             "--classify"       : args.classify,
+             "--save-checkpoint": args.save_checkpoint,
+             "--sample-sets"    : args.sample_sets > 1,
+             "--sample-period"  : args.sample_period,
+             "--write-hit"      : args.write_hit != [1],
+             "--write-miss"     : args.write_miss != [1],
+             "--prefetch"       : args.prefetch != [0]}
+
+    single  = ("--timing", "--fast", "--check-data", "--event-log", "--heatmap", "--classify", "--sample-sets", "--sample-period")
+    sampled = args.sample_sets > 1 or args.sample_period
+    sweeps  = args.trace and not modes and (len(configs) > 1 or args.out)
+
+    unused  = (("--cores"     , args.cores         , single + ("--tags-only", "--write-hit", "--write-miss", "--prefetch")),
+               ("--hierarchy" , args.hierarchy     , single[1:] + ("--tags-only", "--prefetch")),
+               ("--checkpoint", args.checkpoint    , single + ("--tags-only",)),
+               ("a sweep"     , sweeps             , single + ("--save-checkpoint",)),
+               ("sampling"    , sampled            , ("--timing", "--fast", "--check-data", "--event-log", "--heatmap", "--classify", "--save-checkpoint")),
+               ("--check-data", args.check_data    , ("--timing", "--fast", "--tags-only", "--event-log", "--heatmap", "--classify", "--save-checkpoint")),
+               ("--prefetch"  , given["--prefetch"], ("--timing",)),                    # Timing can't tell prefetches from demand misses
+               ("--fast"      , args.fast          , ("--timing",)))
+
+    for mode, active, options in unused:                                                # rather than silently leaving out what was asked for
+        if not active: continue
+        for option in options:
+            if given[option] and option != mode: raise ValueError(f"{option} can't be used with {mode}")
+
+def ram_from_args(args) -> RAM:
+    """
+    Creates the RAM of a simulation that doesn't prompt, initialized over the --ram-range or the whole image
+
+    @param  args      : the parsed command line
+
+    @return the RAM object
+    """
+
+    return RAM(args.RAMfile, debug = args.ram_range is None, addrBits = args.address_bits, initRange = args.ram_range)
 
 def main():
     """
@@ -726,10 +4749,184 @@ def main():
 
     parser = argparse.ArgumentParser()
     parser.add_argument("RAMfile", help = "txt file to hold intial RAM entries.", type = str)
-    RAMfile = parser.parse_args().RAMfile
+    parser.add_argument("--config"      , help = "TOML (.toml) or JSON file of flags, e.g. cache-size = 64, the command line overrides it.", type = str)
+    parser.add_argument("--ram-range"   , help = "first and last address initialized from the RAM file, e.g. 0x00,0xff, instead of prompting for them.", type = int_list)
+    parser.add_argument("--no-prompt"   , help = "configure the cache of the menu with the same flags as --trace instead of prompting.", action = "store_true")
+    parser.add_argument("--address-bits", help = "width of an address, the RAM holds 2^bits bytes."  , type = int, default = 8)
+    parser.add_argument("--trace"       , help = "replay a trace file without prompts and print the statistics.", type = str)
+    parser.add_argument("--cache-size"  , help = "cache size used with --trace."                 , type = int_list, default = [32])
+    parser.add_argument("--block-size"  , help = "data block size used with --trace."            , type = int_list, default = [8])
+    parser.add_argument("--assoc"       , help = "associativity used with --trace."              , type = int_list, default = [4])
+    parser.add_argument("--replacement" , help = "replacement policy used with --trace (1 - random, 2 - LRU, 3 - LFU, 4 - FIFO, 5 - tree-PLRU).", type = int_list, default = [1])
+    parser.add_argument("--write-hit"   , help = "write hit policy used with --trace."           , type = int_list, default = [1])
+    parser.add_argument("--write-miss"  , help = "write miss policy used with --trace."          , type = int_list, default = [1])
+    parser.add_argument("--prefetch"    , help = "prefetcher used with --trace (0 - none, 1 - next-line, 2 - stride, 3 - stream).", type = int_list, default = [0])
+    parser.add_argument("--timing"      , help = "add up the cycles of every access of --trace and print the average memory access time.", action = "store_true")
+    parser.add_argument("--hit-latency" , help = "hit latency of each level in cycles, used with --timing.", type = int_list, default = [1])
+    parser.add_argument("--miss-penalty", help = "cycles added by a miss of each level, used with --timing.", type = int_list, default = [0])
+    parser.add_argument("--ram-latency" , help = "cycles of a RAM request, used with --timing.", type = int, default = 100)
+    parser.add_argument("--bus-width"   , help = "bytes moved by the RAM bus per transfer, used with --timing.", type = int, default = 8)
+    parser.add_argument("--bus-cycles"  , help = "cycles taken by a RAM bus transfer, used with --timing.", type = int, default = 1)
+    parser.add_argument("--write-buffer", help = "entries of the write buffer in front of the RAM, used with --timing.", type = int, default = 0)
+    parser.add_argument("--tags-only"   , help = "only keep the tags of --trace and count the RAM traffic, without storing any data.", action = "store_true")
+    parser.add_argument("--check-data"  , help = "check the data of every line of --trace against the RAM after each access.", action = "store_true")
+    parser.add_argument("--fast"        , help = "simulate the reads of --trace with the vectorized numpy fast path where possible.", action = "store_true")
+    parser.add_argument("--benchmark-fast", help = "measure the numpy fast path against the scalar path on a synthetic trace of N reads.", type = int, nargs = "?", const = 10_000_000)
+    parser.add_argument("--benchmark"   , help = "run every workload generator with every replacement and write policy, N accesses each.", type = int, nargs = "?", const = 100_000)
+    parser.add_argument("--baseline"    , help = "JSON file of benchmark results to flag regressions against.", type = str)
+    parser.add_argument("--save-baseline", help = "store the --benchmark results as the --baseline instead of comparing them.", action = "store_true")
+    parser.add_argument("--tolerance"   , help = "fraction of throughput a benchmark can lose before it is flagged as slower.", type = float, default = 0.25)
+    parser.add_argument("--workers"     , help = "number of processes for a sweep, defaults to the number of CPUs, or for a --benchmark, defaults to 1.", type = int)
+    parser.add_argument("--miss-curve"  , help = "compute the LRU miss ratio of every cache size of --trace in one pass.", action = "store_true")
+    parser.add_argument("--sets"        , help = "set counts of the --miss-curve, 1 is fully associative."  , type = int_list, default = [1])
+    parser.add_argument("--check"       , help = "cross-check the --miss-curve against LRU simulations."    , action = "store_true")
+    parser.add_argument("--out"         , help = "file for the sweep results, .csv or .json, or for the output of --batch.", type = str)
+    parser.add_argument("--batch"       , help = "run a script of menu commands without the menu, - reads them from stdin.", type = str)
+    parser.add_argument("--serve"       , help = "host sessions of the simulator for clients, on host:port or a Unix socket path.", type = str)
+    parser.add_argument("--jsonl"       , help = "write the result of every --batch command as a line of JSON.", action = "store_true")
+    parser.add_argument("--commands"    , help = "--convert a file of commands typed into the menu instead of trace records.", action = "store_true")
+    parser.add_argument("--convert"     , help = "convert --trace into a binary trace file, compressed when it ends in .gz, .bz2, .xz, .zst or .lz4.", type = str)
+    parser.add_argument("--cores"       , help = "simulate N cores with private caches kept coherent, --trace is one interleaved trace or N comma separated per-core traces.", type = int)
+    parser.add_argument("--protocol"    , help = "coherence protocol of --cores.", choices = MultiCore.protocols, default = "mesi")
+    parser.add_argument("--checkpoint"  , help = "continue the simulation saved in a checkpoint file instead of starting with an empty cache.", type = str)
+    parser.add_argument("--save-checkpoint", help = "save the complete simulation to a checkpoint file after --trace, appending to it when it came from --checkpoint.", type = str)
+    parser.add_argument("--hierarchy"   , help = "replay --trace through several levels, e.g. 1024:16:2,8192:32:4,65536:64:8 (size:block:assoc[:replacement[:write-hit[:write-miss]]]).", type = str)
+    parser.add_argument("--inclusion"   , help = "inclusion policy of the --hierarchy.", choices = Hierarchy.inclusionPolicies, default = "nine")
+    parser.add_argument("--sample-sets" , help = "only simulate one in every N sets of --trace and estimate the statistics of the others.", type = int, default = 1)
+    parser.add_argument("--sample-period", help = "only simulate a window at the end of every N accesses of --trace and estimate the statistics of the others.", type = int, default = 0)
+    parser.add_argument("--sample-window", help = "accesses measured in each --sample-period.", type = int, default = 1000)
+    parser.add_argument("--sample-warmup", help = "accesses simulated without being measured before each --sample-window.", type = int, default = 1000)
+    parser.add_argument("--event-log"   , help = "write every hit, miss, eviction, writeback, fill and flush of --trace to a binary file.", type = str)
+    parser.add_argument("--heatmap"     , help = "write the count of every kind of event of --trace in each set to a file, .csv or .json.", type = str)
+    parser.add_argument("--classify"    , help = "sort the misses of --trace into compulsory, capacity and conflict misses and write them per set to a file, .csv or .json.", type = str)
+    parser.add_argument("--event-sample", help = "only pass one in every N events to --event-log and --heatmap.", type = int, default = 1)
+    args = parser.parse_args()
+    if args.config: args = parser.parse_args(config_arguments(args.config) + sys.argv[1:])
+
+    try:
+        check_args(args)
+    except ValueError as error:
+        parser.error(str(error))
+
+    configs = sweep_configs(args.cache_size, args.block_size, args.assoc, args.replacement, args.write_hit, args.write_miss, args.prefetch)
+    if args.tags_only: configs = [dict(config, tagsOnly = True) for config in configs]
+
+    if args.benchmark:
+        results = benchmark(args.RAMfile, args.benchmark, args.workers or 1, args.baseline, args.tolerance, args.save_baseline)
+        write_results(results, args.out)
+        if any(row.get("status") in ("changed", "slower") for row in results): sys.exit(1)
+        return
+
+    if args.benchmark_fast:
+        print_stats(fast_path_benchmark(args.RAMfile, args.benchmark_fast, addrBits = max(args.address_bits, 32)))
+        return
+
+    if args.serve:
+        SimulationServer(args.RAMfile, args.address_bits).serve(args.serve)
+        return
+
+    if args.batch:
+        ram    = ram_from_args(args)
+        cache  = Cache(addrBits = args.address_bits, **configs[0])
+        script = sys.stdin if args.batch == "-" else io.TextIOWrapper(open_trace(args.batch))
+
+        with open(args.out or sys.stdout.fileno(), 'w', buffering = TRACE_BUFFER, closefd = args.out is not None) as out:
+            batch(ram, cache, script, out, args.jsonl)
+        return
+
+    if args.trace and args.convert:
+        records = command_records(args.trace) if args.commands else trace_records(args.trace)
+        print(f"records:{write_trace(records, args.convert)}")
+        return
+
+    if args.trace and args.miss_curve:
+        rows = miss_curve(args.trace, args.block_size[0], args.sets)
+        write_results(rows, args.out)
+
+        if args.check:
+            mismatches = check_miss_curve(args.RAMfile, args.trace, args.block_size[0], rows, args.address_bits)
+            if mismatches: write_results(mismatches)
+            print(f"check:{'failed' if mismatches else 'ok'}")
+        return
+
+    if args.trace and args.checkpoint:
+        sim, ram = load_checkpoint(args.checkpoint)
+
+        if isinstance(sim, MultiCore): print_stats(replay_multicore(sim, multicore_records(args.trace.split(","))))
+        else:                          print_stats(replay(ram, sim, args.trace))
+
+        if args.save_checkpoint: save_checkpoint(args.save_checkpoint, sim, ram)
+        return
+
+    if args.trace and args.cores:
+        ram   = ram_from_args(args)
+        cores = [Cache(addrBits = args.address_bits, cacheSize = args.cache_size[0], blockSize = args.block_size[0],
+                       assoc = args.assoc[0], repPolicy = args.replacement[0]) for _ in range(args.cores)]
+        mc    = MultiCore(cores, ram, args.protocol)
+
+        print_stats(replay_multicore(mc, multicore_records(args.trace.split(","))))
+        for address, count in mc.false_sharing(): print(f"false_sharing:{address:x}:{count}")
+
+        if args.save_checkpoint: save_checkpoint(args.save_checkpoint, mc, ram)
+        return
+
+    if args.trace and args.hierarchy:
+        ram    = ram_from_args(args)
+        levels = hierarchy_levels(args.hierarchy, args.address_bits, args.replacement[0], args.write_hit[0], args.write_miss[0])
+
+        hierarchy = Hierarchy(levels, ram, args.inclusion)
+        print_stats(replay(ram, timed(args, hierarchy, ram), args.trace))
+
+        if args.save_checkpoint: save_checkpoint(args.save_checkpoint, hierarchy, ram)
+        return
+
+    if args.trace:
+        if len(configs) > 1 or args.out:                                                # several values for a parameter run a sweep
+            write_results(sweep(args.RAMfile, args.trace, configs, args.workers, args.address_bits), args.out)
+            return
+
+        ram       = ram_from_args(args)
+        cache     = Cache(addrBits = args.address_bits, **configs[0])
+
+        if args.sample_sets > 1 or args.sample_period:
+            print_stats(sampled_replay(ram, cache, trace_records(args.trace), args.sample_sets, args.sample_period, args.sample_window, args.sample_warmup))
+            return
+
+        if args.check_data:
+            stats, mismatches = checked_replay(ram, cache, trace_records(args.trace))
+            print_stats(stats)
+            if mismatches: write_results(mismatches)
+            print(f"data_check:{'failed' if mismatches else 'ok'}")
+            return
+
+        listeners = event_listeners(args, cache)
+        classes   = cache.subscribe(MissClassifier(cache)) if args.classify else None
+
+        if args.fast: stats = fast_replay(ram, cache, args.trace)
+        else:         stats = replay(ram, timed(args, cache, ram), args.trace)
+
+        if classes is not None:
+            cache.unsubscribe(classes)
+            stats.update(classes.stats())
+        print_stats(stats)
+
+        if classes is not None:
+            for address, *counts in classes.blocks(): print(f"miss_block:{address:x}:" + ":".join(map(str, counts)))
+            write_results(classes.rows(), args.classify)
+
+        for listener in listeners:
+            listener.close()
+            cache.unsubscribe(listener)
+
+        if args.save_checkpoint: save_checkpoint(args.save_checkpoint, cache, ram)
+        return
 
-    ram   = RAM(RAMfile)
-    cache = Cache()
+    if args.no_prompt:
+        ram   = ram_from_args(args)
+        cache = Cache(addrBits = args.address_bits, **configs[0])
+    else:
+        ram   = RAM(args.RAMfile, addrBits = args.address_bits, initRange = args.ram_range)
+        cache = Cache(addrBits = args.address_bits)
 
     simulate(ram, cache)
 
@@ -744,6 +4941,7 @@ def debug():
 
     ram   = RAM(RAMfile, debug = True)
     cache = Cache(debug = True)
+    cache.subscribe(TerminalListener(cache))
 
     cache.write("0x10", "0xAB",ram)
     print()
@@ -0,0 +1,73 @@
+"""
+Shared helpers of the tests, which drive CacheSimulator.py from the repository root
+"""
+
+import random
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT    = Path(__file__).resolve().parent.parent
+DATA    = Path(__file__).resolve().parent / "data"
+RAMFILE = str(ROOT / "ram.txt")
+
+ADDR_BITS = 14
+
+sys.path.insert(0, str(ROOT))
+
+
+def run_menu(directory: Path, commands: str) -> str:
+    """
+    Runs the interactive menu on a copy of ram.txt, answering its prompts with the given lines
+
+    @param  directory : where ram.txt is copied to and the dumps are written
+    @param  commands  : the whole input, one answer or command per line
+
+    @return everything the menu printed
+    """
+
+    shutil.copy(RAMFILE, directory / "ram.txt")
+    result = subprocess.run([sys.executable, str(ROOT / "CacheSimulator.py"), "ram.txt"], input = commands,
+                            capture_output = True, text = True, cwd = directory, check = True)
+    return result.stdout
+
+
+def random_records(rnd: random.Random, count: int, writes: float = 0.4, hot: float = 0.6) -> list:
+    """
+    Makes a trace that mixes accesses to a small hot region with accesses all over the address space
+
+    @param  rnd       : the random generator the trace is drawn from
+    @param  count     : the number of accesses
+    @param  writes    : optional share of writes
+    @param  hot       : optional share of accesses that go to the hot region
+
+    @return a list of (op, address, byte) records, op 1 for writes
+    """
+
+    base    = rnd.randrange(1 << ADDR_BITS)
+    records = list()
+
+    for _ in range(count):
+        if rnd.random() < hot: address = (base + rnd.randrange(256)) % (1 << ADDR_BITS)
+        else:                  address = rnd.randrange(1 << ADDR_BITS)
+        records.append((int(rnd.random() < writes), address, rnd.randrange(256)))
+
+    return records
+
+
+def write_records(path: Path, records: list) -> str:
+    """
+    Writes records as a text trace of "R <address>" and "W <address> <byte>" lines
+
+    @param  path      : the trace file
+    @param  records   : (op, address, byte) records
+
+    @return the path of the trace as a string
+    """
+
+    with open(path, "w") as file:
+        for op, address, byte in records:
+            file.write(f"W {address:#x} {byte:#x}\n" if op else f"R {address:#x}\n")
+
+    return str(path)
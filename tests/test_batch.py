@@ -0,0 +1,59 @@
+import io
+import json
+import shutil
+import subprocess
+import sys
+
+import CacheSimulator as sim
+from helpers import DATA, RAMFILE, ROOT
+
+FLAGS = ["--cache-size", "64", "--block-size", "8", "--assoc", "2", "--replacement", "2", "--write-hit", "1", "--write-miss", "1"]
+
+
+def without_menu(lines: list) -> list:
+    kept, inMenu = list(), False
+    for line in lines:
+        if line == "*** Cache simulator menu ***": inMenu = True
+        elif not inMenu:                           kept.append(line)
+        elif line.startswith("*****"):             inMenu = False
+    return kept
+
+
+def test_a_menu_session_gives_the_menu_output_without_the_menu(tmp_path):
+    shutil.copy(RAMFILE, tmp_path / "ram.txt")
+    result = subprocess.run([sys.executable, str(ROOT / "CacheSimulator.py"), "ram.txt", "--batch", str(DATA / "menu.txt")] + FLAGS,
+                            capture_output = True, text = True, cwd = tmp_path, check = True)
+
+    expected = (DATA / "menu.out").read_text().splitlines()[5:]                        # the welcome and the prompts
+    assert result.stdout.splitlines() == without_menu(expected)
+    assert (tmp_path / "cache.txt").read_text() == (DATA / "menu_cache.txt").read_text()
+    assert (tmp_path / "ram.txt").read_text() == (DATA / "menu_ram.txt").read_text()
+
+
+def test_json_lines_report_every_command():
+    ram   = sim.RAM(RAMFILE, debug = True)
+    cache = sim.Cache(cacheSize = 64, blockSize = 8, assoc = 2, repPolicy = 2)
+    out   = io.StringIO()
+    lines = ["cache-read 0x10", "cache-write 0x10 0xab", "cache-read 0x10", "cache-flush", "cache-read 0x10",
+             "cache-read 0xzz", "cache-jump", "quit", "cache-read 0x20"]
+
+    assert sim.batch(ram, cache, lines, out, jsonl = True) == 7
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [result["command"] for result in results] == ["cache-read", "cache-write", "cache-read", "cache-flush", "cache-read",
+                                                          "cache-read", "cache-jump"]
+    assert [result.get("hit") for result in results[:5]] == [False, True, True, None, False]
+    assert results[2]["data"] == 0xAB
+    assert results[3]["output"] == ["cache_cleared"]
+    assert results[5]["error"] == "invalid address or byte"
+    assert results[6]["error"] == "invalid command"
+
+
+def test_a_flush_reads_the_same_in_both_modes():
+    outputs = list()
+    for jsonl in (False, True):
+        out = io.StringIO()
+        sim.batch(sim.RAM(RAMFILE, debug = True), sim.Cache(cacheSize = 64, blockSize = 8, assoc = 2), ["cache-flush"], out, jsonl)
+        outputs.append(out.getvalue())
+
+    assert outputs[0].splitlines() == json.loads(outputs[1])["output"]
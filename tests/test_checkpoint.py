@@ -0,0 +1,71 @@
+import os
+import random
+import shutil
+
+import pytest
+
+import CacheSimulator as sim
+from helpers import ADDR_BITS, RAMFILE, random_records
+
+CONFIG = dict(cacheSize = 256, blockSize = 8, assoc = 4, repPolicy = 2, hitPolicy = 2, addrBits = ADDR_BITS)
+
+
+def memory(ram) -> bytes:
+    return ram.read_bytes(0, 1 << ADDR_BITS)
+
+
+def test_a_restored_simulation_continues_like_the_original(tmp_path):
+    rnd        = random.Random(140)
+    warmup     = random_records(rnd, 2000)
+    rest       = random_records(rnd, 2000)
+    path       = str(tmp_path / "warm.ckpt")
+
+    ram, cache = sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS), sim.Cache(**CONFIG)
+    sim.replay_records(ram, cache, warmup)
+    sim.save_checkpoint(path, cache, ram)
+    expected = sim.replay_records(ram, cache, rest)
+
+    restored, restoredRam = sim.load_checkpoint(path)
+    assert sim.replay_records(restoredRam, restored, rest) == expected
+    assert memory(restoredRam) == memory(ram)
+
+
+def test_forked_checkpoint_keeps_the_earlier_ones(tmp_path):
+    rnd        = random.Random(14)
+    ram, cache = sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS), sim.Cache(**CONFIG)
+    path       = str(tmp_path / "warm.ckpt")
+
+    saved = list()
+    for _ in range(3):
+        sim.replay_records(ram, cache, random_records(rnd, 500))
+        sim.save_checkpoint(path, cache, ram)
+        saved.append((cache.stats(), memory(ram)))
+
+    fork, forkRam = sim.load_checkpoint(path, 0)
+    sim.replay_records(forkRam, fork, random_records(rnd, 500))
+    assert sim.save_checkpoint(path, fork, forkRam) == 3
+
+    for record, (stats, image) in enumerate(saved):
+        restored, restoredRam = sim.load_checkpoint(path, record)
+        assert restored.stats() == stats
+        assert memory(restoredRam) == image
+
+    restored, restoredRam = sim.load_checkpoint(path)
+    assert restored.stats() == fork.stats()
+    assert memory(restoredRam) == memory(forkRam)
+
+
+def test_loading_fails_once_the_ram_file_changed(tmp_path):
+    ramfile    = str(tmp_path / "ram.txt")
+    path       = str(tmp_path / "warm.ckpt")
+    shutil.copy(RAMFILE, ramfile)
+
+    ram, cache = sim.RAM(ramfile, debug = True, addrBits = ADDR_BITS), sim.Cache(**CONFIG)
+    sim.replay_records(ram, cache, random_records(random.Random(141), 500))
+    sim.save_checkpoint(path, cache, ram)
+    sim.load_checkpoint(path)
+
+    stat = os.stat(ramfile)
+    os.utime(ramfile, ns = (stat.st_atime_ns, stat.st_mtime_ns + 1))
+    with pytest.raises(ValueError, match = "changed since the checkpoint was saved"):
+        sim.load_checkpoint(path)
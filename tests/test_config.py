@@ -0,0 +1,74 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+import CacheSimulator as sim
+from helpers import DATA, RAMFILE, ROOT, run_menu
+
+TOML = """
+address-bits = 12
+cache-size   = 1024
+block-size   = 16
+assoc        = 4
+replacement  = [2]
+write_hit    = 2
+no-prompt    = true
+timing       = false
+"""
+
+
+def run(*arguments, stdin: str = "cache-view\n"):
+    return subprocess.run([sys.executable, str(ROOT / "CacheSimulator.py"), RAMFILE] + list(arguments), input = stdin,
+                          capture_output = True, text = True)
+
+
+def configuration(output: str) -> dict:
+    return dict(line.split(":", 1) for line in output.splitlines()[:6])
+
+
+def test_config_files_become_arguments(tmp_path):
+    (tmp_path / "sim.toml").write_text(TOML)
+    (tmp_path / "sim.json").write_text(json.dumps({"cache-size": [64, 128], "fast": True, "protocol": "moesi", "timing": None}))
+
+    assert sim.config_arguments(str(tmp_path / "sim.toml")) == ["--address-bits", "12", "--cache-size", "1024", "--block-size", "16", "--assoc", "4",
+                                                                 "--replacement", "2", "--write-hit", "2", "--no-prompt"]
+    assert sim.config_arguments(str(tmp_path / "sim.json")) == ["--cache-size", "64,128", "--fast", "--protocol", "moesi"]
+
+
+def test_the_command_line_overrides_the_config_file(tmp_path):
+    (tmp_path / "sim.toml").write_text(TOML)
+
+    fromFile = run("--config", str(tmp_path / "sim.toml"), "--batch", "-")
+    override = run("--config", str(tmp_path / "sim.toml"), "--batch", "-", "--assoc", "2", "--write-hit", "1")
+
+    assert fromFile.returncode == override.returncode == 0, fromFile.stderr + override.stderr
+    assert configuration(fromFile.stdout) == {"cache_size": "1024", "data_block_size": "16", "associativity": "4",
+                                              "replacement_policy": "least_recently_used", "write_hit_policy": "write_back",
+                                              "write_miss_policy": "write_allocate"}
+    assert configuration(override.stdout) == dict(configuration(fromFile.stdout), associativity = "2", write_hit_policy = "write_through")
+
+
+@pytest.mark.parametrize("arguments, message", ((("--cache-size", "48", "--assoc", "2"), "power of two"),
+                                                (("--block-size", "12"), "power of two"),
+                                                (("--trace", "t.txt", "--timing", "--fast"), "--timing can't be used with --fast"),
+                                                (("--trace", "t.txt", "--cache-size", "32,64", "--timing"), "--timing can't be used with a sweep"),
+                                                (("--trace", "t.txt", "--cores", "2", "--write-hit", "2"), "--write-hit can't be used with --cores"),
+                                                (("--trace", "t.txt", "--cores", "2", "--hierarchy", "64:8:2"), "can't be combined with")))
+def test_bad_configurations_are_refused_before_simulating(arguments, message):
+    result = run(*arguments)
+
+    assert result.returncode == 2
+    assert message in result.stderr
+
+
+def test_the_menu_prompts_again_for_a_cache_that_cant_be_built(tmp_path):
+    commands = (DATA / "menu.txt").read_text().splitlines()
+    output   = run_menu(tmp_path, "\n".join(commands[:1] + ["48", "8", "2", "2", "1", "1"] + commands[1:]) + "\n")
+
+    assert "[ERROR] - a cache of 48 bytes" in output
+    assert output.count("cache size: ") == 2
+
+    configured = "cache successfully configured!"
+    assert output.split(configured)[1] == (DATA / "menu.out").read_text().split(configured)[1]
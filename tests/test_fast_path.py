@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+import CacheSimulator as sim
+from helpers import ADDR_BITS, RAMFILE, random_records, write_records
+
+pytest.importorskip("numpy")
+
+
+def random_lru_config(rnd: random.Random, hitPolicy: int = 2) -> dict:
+    blockSize = rnd.choice((4, 8, 16))
+    assoc     = rnd.choice((1, 2, 4, 32))
+    sets      = rnd.choice((1, 4, 16))
+    return dict(cacheSize = blockSize * assoc * sets, blockSize = blockSize, assoc = assoc, repPolicy = 2, hitPolicy = hitPolicy)
+
+
+def new_sim(**config):
+    return sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS), sim.Cache(addrBits = ADDR_BITS, **config)
+
+
+def cache_state(ram, cache) -> tuple:
+    return (bytes(cache.tags), bytes(cache.validBits), bytes(cache.dirtyBits), bytes(cache.data), ram.bytesRead,
+            [sim.recency_order(cache, setNum) for setNum in range(cache.set)])
+
+
+def test_fast_reads_match_scalar_reads():
+    rnd = random.Random(9)
+    ran = 0
+
+    for _ in range(80):
+        config = random_lru_config(rnd)
+        warm   = [address for _, address, _ in random_records(rnd, rnd.choice((0, 20, 400)))]
+        batch  = [address for _, address, _ in random_records(rnd, rnd.choice((100, 3000)), hot = rnd.choice((0, 0.3)))]
+
+        states = list()
+        for fast in (False, True):
+            ram, cache = new_sim(**config)
+            for address in warm: cache.load(address, ram)
+
+            if not fast:
+                for address in batch: cache.load(address, ram)
+            elif not sim.fast_reads(ram, cache, batch):
+                break
+
+            states.append((cache.stats(), cache_state(ram, cache)))
+        else:
+            ran += 1
+            assert states[0] == states[1], config
+
+    assert ran > 25
+
+
+@pytest.mark.parametrize("hitPolicy", (1, 2))
+def test_fast_replay_matches_replay_with_writes(tmp_path, hitPolicy):
+    rnd = random.Random(90 + hitPolicy)
+
+    for _ in range(10):
+        config  = random_lru_config(rnd, hitPolicy)
+        records = list()
+        for _ in range(8):                                                              # long runs of reads between a few writes
+            records += random_records(rnd, rnd.choice((50, 1000)), writes = 0, hot = 0.3)
+            records += random_records(rnd, rnd.choice((1, 5)), writes = 1)
+        trace = write_records(tmp_path / "trace.txt", records)
+
+        ram, cache = new_sim(**config)
+        scalar     = sim.replay(ram, cache, trace), cache_state(ram, cache)
+
+        ram, cache = new_sim(**config)
+        stats      = sim.fast_replay(ram, cache, trace)
+        fastReads  = stats.pop("fast_reads")
+
+        assert (stats, cache_state(ram, cache)) == scalar, config
+        assert fastReads <= stats["reads"]
+
+
+def test_write_through_reads_between_writes_take_the_fast_path(tmp_path):
+    rnd     = random.Random(91)
+    records = list()
+    for _ in range(6):                                                                  # each write hits the block read last
+        records += random_records(rnd, 2000, writes = 0, hot = 0)
+        records += [(1, records[-1][1], byte) for byte in range(3)]
+    records += random_records(rnd, 10, writes = 0)
+    trace = write_records(tmp_path / "trace.txt", records)
+
+    ram, cache = new_sim(cacheSize = 1024, blockSize = 8, assoc = 4, repPolicy = 2, hitPolicy = 1)
+    stats      = sim.fast_replay(ram, cache, trace)
+
+    assert stats["fast_reads"] == 6 * 2000                                              # the last 10 reads are too few
+    assert stats["writes"] == 18
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+import CacheSimulator as sim
+from helpers import ADDR_BITS, RAMFILE, random_records
+
+
+def new_hierarchy(inclusion: str, repPolicy: int) -> sim.Hierarchy:
+    levels = [sim.Cache(cacheSize = 64, blockSize = 8, assoc = 2, repPolicy = repPolicy, hitPolicy = 2, addrBits = ADDR_BITS),
+              sim.Cache(cacheSize = 256, blockSize = 8, assoc = 4, repPolicy = repPolicy, hitPolicy = 2, addrBits = ADDR_BITS)]
+    return sim.Hierarchy(levels, sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS), inclusion)
+
+
+def cached_blocks(cache) -> set:
+    return {(cache.tags[line] << cache.index_bit | line // cache.assoc) << cache.offset_bit
+            for line in range(cache.set * cache.assoc) if cache.validBits[line]}
+
+
+def test_fifo_evicts_the_oldest_fill_after_an_invalidation():
+    ram   = sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS)
+    cache = sim.Cache(cacheSize = 64, blockSize = 16, assoc = 4, repPolicy = 4, addrBits = ADDR_BITS)
+
+    for block in range(4): cache.load(block * 16, ram)
+    cache.invalidate(cache.find_line(0, 2))
+    for block in range(4, 6): cache.load(block * 16, ram)
+
+    assert sorted(cache.tags) == [1, 3, 4, 5]
+
+
+@pytest.mark.parametrize("repPolicy", (1, 2, 3, 4, 5))
+@pytest.mark.parametrize("inclusion", sim.Hierarchy.inclusionPolicies)
+def test_levels_keep_their_inclusion_policy_and_the_right_data(inclusion, repPolicy):
+    rnd       = random.Random(10 * repPolicy)
+    hierarchy = new_hierarchy(inclusion, repPolicy)
+    l1, l2    = hierarchy.levels
+    memory    = hierarchy.ram.read_bytes(0, 1 << ADDR_BITS)
+
+    for _, address, _ in random_records(rnd, 3000, writes = 0):
+        setNum, tag, offNum, lineIndex, vicNum = hierarchy.load(address)
+        assert l1.get_block(setNum * l1.assoc + (vicNum if lineIndex == -1 else lineIndex), offNum) == memory[address]
+
+        if inclusion == "inclusive": assert cached_blocks(l1) <= cached_blocks(l2)
+        if inclusion == "exclusive": assert not cached_blocks(l1) & cached_blocks(l2)
+
+
+def test_an_inclusive_level_takes_its_victims_out_of_the_level_above():
+    hierarchy = new_hierarchy("inclusive", 2)
+    l1, l2    = hierarchy.levels
+
+    for block in range(1, 5):                                                           # block 0 keeps hitting in the L1 only
+        hierarchy.load(0)
+        hierarchy.load(block * 8 * l2.set)
+
+    assert 0 not in cached_blocks(l1) | cached_blocks(l2)
+    assert l1.numBackInval == 1                                                         # counted by the level that lost the line
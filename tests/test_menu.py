@@ -0,0 +1,23 @@
+from helpers import DATA, run_menu
+
+
+def test_menu_output_matches_the_original(tmp_path):
+    # the expected files come from the original implementation, whose write-back and write-miss paths had
+    # bugs that were fixed since, so the commands only evict clean lines of a write-through cache
+    output = run_menu(tmp_path, (DATA / "menu.txt").read_text())
+
+    assert output == (DATA / "menu.out").read_text()
+    assert (tmp_path / "cache.txt").read_text() == (DATA / "menu_cache.txt").read_text()
+    assert (tmp_path / "ram.txt").read_text() == (DATA / "menu_ram.txt").read_text()
+
+
+def test_written_bytes_are_normalized_to_two_uppercase_digits(tmp_path):
+    # the original kept whatever was typed, so "0xab" printed as 0xab and "0x5" as 0x5
+    commands = ["init-ram 0x00 0xff", "64", "8", "2", "2", "1", "1",
+                "cache-read 0x10", "cache-write 0x10 0xab", "cache-read 0x11", "cache-write 0x11 0x5",
+                "cache-read 0x10", "cache-read 0x11", "memory-dump", "quit"]
+
+    output = run_menu(tmp_path, "\n".join(commands) + "\n").splitlines()
+
+    assert [line for line in output if line.startswith("data:")][-2:] == ["data:0xAB", "data:0x05"]
+    assert (tmp_path / "ram.txt").read_text().splitlines()[0x10:0x12] == ["AB", "05"]
@@ -0,0 +1,23 @@
+import random
+
+import CacheSimulator as sim
+from helpers import ADDR_BITS, RAMFILE, random_records, write_records
+
+
+def test_miss_curve_matches_lru_simulations(tmp_path):
+    rnd   = random.Random(8)
+    trace = write_records(tmp_path / "trace.txt", random_records(rnd, 2000))
+
+    rows = sim.miss_curve(trace, 8, (1, 4))
+
+    assert len(rows) > 4
+    assert sim.check_miss_curve(RAMFILE, trace, 8, rows, ADDR_BITS) == []
+
+
+def test_miss_ratio_only_drops_as_the_cache_grows(tmp_path):
+    rnd   = random.Random(80)
+    trace = write_records(tmp_path / "trace.txt", random_records(rnd, 2000, hot = 0.3))
+
+    for sets in (1, 2, 8):
+        misses = [row["misses"] for row in sim.miss_curve(trace, 4, (sets,))]
+        assert misses == sorted(misses, reverse = True)
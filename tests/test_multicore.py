@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+import CacheSimulator as sim
+from helpers import ADDR_BITS, RAMFILE
+
+M = sim.MultiCore
+
+
+def new_multicore(protocol: str, cores: int = 4, repPolicy: int = 2):
+    ram    = sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS)
+    caches = [sim.Cache(cacheSize = 64, blockSize = 8, assoc = 2, repPolicy = repPolicy, addrBits = ADDR_BITS) for _ in range(cores)]
+    return sim.MultiCore(caches, ram, protocol)
+
+
+def state_of(mc, core: int, address: int) -> int:
+    line = mc.cores[core].line_of(address)
+    return M.INVALID if line == -1 else mc.cores[core].states[line]
+
+
+def check_invariants(mc):
+    copies = dict()
+    for core, c in enumerate(mc.cores):
+        for line in range(len(c.tags)):
+            if not c.validBits[line]: continue
+            assert c.states[line] != M.INVALID
+            assert c.dirtyBits[line] == (c.states[line] >= M.OWNED)
+            copies.setdefault(c.block_address(line) >> mc.offset_bit, list()).append((core, c.states[line]))
+
+    assert set(copies) == set(mc.holders)
+    for block, held in copies.items():
+        states = [state for _, state in held]
+        assert mc.holders[block] == sum(1 << core for core, _ in held)
+        if M.MODIFIED in states or M.EXCLUSIVE in states: assert len(states) == 1, held    # a single writer
+        assert states.count(M.OWNED) <= 1
+        if not mc.owned: assert M.OWNED not in states
+
+
+@pytest.mark.parametrize("protocol", M.protocols)
+@pytest.mark.parametrize("repPolicy", (1, 2, 3, 4, 5))
+def test_coherence_invariants_hold_under_random_traffic(protocol, repPolicy):
+    rnd    = random.Random(13 + repPolicy)
+    mc     = new_multicore(protocol, repPolicy = repPolicy)
+    memory = bytearray(mc.ram.read_bytes(0, 1 << ADDR_BITS))
+
+    for step in range(20000):
+        core    = rnd.randrange(len(mc.cores))
+        address = rnd.randrange(256) if rnd.random() < 0.8 else rnd.randrange(1 << ADDR_BITS)
+
+        if rnd.random() < 0.35:
+            memory[address] = rnd.randrange(256)
+            mc.store(core, address, memory[address])
+        else:
+            assert mc.load(core, address) == memory[address]                            # every core reads the latest write
+
+        if step % 500 == 0: check_invariants(mc)
+
+    for c in mc.cores:
+        for line in range(len(c.tags)): c.evict(line, mc.ram)
+    assert mc.ram.read_bytes(0, 1 << ADDR_BITS) == bytes(memory)
+
+
+@pytest.mark.parametrize("protocol, supplier", (("mesi", M.SHARED), ("moesi", M.OWNED)))
+def test_a_read_of_a_modified_block_downgrades_it(protocol, supplier):
+    mc = new_multicore(protocol, cores = 2)
+
+    mc.load(0, 0x40)
+    assert state_of(mc, 0, 0x40) == M.EXCLUSIVE
+
+    mc.load(1, 0x40)
+    assert (state_of(mc, 0, 0x40), state_of(mc, 1, 0x40)) == (M.SHARED, M.SHARED)
+
+    mc.store(0, 0x41, 0x7E)
+    assert (state_of(mc, 0, 0x40), state_of(mc, 1, 0x40)) == (M.MODIFIED, M.INVALID)
+
+    assert mc.load(1, 0x41) == 0x7E
+    assert (state_of(mc, 0, 0x40), state_of(mc, 1, 0x40)) == (supplier, M.SHARED)
+    assert (mc.ram.read_bytes(0x41, 1) == b"\x7e") == (protocol == "mesi")              # only MESI writes the block back
+    check_invariants(mc)
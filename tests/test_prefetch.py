@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+import CacheSimulator as sim
+from helpers import ADDR_BITS, RAMFILE, random_records
+
+
+def new_sim(**config):
+    return sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS), sim.Cache(addrBits = ADDR_BITS, **config)
+
+
+def test_a_prefetch_never_evicts_the_block_being_read(capsys):
+    ram, cache = sim.RAM(RAMFILE, debug = True), sim.Cache(cacheSize = 16, blockSize = 8, assoc = 2, repPolicy = 2, prefetch = 1)
+
+    cache.read("0x10", ram)
+
+    assert f"data:0x{ram.read_bytes(0x10, 1)[0]:02X}" in capsys.readouterr().out.splitlines()
+    assert cache.line_of(0x10) != -1
+
+
+@pytest.mark.parametrize("prefetch", (1, 2, 3))
+@pytest.mark.parametrize("repPolicy", (1, 2, 3, 4, 5))
+def test_prefetching_caches_keep_the_right_data(prefetch, repPolicy):
+    rnd = random.Random(15 * prefetch + repPolicy)
+
+    for hitPolicy, misPolicy in ((1, 1), (1, 2), (2, 1), (2, 2)):
+        ram, cache = new_sim(cacheSize = 64, blockSize = 8, assoc = rnd.choice((1, 2, 4)), repPolicy = repPolicy,
+                             hitPolicy = hitPolicy, misPolicy = misPolicy, prefetch = prefetch)
+        memory = bytearray(ram.read_bytes(0, 1 << ADDR_BITS))
+
+        records = list()
+        for _ in range(30):                                                             # random accesses and strided scans
+            records += random_records(rnd, 60, hot = 0.8)
+            start, stride = rnd.randrange(1 << ADDR_BITS), rnd.choice((8, 16, 24))
+            records += [(0, (start + k * stride) % (1 << ADDR_BITS), 0) for k in range(40)]
+
+        for op, address, byte in records:
+            if op:
+                cache.store(address, byte, ram)
+                memory[address] = byte
+                continue
+
+            setNum, _, offNum, lineIndex, vicNum = cache.load(address, ram)
+            line = setNum * cache.assoc + (vicNum if lineIndex == -1 else lineIndex)
+            assert cache.get_block(line, offNum) == memory[address], (hitPolicy, misPolicy)
+
+        assert cache.numPrefetch > 0
+
+
+def test_next_line_prefetching_turns_a_scan_into_hits():
+    results = list()
+    for prefetch in (0, 1):
+        ram, cache = new_sim(cacheSize = 256, blockSize = 8, assoc = 4, repPolicy = 2, prefetch = prefetch)
+        results.append(sim.replay_records(ram, cache, [(0, address, 0) for address in range(0, 4096, 4)]))
+
+    assert results[1]["misses"] < results[0]["misses"] // 4
+    assert results[1]["prefetch_useful"] > 0
@@ -0,0 +1,70 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import CacheSimulator as sim
+from helpers import ADDR_BITS, RAMFILE, random_records
+
+CONFIG = dict(cacheSize = 256, blockSize = 8, assoc = 4, repPolicy = 1, hitPolicy = 2, addrBits = ADDR_BITS)
+
+
+def seeded_run(seed: int, records: list) -> tuple:
+    ram, cache = sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS), sim.Cache(seed = seed, **CONFIG)
+    sim.replay_records(ram, cache, records)
+    return cache.stats(), bytes(cache.tags), ram.read_bytes(0, 1 << ADDR_BITS)
+
+
+def test_seeded_caches_dont_depend_on_what_runs_next_to_them():
+    rnd      = random.Random(23)
+    traces   = [random_records(rnd, 3000) for _ in range(4)]
+    expected = [seeded_run(seed, records) for seed, records in enumerate(traces)]
+
+    with ThreadPoolExecutor(4) as pool:
+        assert list(pool.map(seeded_run, range(4), traces)) == expected
+
+    random.seed(1)                                                                      # the shared generator isn't used
+    random.random()
+    assert seeded_run(0, traces[0]) == expected[0]
+
+
+def test_interleaved_seeded_caches_match_their_own_runs():
+    rnd     = random.Random(230)
+    records = random_records(rnd, 3000)
+    alone   = seeded_run(5, records)
+
+    ram   = [sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS) for _ in range(2)]
+    cache = [sim.Cache(seed = 5, **CONFIG), sim.Cache(seed = 6, **CONFIG)]
+    for op, address, byte in records:
+        for r, c in zip(ram, cache):
+            if op: c.store(address, byte, r)
+            else:  c.load(address, r)
+
+    assert (cache[0].stats(), bytes(cache[0].tags), ram[0].read_bytes(0, 1 << ADDR_BITS)) == alone
+    assert bytes(cache[0].tags) != bytes(cache[1].tags)
+
+
+def test_unseeded_caches_follow_the_random_module():
+    records = random_records(random.Random(231), 3000)
+
+    runs = list()
+    for _ in range(2):
+        random.seed(7)
+        ram, cache = sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS), sim.Cache(**CONFIG)
+        sim.replay_records(ram, cache, records)
+        runs.append(bytes(cache.tags))
+
+    assert runs[0] == runs[1]
+
+
+def test_counters_and_memory_belong_to_each_instance():
+    first, second = sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS), sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS)
+    caches        = [sim.Cache(**(CONFIG | {"hitPolicy": 1})), sim.Cache(**CONFIG)]
+
+    caches[0].load(0x10, first)
+    caches[0].store(0x10, 0xAB, first)                                                  # a write-through hit
+    caches[0].flush()
+
+    assert (caches[0].numHit, caches[0].numMis) == (1, 1)
+    assert (caches[1].numHit, caches[1].numMis) == (0, 0)
+    assert caches[1].stats() == sim.Cache(**CONFIG).stats()
+    assert first.read_bytes(0x10, 1) == b"\xab"
+    assert second.read_bytes(0x10, 1) == sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS).read_bytes(0x10, 1)
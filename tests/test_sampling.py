@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+import CacheSimulator as sim
+from helpers import ADDR_BITS, RAMFILE, random_records
+
+CONFIG = dict(cacheSize = 1024, blockSize = 8, assoc = 2, repPolicy = 2, hitPolicy = 2, addrBits = ADDR_BITS)
+
+
+def new_sim():
+    return sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS), sim.Cache(**CONFIG)
+
+
+def full_hit_rate(records) -> float:
+    ram, cache = new_sim()
+    return sim.replay_records(ram, cache, records)["hit_rate"]
+
+
+def test_measuring_every_access_gives_the_exact_hit_rate():
+    records = random_records(random.Random(20), 20000)
+    exact   = full_hit_rate(records)
+
+    for options in (dict(), dict(period = 1000, window = 1000)):
+        ram, cache = new_sim()
+        stats      = sim.sampled_replay(ram, cache, records, **options)
+
+        assert stats["hit_rate"] == pytest.approx(exact)
+        assert stats["sampled_accesses"] == stats["accesses"] == len(records)
+
+
+@pytest.mark.parametrize("options", (dict(setStep = 4), dict(period = 2000, window = 500, warmup = 500),
+                                     dict(setStep = 2, period = 2000, window = 1000, warmup = 500)))
+def test_sampled_estimates_bracket_the_real_hit_rate(options):
+    for seed in range(5):
+        records = random_records(random.Random(200 + seed), 40000, hot = 0.5)
+        exact   = full_hit_rate(records)
+
+        ram, cache = new_sim()
+        stats      = sim.sampled_replay(ram, cache, records, **options)
+
+        assert stats["sampled_accesses"] < len(records)
+        assert stats["hit_rate_low"] <= stats["hit_rate"] <= stats["hit_rate_high"]
+        assert stats["hit_rate_low"] <= exact <= stats["hit_rate_high"], (options, seed)
+        assert stats["hits"] + stats["misses"] == len(records)
+
+
+def test_the_interval_narrows_with_more_units_and_vanishes_for_a_census():
+    units = [[hits, 100] for hits in (40, 60, 50, 55, 45, 52, 48, 50)]
+
+    rate, wide   = sim.ratio_interval(units[:4], 1000)
+    _, narrow    = sim.ratio_interval(units, 1000)
+    _, census    = sim.ratio_interval(units, len(units))
+    _, unbounded = sim.ratio_interval(units[:1], 1000)
+
+    assert rate == 0.5125
+    assert narrow < wide
+    assert census == 0.0
+    assert unbounded == float("inf")
+
+
+@pytest.mark.parametrize("options", (dict(setStep = 0), dict(period = 100, window = 0), dict(period = 100, window = 80, warmup = 30),
+                                     dict(period = 100, window = 10, warmup = -1)))
+def test_windows_that_dont_fit_are_refused(options):
+    ram, cache = new_sim()
+    with pytest.raises(ValueError):
+        sim.sampled_replay(ram, cache, [], **options)
@@ -0,0 +1,81 @@
+import json
+import random
+import subprocess
+import sys
+
+import pytest
+
+import CacheSimulator as sim
+from helpers import ADDR_BITS, RAMFILE, ROOT, random_records
+
+CONFIG = dict(cacheSize = 256, blockSize = 8, assoc = 4, repPolicy = 1, hitPolicy = 2, misPolicy = 1)
+
+
+def local_results(records: list) -> tuple:
+    ram, cache = sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS), sim.Cache(addrBits = ADDR_BITS, seed = 0, **CONFIG)
+    results    = list()
+
+    for op, address, byte in records:
+        if op:
+            setNum, tag, lineIndex, vicNum, data = cache.store(address, byte, ram)
+        else:
+            setNum, tag, offNum, lineIndex, vicNum = cache.load(address, ram)
+            data = cache.get_block(setNum * cache.assoc + (vicNum if lineIndex == -1 else lineIndex), offNum)
+        results.append((int(lineIndex != -1), data))
+
+    return results, cache.stats()
+
+
+@pytest.fixture
+def server(tmp_path):
+    address = str(tmp_path / "sim.sock")
+    process = subprocess.Popen([sys.executable, str(ROOT / "CacheSimulator.py"), RAMFILE, "--address-bits", str(ADDR_BITS), "--serve", address],
+                               stdout = subprocess.PIPE, text = True)
+    try:
+        assert process.stdout.readline().strip() == f"listening:{address}"
+        yield address
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def test_a_session_answers_like_a_local_replay(server):
+    records = random_records(random.Random(24), 5000)
+    client  = sim.SimulationClient(server)
+
+    client.request(sim.SimulationServer.OPEN, session = "l1", **CONFIG)
+    results = [tuple(result) for result in client.access("l1", records[:2000])]
+
+    client.send_access("l1", records[2000:])                                            # a request sent before the batch was answered
+    client.send(sim.SimulationServer.LIST)
+    results += sim.ACCESS_RESULT.iter_unpack(client.receive())
+    assert json.loads(client.receive()) == {"sessions": ["l1"]}
+
+    stats = client.request(sim.SimulationServer.STATS, session = "l1")
+    client.close()
+
+    expected, expectedStats = local_results(records)
+    assert results == expected
+    assert stats["batched_accesses"] == len(records)
+    assert {key: stats[key] for key in expectedStats} == expectedStats
+
+
+def test_bad_batches_change_nothing():
+    server = sim.SimulationServer(RAMFILE, ADDR_BITS)
+    server.request(sim.SimulationServer.OPEN, {"session": "l1", **CONFIG})
+
+    def access(records) -> bytes:
+        body = bytearray((sim.SimulationServer.ACCESS, 2)) + b"l1"
+        for record in records: body += sim.ACCESS_RECORD.pack(*record)
+        return server.answer(bytes(body))[sim.FRAME_HEADER.size:]
+
+    tooFar   = access([(0, 0x10, 0), (1, 1 << ADDR_BITS, 0xAB)])
+    tooLarge = access([(0, 0x10, 0)] * (sim.SimulationServer.maxAccesses + 1))
+    cut      = server.answer(bytes((sim.SimulationServer.ACCESS, 2)) + b"l1" + b"\x00" * 5)[sim.FRAME_HEADER.size:]
+
+    assert tooFar[0] == 1 and "doesn't fit in 14 bits" in json.loads(tooFar[1:])["error"]
+    assert tooLarge[0] == 1 and "at most 65536 accesses" in json.loads(tooLarge[1:])["error"]
+    assert cut[0] == 1 and "whole access records" in json.loads(cut[1:])["error"]
+    assert server.sessions["l1"].stats()["accesses"] == 0
+
+    assert access([(0, 0x10, 0)])[:2] == b"\x00\x00"                                   # the session still works
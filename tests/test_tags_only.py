@@ -0,0 +1,83 @@
+import random
+import subprocess
+import sys
+
+import pytest
+
+import CacheSimulator as sim
+from helpers import ADDR_BITS, RAMFILE, ROOT, random_records, write_records
+
+
+def random_config(rnd: random.Random, **fixed) -> dict:
+    blockSize = rnd.choice((4, 8, 16))
+    assoc     = rnd.choice((1, 2, 4, 32))
+    sets      = rnd.choice((1, 4, 16))
+
+    config = dict(cacheSize = blockSize * assoc * sets, blockSize = blockSize, assoc = assoc, repPolicy = rnd.randint(1, 5),
+                  hitPolicy = rnd.randint(1, 2), misPolicy = rnd.randint(1, 2), prefetch = rnd.randint(0, 3))
+    config.update(fixed)
+    return config
+
+
+def new_sim(**config):
+    return sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS), sim.Cache(addrBits = ADDR_BITS, seed = 1, **config)
+
+
+def cache_state(cache) -> tuple:
+    return bytes(cache.tags), bytes(cache.validBits), bytes(cache.dirtyBits)
+
+
+def test_tags_only_matches_full_data():
+    rnd = random.Random(25)
+
+    for _ in range(60):
+        config  = random_config(rnd)
+        records = random_records(rnd, 3000)
+
+        ram, cache = new_sim(**config)
+        full      = sim.replay_records(ram, cache, records)
+        fullState = cache_state(cache), ram.numReads, ram.numWrites
+
+        ram, cache = new_sim(tagsOnly = True, **config)
+        tags = sim.replay_records(ram, cache, records)
+
+        assert tags == full, config
+        assert (cache_state(cache), ram.numReads, ram.numWrites) == fullState, config
+
+
+def test_checked_replay_finds_no_mismatches():
+    rnd = random.Random(26)
+
+    for hitPolicy in (1, 2):
+        for _ in range(20):
+            config  = random_config(rnd, hitPolicy = hitPolicy)
+            records = random_records(rnd, 1500)
+
+            ram, cache = new_sim(**config)
+            stats, mismatches = sim.checked_replay(ram, cache, records)
+
+            assert mismatches == [], config
+            assert stats["reads"] + stats["writes"] == len(records)
+
+
+def test_checked_replay_finds_a_corrupted_line():
+    rnd = random.Random(27)
+    ram, cache = new_sim(cacheSize = 256, blockSize = 8, assoc = 4, repPolicy = 2, hitPolicy = 1)
+    sim.replay_records(ram, cache, random_records(rnd, 500, writes = 0))
+
+    line = cache.validBits.find(1)
+    cache.data[line * cache.blockSize] ^= 0xFF
+
+    assert [row["line"] for row in sim.data_mismatches(ram, cache)] == [line]
+
+
+@pytest.mark.parametrize("flags, error", ((["--tags-only", "--cores", "2"], "--tags-only can't be used with --cores"),
+                                          (["--tags-only", "--check-data"], "--tags-only can't be used with --check-data"),
+                                          (["--check-data", "--fast"]     , "--fast can't be used with --check-data")))
+def test_options_that_need_the_data_are_refused(tmp_path, flags, error):
+    trace  = write_records(tmp_path / "trace.txt", random_records(random.Random(28), 100))
+    result = subprocess.run([sys.executable, str(ROOT / "CacheSimulator.py"), RAMFILE, "--address-bits", str(ADDR_BITS), "--trace", trace] + flags,
+                            capture_output = True, text = True)
+
+    assert result.returncode == 2
+    assert error in result.stderr
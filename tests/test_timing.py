@@ -0,0 +1,67 @@
+import random
+import subprocess
+import sys
+
+import pytest
+
+import CacheSimulator as sim
+from helpers import ADDR_BITS, RAMFILE, ROOT, random_records
+
+
+def new_cache(**config):
+    config = dict(dict(cacheSize = 256, blockSize = 16, assoc = 4, repPolicy = 2, hitPolicy = 2, addrBits = ADDR_BITS), **config)
+    return sim.Cache(**config)
+
+
+def test_amat_of_reads_adds_the_ram_time_of_every_miss():
+    ram    = sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS)
+    timing = sim.Timing(new_cache(), ram, hitLatency = (2,), ramLatency = 50, busWidth = 4, busCycles = 3)
+    reads  = [(0, address, 0) for _, address, _ in random_records(random.Random(16), 4000)]
+
+    stats = sim.replay_records(ram, timing, reads)
+
+    missTime = 50 + (16 // 4) * 3                                                       # a whole block crosses the bus
+    assert stats["cycles"] == 2 * 4000 + stats["misses"] * missTime
+    assert stats["amat"] == pytest.approx(2 + stats["misses"] / 4000 * missTime)
+    assert stats["read_amat"] == stats["amat"]
+    assert sum(count for key, count in stats.items() if key.startswith("read_latency_")) == 4000
+    assert stats["read_latency_2"] == stats["hits"]
+
+
+def test_amat_of_a_hierarchy_charges_each_level_it_reaches():
+    ram       = sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS)
+    levels    = [new_cache(cacheSize = 128, blockSize = 16, assoc = 2), new_cache(cacheSize = 1024, blockSize = 16, assoc = 4)]
+    hierarchy = sim.Hierarchy(levels, ram)
+    timing    = sim.Timing(hierarchy, ram, hitLatency = (1, 10), missPenalty = (0, 5), ramLatency = 100, busWidth = 16)
+    reads     = [(0, address, 0) for _, address, _ in random_records(random.Random(161), 4000)]
+
+    sim.replay_records(ram, timing, reads)
+
+    l1, l2   = levels
+    expected = (l1.numHit + l1.numMis) * 1 + (l2.numHit + l2.numMis) * 10 + l2.numMis * 5 + ram.numReads * 101
+    assert timing.cycles == expected
+
+
+def test_a_write_buffer_hides_write_through_stalls():
+    records = random_records(random.Random(162), 4000, writes = 0.3)
+
+    stats = list()
+    for writeBuffer in (0, 8):
+        ram    = sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS)
+        timing = sim.Timing(new_cache(hitPolicy = 1), ram, writeBuffer = writeBuffer)
+        stats.append(sim.replay_records(ram, timing, records))
+
+    assert stats[0]["write_stalls"] > stats[1]["write_stalls"]
+    assert stats[0]["cycles"] > stats[1]["cycles"]
+    assert stats[0]["misses"] == stats[1]["misses"]
+
+
+def test_prefetching_caches_cant_be_timed():
+    ram = sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS)
+    with pytest.raises(ValueError):
+        sim.Timing(new_cache(prefetch = 1), ram)
+
+    result = subprocess.run([sys.executable, str(ROOT / "CacheSimulator.py"), RAMFILE, "--trace", "trace.txt",
+                             "--timing", "--prefetch", "1"], capture_output = True, text = True)
+    assert result.returncode == 2
+    assert "--timing can't be used with --prefetch" in result.stderr
@@ -0,0 +1,52 @@
+import random
+import subprocess
+import sys
+
+import pytest
+
+import CacheSimulator as sim
+from helpers import ADDR_BITS, DATA, RAMFILE, ROOT, random_records, write_records
+
+
+@pytest.mark.parametrize("extension", (".bin", ".bin.gz", ".bin.bz2", ".bin.xz"))
+def test_binary_traces_round_trip(tmp_path, extension):
+    records = random_records(random.Random(12), 3 * sim.DECODED_CHUNK // 2)
+    trace   = str(tmp_path / ("trace" + extension))
+
+    assert sim.write_trace(records, trace) == len(records)
+    assert list(sim.trace_records(trace)) == records
+
+
+@pytest.mark.parametrize("extension", (".txt", ".txt.gz", ".txt.xz"))
+def test_every_trace_format_replays_alike(tmp_path, extension):
+    records = random_records(random.Random(13), 5000)
+    text    = write_records(tmp_path / "trace.txt", records)
+
+    with sim.open_trace(str(tmp_path / ("copy" + extension)), "wb") as file, open(text, "rb") as source:
+        file.write(source.read())
+    binary = str(tmp_path / "trace.bin")
+    sim.write_trace(sim.trace_records(text), binary)
+
+    results = list()
+    for trace in (text, str(tmp_path / ("copy" + extension)), binary):
+        ram   = sim.RAM(RAMFILE, debug = True, addrBits = ADDR_BITS)
+        cache = sim.Cache(cacheSize = 256, blockSize = 8, assoc = 4, repPolicy = 2, hitPolicy = 2, addrBits = ADDR_BITS)
+        results.append(sim.replay(ram, cache, trace))
+
+    assert results[0] == results[1] == results[2]
+
+
+def test_a_recorded_session_converts_without_its_flushes(tmp_path):
+    lines   = (DATA / "menu.txt").read_text().splitlines()
+    session = lines[:20] + ["cache-flush"] + lines[20:]
+    (tmp_path / "session.txt").write_text("\n".join(session) + "\n")
+
+    result = subprocess.run([sys.executable, str(ROOT / "CacheSimulator.py"), RAMFILE, "--trace", "session.txt",
+                             "--commands", "--convert", "trace.bin"], capture_output = True, text = True, cwd = tmp_path)
+
+    assert result.returncode == 0, result.stderr
+    assert "session.txt:21: cache-flush skipped" in result.stderr
+
+    expected = [line.split() for line in session if line.startswith(("cache-read", "cache-write"))]
+    expected = [(0, int(cmd[1], 16), 0) if cmd[0] == "cache-read" else (1, int(cmd[1], 16), int(cmd[2], 16)) for cmd in expected]
+    assert list(sim.trace_records(str(tmp_path / "trace.bin"))) == expected